@@ -0,0 +1,96 @@
+"""
+API용 DB 작업 실행기
+- 동기 SQLAlchemy 작업을 이벤트 루프 밖의 전용 스레드 풀에서 실행
+- 스레드 수 = API_DB_WORKERS (기본: DB 커넥션 풀 크기 pool_size + max_overflow 에서
+  같은 db_manager를 쓰는 다른 스레드(작업 큐 worker 등) 수를 뺀 값)
+  커넥션보다 스레드가 많으면 커넥션 풀 대기만 길어지므로 합쳐서 풀 크기를 넘기지 않음
+- 세션은 worker 스레드 안에서 생성/종료 (세션을 스레드 간에 넘기지 않음)
+
+느린 업로드가 스레드를 점유해도 이벤트 루프는 계속 다른 요청을 받으며,
+모든 스레드가 바쁠 때만 DB 작업이 대기합니다.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+DEFAULT_DB_WORKERS = 8
+
+
+def default_db_workers(db_manager=None, reserved: int = 0) -> int:
+    """환경변수 API_DB_WORKERS, 없으면 DB 커넥션 풀 크기 - reserved
+
+    Args:
+        db_manager: pool_capacity를 제공하는 DatabaseManager
+        reserved: 같은 커넥션 풀을 쓰는 다른 스레드 수 (작업 큐 worker 등 - 각각 커넥션 1개)
+    """
+    configured = os.getenv("API_DB_WORKERS")
+    if configured:
+        return max(int(configured), 1)
+    capacity = getattr(db_manager, 'pool_capacity', None)
+    if not capacity:
+        return DEFAULT_DB_WORKERS
+    if capacity - reserved < 1:
+        print(f"⚠️ DB 커넥션 풀({capacity})이 작업 큐 worker({reserved})보다 작습니다 "
+              f"- DB_POOL_SIZE / DB_MAX_OVERFLOW를 늘리세요")
+    return max(capacity - reserved, 1)
+
+
+class DBExecutor:
+    """전용 스레드 풀에서 세션 단위 DB 작업 실행"""
+
+    def __init__(self, db_manager, max_workers: Optional[int] = None):
+        """
+        Args:
+            db_manager: get_session()을 제공하는 DatabaseManager
+            max_workers: 스레드 수 (None이면 default_db_workers)
+        """
+        self.db_manager = db_manager
+        self.max_workers = max_workers or default_db_workers(db_manager)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-db")
+        self._lock = threading.Lock()
+        self._pending = 0  # 제출되었지만 끝나지 않은 작업 수 (실행 중 + 대기 중)
+
+    def _with_session(self, fn: Callable, args, kwargs):
+        with self.db_manager.get_session() as session:
+            return fn(session, *args, **kwargs)
+
+    def _tracked(self, call: Callable):
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def _submit(self, call: Callable):
+        with self._lock:
+            self._pending += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._tracked, call)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """fn(session, *args, **kwargs)를 worker 스레드에서 실행 (세션은 worker에서 생성, 정상 종료 시 commit)"""
+        return await self._submit(functools.partial(self._with_session, fn, args, kwargs))
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        """세션을 스스로 여는 동기 함수(crud_service 조회 등)를 worker 스레드에서 실행"""
+        return await self._submit(functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict:
+        """스레드 수와 처리 중인 작업 수"""
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.max_workers,
+            "pending": pending,
+            "queued": max(pending - self.max_workers, 0)
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def __repr__(self):
+        return f"DBExecutor(workers={self.max_workers})"
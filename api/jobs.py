@@ -0,0 +1,212 @@
+"""
+API 비동기 작업 큐
+- 업로드 요청은 검증 후 큐에 넣고 바로 job id를 반환 (202)
+- 고정 개수의 worker 스레드가 큐에서 꺼내 실행, 진행 단계/결과를 job에 기록
+- 큐가 가득 차면 submit()이 JobQueueFull을 던짐 (엔드포인트는 503 + Retry-After)
+
+기본 백엔드는 외부 broker 없이 동작하는 프로세스 내 큐(LocalJobQueue)입니다.
+job 상태도 프로세스 메모리에만 있으므로 API worker 프로세스가 여러 개면
+상태 조회는 job을 받은 프로세스로 가야 합니다.
+"""
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """큐에 빈 자리가 없음 (잠시 후 다시 요청)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """큐에 들어간 작업 1개의 상태"""
+
+    __slots__ = ('job_id', 'kind', 'status', 'stage', 'result', 'error',
+                 'created_at', 'started_at', 'finished_at', '_fn', '_args', '_kwargs')
+
+    def __init__(self, kind: str, fn: Callable, args, kwargs):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+    def __repr__(self):
+        return f"Job({self.job_id}, {self.kind}, {self.status})"
+
+
+class LocalJobQueue:
+    """프로세스 내 bounded 큐 + worker 스레드"""
+
+    def __init__(self, workers: int = 2, max_queued: int = 100, keep_finished: int = 1000,
+                 retry_after: int = 5):
+        """
+        Args:
+            workers: worker 스레드 수 (각 worker가 DB 커넥션 1개 사용 - API는 이만큼 DBExecutor 스레드를 줄임)
+            max_queued: 대기 가능한 작업 수 (넘으면 JobQueueFull)
+            keep_finished: 조회용으로 보관할 완료 작업 수 (오래된 것부터 삭제)
+            retry_after: 큐가 가득 찼을 때 안내할 재시도 대기 시간 (초)
+        """
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.retry_after = retry_after
+
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._threads = []
+        self._started = False
+
+    def start(self):
+        """worker 스레드 시작 (여러 번 호출해도 한 번만 시작)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"api-job-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, kind: str, fn: Callable, *args, **kwargs) -> Job:
+        """작업 등록 - fn(progress, *args, **kwargs)가 worker 스레드에서 실행됨
+
+        progress(stage)를 호출하면 job의 진행 단계가 갱신됩니다.
+
+        Raises:
+            JobQueueFull: 대기 중인 작업이 max_queued개
+        """
+        self.start()
+        job = Job(kind, fn, args, kwargs)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise JobQueueFull(self.retry_after)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+
+        def progress(stage):
+            job.stage = stage
+
+        try:
+            job.result = job._fn(progress, *job._args, **job._kwargs)
+            job.status = JOB_SUCCEEDED
+        except Exception as e:
+            print(f"Job {job.job_id} ({job.kind}) failed: {e}")
+            print(traceback.format_exc())
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            # 입력(업로드 JSON 등)은 더 이상 필요 없으므로 해제
+            job._fn = job._args = job._kwargs = None
+            self._mark_finished(job)
+
+    def _mark_finished(self, job: Job):
+        with self._lock:
+            self._finished[job.job_id] = None
+            while len(self._finished) > self.keep_finished:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == JOB_RUNNING)
+        return {
+            "backend": "local",
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": running,
+            "max_queued": self.max_queued
+        }
+
+    def shutdown(self, wait: bool = True):
+        """대기 중인 작업을 마친 뒤 worker 종료"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._started = False
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __repr__(self):
+        return f"LocalJobQueue(workers={self.workers}, max_queued={self.max_queued})"
+
+
+def create_job_queue(backend: Optional[str] = None) -> LocalJobQueue:
+    """환경변수 설정으로 작업 큐 생성
+
+    - API_JOB_BACKEND: 큐 백엔드 (현재 local만 지원)
+    - API_JOB_WORKERS: worker 스레드 수 (기본 2)
+    - API_JOB_QUEUE_SIZE: 대기 가능한 작업 수 (기본 100)
+    """
+    backend = backend or os.getenv("API_JOB_BACKEND", "local")
+    if backend != "local":
+        raise ValueError(f"지원하지 않는 작업 큐 백엔드: {backend}")
+    return LocalJobQueue(
+        workers=max(int(os.getenv("API_JOB_WORKERS", 2)), 1),
+        max_queued=max(int(os.getenv("API_JOB_QUEUE_SIZE", 100)), 1)
+    )
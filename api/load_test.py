@@ -0,0 +1,189 @@
+"""
+API 부하 테스트 (표준 라이브러리만 사용)
+- 여러 클라이언트 스레드가 혼합 트래픽(health / pool 조회 / analyze / upload)을 동시에 전송
+  (--mix에 upload_async를 넣으면 작업 큐 업로드도 전송, 503 응답은 오류로 집계)
+- 엔드포인트별 요청 수, 오류 수, p50/p95/p99/최대 지연시간(ms)과 전체 처리량 출력
+
+사용 예:
+    python api/load_test.py --url http://localhost:8002 --clients 32 --duration 30 \\
+        --upload-file source_data/people_json/sample.json --user-id 1
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# 기본 트래픽 비율 (가중치)
+DEFAULT_MIX = {
+    "health": 4,
+    "pool_profiles": 3,
+    "pool_profile": 2,
+    "analyze": 2,
+    "upload": 1
+}
+
+
+def percentile(sorted_values, q):
+    """정렬된 값에서 q (0~100) 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def _multipart_body(field_name, file_name, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+        f"Content-Type: application/json\r\n\r\n"
+    ).encode('utf-8') + content + f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class LoadTest:
+    """혼합 트래픽 부하 테스트"""
+
+    def __init__(self, base_url, mix=None, user_id=1, profile_id=1, upload_file=None, timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.user_id = user_id
+        self.profile_id = profile_id
+        self.timeout = timeout
+        self.upload_content = Path(upload_file).read_bytes() if upload_file else None
+
+        mix = dict(mix or DEFAULT_MIX)
+        if self.upload_content is None:
+            mix.pop("upload", None)
+            mix.pop("upload_async", None)
+        self.kinds = [kind for kind, weight in mix.items() if weight > 0]
+        self.weights = [mix[kind] for kind in self.kinds]
+
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)  # 종류 → [ms, ...] (성공한 요청)
+        self.errors = defaultdict(int)
+
+    def _request(self, kind):
+        if kind == "health":
+            return urllib.request.Request(f"{self.base_url}/health")
+        if kind == "pool_profiles":
+            return urllib.request.Request(f"{self.base_url}/api/pool/profiles?limit=20")
+        if kind == "pool_profile":
+            return urllib.request.Request(f"{self.base_url}/api/pool/profiles/{self.profile_id}")
+        if kind == "analyze":
+            return urllib.request.Request(f"{self.base_url}/api/user/{self.user_id}/analyze")
+        if kind in ("upload", "upload_async"):
+            # 업로드마다 다른 login_id를 쓰도록 이름만 바꿔서 전송
+            data = json.loads(self.upload_content.decode('utf-8'))
+            data["name"] = f"loadtest_{uuid.uuid4().hex[:12]}"
+            body, content_type = _multipart_body("file", f"{data['name']}.json",
+                                                 json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            path = "/api/user/upload" if kind == "upload" else "/api/user/upload/async"
+            return urllib.request.Request(f"{self.base_url}{path}", data=body,
+                                          headers={"Content-Type": content_type}, method="POST")
+        raise ValueError(f"unknown request kind: {kind}")
+
+    def _send(self, kind):
+        request = self._request(kind)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            if ok:
+                self.latencies[kind].append(elapsed_ms)
+            else:
+                self.errors[kind] += 1
+
+    def _client(self, deadline, seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            self._send(rng.choices(self.kinds, weights=self.weights)[0])
+
+    def run(self, clients=16, duration=10.0):
+        """clients개 스레드가 duration초 동안 요청 전송 후 결과 요약 반환"""
+        started = time.perf_counter()
+        deadline = started + duration
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            for seed in range(clients):
+                pool.submit(self._client, deadline, seed)
+        return self.summary(time.perf_counter() - started)
+
+    def summary(self, elapsed):
+        rows = {}
+        all_latencies = []
+        for kind in self.kinds:
+            values = sorted(self.latencies.get(kind, []))
+            all_latencies.extend(values)
+            rows[kind] = self._row(values, self.errors.get(kind, 0))
+        all_latencies.sort()
+        rows["all"] = self._row(all_latencies, sum(self.errors.values()))
+        rows["all"]["rps"] = round((len(all_latencies) + rows["all"]["errors"]) / elapsed, 1) if elapsed else None
+        return rows
+
+    @staticmethod
+    def _row(values, errors):
+        return {
+            "requests": len(values) + errors,
+            "errors": errors,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else None
+        }
+
+
+def print_summary(rows):
+    def fmt(value):
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    print(f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for kind, row in rows.items():
+        print(f"{kind:<14}{row['requests']:>9}{row['errors']:>8}"
+              f"{fmt(row['p50'])}{fmt(row['p95'])}{fmt(row['p99'])}{fmt(row['max'])}")
+    if rows.get("all", {}).get("rps") is not None:
+        print(f"\n처리량: {rows['all']['rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face Ratio Analyzer API 혼합 트래픽 부하 테스트")
+    parser.add_argument("--url", default="http://localhost:8002", help="API 주소")
+    parser.add_argument("--clients", type=int, default=16, help="동시 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="테스트 시간 (초)")
+    parser.add_argument("--user-id", type=int, default=1, help="analyze 대상 user_id")
+    parser.add_argument("--profile-id", type=int, default=1, help="조회할 pool profile id")
+    parser.add_argument("--upload-file", help="업로드에 사용할 User JSON (없으면 업로드 제외)")
+    parser.add_argument("--mix", help='트래픽 가중치 JSON (예: \'{"health": 5, "upload": 1, "upload_async": 1}\')')
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    test = LoadTest(
+        args.url,
+        mix=json.loads(args.mix) if args.mix else None,
+        user_id=args.user_id,
+        profile_id=args.profile_id,
+        upload_file=args.upload_file
+    )
+    rows = test.run(clients=args.clients, duration=args.duration)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_summary(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import json
@@ -21,7 +22,11 @@ from face_db_core.data_handler import DatabaseCRUD
 # Initialize db_manager
 db_manager = DatabaseManager()
 from utils.user_analyzer import UserAnalyzer
+from utils.analysis_cache import get_analysis_cache
 from sqlalchemy.orm import Session
+from api.db_executor import DBExecutor, default_db_workers
+from api.user_upload import process_user_upload, validate_user_json
+from api.jobs import JobQueueFull, create_job_queue
 
 
 # FastAPI 앱 생성
@@ -43,13 +48,53 @@ app.add_middleware(
 # Database CRUD 서비스
 crud_service = DatabaseCRUD()
 
+# 업로드 작업 큐 (POST /api/user/upload/async → GET /api/jobs/{job_id})
+job_queue = create_job_queue()
 
-# ==================== Dependency ====================
+# DB 작업 전용 스레드 풀 (엔드포인트는 이벤트 루프에서 동기 DB 작업을 직접 실행하지 않음)
+# 작업 큐 worker도 같은 db_manager 커넥션을 1개씩 쓰므로 그만큼 빼서
+# (실행기 스레드 + 작업 worker) ≤ 커넥션 풀 크기가 되도록 함
+db_executor = DBExecutor(db_manager, default_db_workers(db_manager, reserved=job_queue.workers))
 
-def get_db():
-    """Database session dependency"""
+
+@app.on_event("startup")
+def start_job_queue():
+    job_queue.start()
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    job_queue.shutdown(wait=True)
+    db_executor.shutdown(wait=True)
+
+
+# ==================== DB 작업 (worker 스레드에서 실행) ====================
+
+def _analyze_user(session: Session, user_id: int, top10_threshold: float, top25_threshold: float,
+                  if_none_match: Optional[str]):
+    analyzer = UserAnalyzer(session)
+    return analyzer.analyze_user_features_cached(
+        user_id, top10_threshold, top25_threshold, if_none_match=if_none_match
+    )
+
+
+def _run_upload_job(progress, file_name: str, json_data: Dict) -> Dict:
+    """작업 큐 worker에서 실행 - 세션도 worker 스레드에서 생성"""
+    with db_manager.get_session() as session:
+        return process_user_upload(session, crud_service, file_name, json_data, progress=progress)
+
+
+def _run_reanalyze_job(progress, workers: int, force: bool) -> Dict:
+    """작업 큐 worker에서 실행 - 전체 User percentile 일괄 갱신"""
     with db_manager.get_session() as session:
-        yield session
+        progress("reanalyzing")
+        return UserAnalyzer(session).reanalyze_all(workers=workers, force=force)
+
+
+def _list_pool_profiles(session: Session, skip: int, limit: int) -> List[Dict]:
+    from face_db_core.schema_def import PoolProfile
+    profiles = session.query(PoolProfile).offset(skip).limit(limit).all()
+    return [p.to_dict() for p in profiles]
 
 
 # ==================== Request/Response Models ====================
@@ -83,6 +128,9 @@ async def root():
         "endpoints": {
             "/health": "Health check",
             "/api/user/upload": "Upload user JSON with landmarks",
+            "/api/user/upload/async": "Queue user JSON upload (202 + job id)",
+            "/api/jobs/{job_id}": "Get upload job status and result",
+            "/api/users/reanalyze": "Queue percentile refresh for all users (202 + job id)",
             "/api/user/{user_id}/analyze": "Analyze user features",
             "/api/pool/profiles": "Get all pool profiles",
             "/api/pool/profiles/{profile_id}": "Get pool profile by ID"
@@ -93,18 +141,18 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    stats = crud_service.get_database_stats()
+    stats = await db_executor.call(crud_service.get_database_stats)
     return {
         "status": "healthy",
-        "database": stats
+        "database": stats,
+        "db_executor": db_executor.stats(),
+        "job_queue": job_queue.stats(),
+        "analysis_cache": get_analysis_cache().stats()
     }
 
 
 @app.post("/api/user/upload", response_model=Dict)
-async def upload_user_json(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
+async def upload_user_json(file: UploadFile = File(...)):
     """
     User JSON 파일 업로드 및 분석
 
@@ -117,83 +165,108 @@ async def upload_user_json(
         # JSON 파일 읽기
         content = await file.read()
         json_data = json.loads(content.decode('utf-8'))
-
-        # TODO: 실제 구현 시 user 정보 받아야 함
-        # 지금은 JSON에서 추출하거나 기본값 사용
-        name = json_data.get("name", "unknown")
-        login_id = json_data.get("login_id", f"user_{name}")
-        password = "hashed_password"  # TODO: 해시 처리 필요
-
-        # User 생성 및 landmarks 저장 (기존 data_handler 활용)
-        from face_db_core.schema_def import UserProfile, UserLandmark
-        user = UserProfile(
-            name=name,
-            login_id=login_id,
-            password=password,
-            json_file_path=file.filename
-        )
-        db.add(user)
-        db.flush()
-
-        # Landmarks 저장
-        landmarks = json_data.get("landmarks", [])
-        crud_service.save_landmarks_to_table(db, user.user_id, landmarks, is_user=True)
-
-        # 2nd tag 측정값 계산 (기존 calculate_measurement_value 활용)
-        from face_db_core.schema_def import Pool2ndTagDef, User2ndTagValue
-
-        tag_defs = db.query(Pool2ndTagDef).all()
-        for tag_def in tag_defs:
-            try:
-                # 3구간비율은 문자열이므로 제외
-                if tag_def.measurement_type == "3구간비율":
-                    continue
-
-                value = crud_service.calculate_measurement_value(landmarks, tag_def)
-
-                # 문자열 값은 저장 안함 (Float 컬럼이므로)
-                if isinstance(value, str):
-                    continue
-
-                tag_value = User2ndTagValue(
-                    user_id=user.user_id,
-                    tag_name=tag_def.tag_name,
-                    side=tag_def.side,
-                    측정값=value
-                )
-                db.add(tag_value)
-            except Exception as e:
-                print(f"Error calculating {tag_def.tag_name}: {e}")
-                continue
-
-        db.commit()
-
-        # User 특징 분석
-        analyzer = UserAnalyzer(db)
-        analysis_result = analyzer.analyze_user_features(user.user_id)
-
-        return {
-            "success": True,
-            "user_id": user.user_id,
-            "name": name,
-            "analysis": analysis_result
-        }
-
-    except json.JSONDecodeError as e:
+        validate_user_json(json_data)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         print(f"JSON Decode Error: {e}")
         raise HTTPException(status_code=400, detail="Invalid JSON format")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {str(e)}")
+
+    try:
+        # 저장/측정/분석은 DB worker 스레드에서 실행 (실패 시 세션에서 rollback)
+        return await db_executor.run(process_user_upload, crud_service, file.filename, json_data)
     except Exception as e:
         import traceback
         print(f"Upload Error: {e}")
         print(traceback.format_exc())
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@app.post("/api/user/upload/async", status_code=202)
+async def upload_user_json_async(file: UploadFile = File(...)):
+    """
+    User JSON 파일 업로드 (작업 큐)
+
+    - JSON 형식만 검사한 뒤 큐에 넣고 202 + job id 반환
+    - 저장/측정/분석은 작업 큐 worker가 실행
+    - 진행 상황과 결과는 GET /api/jobs/{job_id}로 조회
+    - 큐가 가득 차면 503 + Retry-After
+    """
+    try:
+        content = await file.read()
+        json_data = json.loads(content.decode('utf-8'))
+        validate_user_json(json_data)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid JSON format")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {str(e)}")
+
+    try:
+        job = job_queue.submit("user_upload", _run_upload_job, file.filename, json_data)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Upload queue is full",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.job_id}"
+        },
+        headers={"Location": f"/api/jobs/{job.job_id}"}
+    )
+
+
+@app.post("/api/users/reanalyze", status_code=202)
+async def reanalyze_users(workers: int = 4, force: bool = False):
+    """
+    전체 User percentile 일괄 갱신 (작업 큐)
+
+    - Pool이 바뀐 뒤 호출: 분포가 바뀐 태그와 아직 계산되지 않은 User 측정값만 갱신
+    - force=true면 모든 User/태그를 다시 계산
+    - 진행 상황과 결과(갱신한 태그/행 수)는 GET /api/jobs/{job_id}로 조회
+    """
+    try:
+        job = job_queue.submit("reanalyze_users", _run_reanalyze_job, max(workers, 1), force)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.job_id}"
+        },
+        headers={"Location": f"/api/jobs/{job.job_id}"}
+    )
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """작업 상태 조회 (queued → running → succeeded / failed, 완료 시 result 포함)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @app.get("/api/user/{user_id}/analyze", response_model=UserAnalysisResponse)
 async def analyze_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    top10_threshold: float = 0.90,
+    top25_threshold: float = 0.75
 ):
     """
     User 특징 분석
@@ -202,15 +275,25 @@ async def analyze_user(
     - Pool과 비교하여 percentile 계산
     - 특징 태그 추출 (상위 10% + 상위 25% relation 조합)
     - 1차, 0차 태그 역추적
+    - User 측정값/Pool/relation이 그대로면 캐시된 결과 반환 (ETag, If-None-Match → 304)
     """
     try:
-        analyzer = UserAnalyzer(db)
-        result = analyzer.analyze_user_features(user_id)
+        result, etag = await db_executor.run(
+            _analyze_user, user_id, top10_threshold, top25_threshold,
+            request.headers.get("if-none-match")
+        )
 
-        return {
-            "user_id": user_id,
-            **result
-        }
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if result is None:
+            return Response(status_code=304, headers=headers)
+
+        return JSONResponse(
+            content={
+                "user_id": user_id,
+                **result
+            },
+            headers=headers
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -219,30 +302,25 @@ async def analyze_user(
 @app.get("/api/pool/profiles")
 async def get_pool_profiles(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = 100
 ):
     """Pool 프로필 목록 조회"""
     try:
-        from face_db_core.schema_def import PoolProfile
-        profiles = db.query(PoolProfile).offset(skip).limit(limit).all()
+        profiles = await db_executor.run(_list_pool_profiles, skip, limit)
         return {
             "success": True,
             "count": len(profiles),
-            "profiles": [p.to_dict() for p in profiles]
+            "profiles": profiles
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
 @app.get("/api/pool/profiles/{profile_id}")
-async def get_pool_profile(
-    profile_id: int,
-    db: Session = Depends(get_db)
-):
+async def get_pool_profile(profile_id: int):
     """Pool 프로필 상세 조회"""
     try:
-        profile = crud_service.get_face_by_id(profile_id)
+        profile = await db_executor.call(crud_service.get_face_by_id, profile_id)
         if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
 
@@ -257,13 +335,10 @@ async def get_pool_profile(
 
 
 @app.get("/api/pool/tags/{tag_name}")
-async def get_profiles_by_tag(
-    tag_name: str,
-    db: Session = Depends(get_db)
-):
+async def get_profiles_by_tag(tag_name: str):
     """특정 태그를 가진 Pool 프로필들 조회"""
     try:
-        profiles = crud_service.get_faces_by_tag(tag_name)
+        profiles = await db_executor.call(crud_service.get_faces_by_tag, tag_name)
         return {
             "success": True,
             "tag_name": tag_name,
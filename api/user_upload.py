@@ -0,0 +1,103 @@
+"""
+User JSON 업로드 처리 파이프라인
+- User profile + landmarks 저장
+- 2nd tag 측정값 계산 (컴파일된 측정 계획)
+- 저장 후 특징 태그 분석
+
+요청 핸들러와 비동기 작업 worker가 같은 함수를 사용합니다.
+DB 작업만 하는 동기 함수이므로 이벤트 루프가 아닌 worker 스레드에서 호출해야 합니다.
+"""
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from face_db_core.schema_def import UserProfile, User2ndTagValue
+from utils.user_analyzer import UserAnalyzer
+
+
+def validate_user_json(json_data) -> None:
+    """업로드 JSON 형식 검사 (큐에 넣기 전에 요청 단계에서 실패시키기 위함)
+
+    Raises:
+        ValueError: 객체가 아니거나 landmarks가 리스트가 아님
+    """
+    if not isinstance(json_data, dict):
+        raise ValueError("JSON root must be an object")
+    if not isinstance(json_data.get("landmarks", []), list):
+        raise ValueError("'landmarks' must be a list")
+
+
+def parse_user_fields(json_data: Dict) -> Dict:
+    """업로드 JSON에서 User 기본 정보 추출"""
+    # TODO: 실제 구현 시 user 정보 받아야 함
+    # 지금은 JSON에서 추출하거나 기본값 사용
+    name = json_data.get("name", "unknown")
+    return {
+        "name": name,
+        "login_id": json_data.get("login_id", f"user_{name}"),
+        "password": "hashed_password"  # TODO: 해시 처리 필요
+    }
+
+
+def process_user_upload(session: Session, crud_service, file_name: str, json_data: Dict,
+                        progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """업로드된 User JSON 저장 및 분석
+
+    Args:
+        session: DB 세션 (호출한 worker 스레드에서 생성한 것)
+        crud_service: DatabaseCRUD
+        file_name: 업로드 파일 이름 (json_file_path로 저장)
+        json_data: 파싱된 JSON
+        progress: 단계 이름("saving", "measuring", "analyzing")을 받는 콜백 (작업 큐 진행 상황용)
+
+    Returns:
+        {"success", "user_id", "name", "analysis"}
+    """
+    progress = progress or (lambda stage: None)
+    fields = parse_user_fields(json_data)
+
+    progress("saving")
+
+    # User 생성 및 landmarks 저장 (기존 data_handler 활용)
+    user = UserProfile(
+        name=fields["name"],
+        login_id=fields["login_id"],
+        password=fields["password"],
+        json_file_path=file_name
+    )
+    session.add(user)
+    session.flush()
+
+    # Landmarks 저장
+    landmarks = json_data.get("landmarks", [])
+    crud_service.save_landmarks_to_table(session, user.user_id, landmarks, is_user=True)
+
+    # 2nd tag 측정값 계산 (컴파일된 측정 계획으로 전체 정의를 한 번에 계산)
+    progress("measuring")
+    plan = crud_service.get_measurement_plan(session)
+    values = plan.evaluate(landmarks)
+    for tag_def, value in zip(plan.definitions, values):
+        # 3구간비율은 문자열이므로 제외 (Float 컬럼)
+        if tag_def['measurement_type'] == "3구간비율":
+            continue
+
+        session.add(User2ndTagValue(
+            user_id=user.user_id,
+            tag_name=tag_def['tag_name'],
+            side=tag_def['side'],
+            측정값=value
+        ))
+
+    session.commit()
+
+    # User 특징 분석 (결과 캐시에도 저장 - 업로드 직후 analyze 조회는 캐시에서 응답)
+    progress("analyzing")
+    analyzer = UserAnalyzer(session)
+    analysis_result, _ = analyzer.analyze_user_features_cached(user.user_id)
+
+    return {
+        "success": True,
+        "user_id": user.user_id,
+        "name": fields["name"],
+        "analysis": analysis_result
+    }
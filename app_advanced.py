@@ -7,11 +7,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
 import numpy as np
 from pathlib import Path
-from collections import Counter
-from itertools import combinations
 
 # Database (face-db-core)
 from face_db_core import DatabaseManager
@@ -22,6 +19,10 @@ db_manager = DatabaseManager()
 
 # Utils modules
 from utils.landmark_calculator import calculate_landmarks_metric, calculate_length
+from utils.pool_snapshot import get_pool_snapshot_cache
+from utils.pool_store import attach_pool_store
+from utils.tag_index import TagIndex
+from utils.tag_mining import mine_tag_combinations, tag_cooccurrence_matrix
 from utils.data_analyzer import execute_length_based_analysis
 from utils.tag_processor import (
     get_tag_groups,
@@ -33,6 +34,9 @@ from utils.tag_processor import (
 )
 from utils.visualization import create_sankey_diagram
 
+# 폴더 동기화 후 mmap Pool 저장소도 갱신 (POOL_STORE_DIR이 설정된 경우)
+attach_pool_store(db_manager)
+
 # Page config
 st.set_page_config(
     page_title="Face Coordinate Analyzer",
@@ -48,69 +52,52 @@ def main():
     # 사이드바에 데이터베이스 관리 기능 추가
     render_database_management_sidebar()
 
-    # 랜드마크 데이터 로드
-    landmarks_data = load_landmarks_data()
+    # 랜드마크 데이터 로드 (태그 역색인/좌표 텐서는 스냅샷마다 한 번만 생성)
+    landmarks_data, tag_index, pool = load_landmarks_data()
 
     # 탭 생성
     tab1, tab2, tab3, tab4 = st.tabs(["🧮 좌표 분석", "🔗 태그 연관성 분석", "🌊 태그 관계도", "📊 태그-수치 분석"])
 
     with tab1:
-        render_landmarks_analysis_tab(landmarks_data)
+        render_landmarks_analysis_tab(landmarks_data, tag_index, pool)
 
     with tab2:
-        render_tag_analysis_tab(landmarks_data)
+        render_tag_analysis_tab(landmarks_data, tag_index)
 
     with tab3:
-        render_sankey_diagram_tab(landmarks_data)
+        render_sankey_diagram_tab(landmarks_data, tag_index)
 
     with tab4:
-        render_tag_analysis_tab_new(landmarks_data)
+        render_tag_analysis_tab_new(landmarks_data, tag_index, pool)
 
 
 def load_landmarks_data():
-    """랜드마크 데이터 로드"""
-    # DB에서 데이터 가져오기
-    db_data = crud_service.get_dataframe()
+    """랜드마크 데이터, 태그 역색인, 좌표 텐서 로드
 
-    if db_data.empty:
-        st.sidebar.warning("💡 DB에 저장된 데이터가 없습니다.")
-        return pd.DataFrame()
+    DB Pool + source_data/people_json 병합 결과는 프로세스 전역 스냅샷으로 캐시되어,
+    Pool 버전(동기화/수집 시 증가)이나 폴더 파일이 바뀐 경우에만 다시 로드됩니다.
 
-    # landmarks 컬럼이 있는 데이터만 필터링
-    landmarks_data = db_data[db_data['landmarks'].notna()].copy()
+    Returns:
+        (DataFrame, TagIndex, PoolTensor) - TagIndex/PoolTensor 행 순서는 DataFrame 행 위치와 같음
+    """
+    snapshot = get_pool_snapshot_cache().refresh(crud_service, Path("source_data/people_json"))
 
-    if landmarks_data.empty:
+    for file_name, error in snapshot.errors:
+        st.error(f"'{file_name}' 파일 로딩 오류: {error}")
+
+    if snapshot.db_count == 0:
+        st.sidebar.warning("💡 DB에 저장된 데이터가 없습니다.")
+        return pd.DataFrame(), TagIndex([]), None
+
+    if snapshot.data.empty:
         st.sidebar.warning("💡 landmarks가 포함된 데이터가 없습니다.")
-        return pd.DataFrame()
+        return pd.DataFrame(), TagIndex([]), None
 
-    # JSON 파일에서 추가 데이터 로드 및 병합
-    people_json_path = Path("source_data/people_json")
-    json_data_list = []
-    if people_json_path.exists():
-        for file_path in people_json_path.glob("*.json"):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    # 'landmarks' 데이터가 문자열이면 파싱
-                    if isinstance(json_data.get('landmarks'), str):
-                        json_data['landmarks'] = json.loads(json_data['landmarks'])
-                    json_data_list.append(json_data)
-            except Exception as e:
-                st.error(f"'{file_path.name}' 파일 로딩 오류: {e}")
-
-    json_df = pd.DataFrame(json_data_list)
-
-    # 3. 데이터 병합
-    if not json_df.empty:
-        # DB 데이터와 JSON 데이터를 합치고, 'name'을 기준으로 중복 제거 (JSON 파일 우선)
-        combined_data = pd.concat([landmarks_data, json_df], ignore_index=True)
-        combined_data.drop_duplicates(subset=['name'], keep='last', inplace=True)
-        landmarks_data = combined_data
-
-    return landmarks_data
-
-
-def render_landmarks_analysis_tab(landmarks_data):
+    # 탭에서 컬럼을 추가/변경해도 공유 스냅샷은 바뀌지 않도록 얕은 복사본 전달
+    return snapshot.data.copy(deep=False), snapshot.tag_index, snapshot.pool
+
+
+def render_landmarks_analysis_tab(landmarks_data, tag_index=None, pool=None):
     """좌표 분석 탭 렌더링"""
     st.header("🧮 좌표 분석 (실시간 계산)")
     st.markdown("두 거리를 기반으로 한 비교 분석")
@@ -191,19 +178,16 @@ def render_landmarks_analysis_tab(landmarks_data):
     st.sidebar.write("### 5. 태그 하이라이트")
     enable_tag_highlight = st.sidebar.checkbox("태그별 색상 구분 활성화")
 
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
     selected_tags = []
     if enable_tag_highlight:
-        # 현재 데이터에서 사용 가능한 태그들 추출
-        all_tags = set()
-        for _, row in landmarks_data.iterrows():
-            if 'tags' in row and row['tags']:
-                tags = row['tags'] if isinstance(row['tags'], list) else []
-                all_tags.update(tags)
-
-        if all_tags:
+        # 현재 데이터에서 사용 가능한 태그들 (역색인에 정렬되어 있음)
+        if tag_index.tags:
             selected_tags = st.sidebar.multiselect(
                 "하이라이트할 태그 선택:",
-                sorted(list(all_tags)),
+                tag_index.tags,
                 help="선택한 태그를 가진 데이터만 색상으로 표시됩니다."
             )
 
@@ -213,16 +197,18 @@ def render_landmarks_analysis_tab(landmarks_data):
             # 곡률 분석에서는 l1_points를 추가 파라미터로 전달
             execute_length_based_analysis(
                 landmarks_data, l1_p1, l1_p2, l1_calc, l2_p1, l2_p2, l2_calc, purpose,
-                normalize_ratio, swap_axes, enable_tag_highlight, selected_tags, l1_points
+                normalize_ratio, swap_axes, enable_tag_highlight, selected_tags, l1_points,
+                pool=pool, tag_index=tag_index
             )
         else:
             execute_length_based_analysis(
                 landmarks_data, l1_p1, l1_p2, l1_calc, l2_p1, l2_p2, l2_calc, purpose,
-                normalize_ratio, swap_axes, enable_tag_highlight, selected_tags
+                normalize_ratio, swap_axes, enable_tag_highlight, selected_tags,
+                pool=pool, tag_index=tag_index
             )
 
 
-def render_tag_analysis_tab(landmarks_data):
+def render_tag_analysis_tab(landmarks_data, tag_index=None):
     """태그 연관성 분석 탭 렌더링"""
     st.header("🔗 태그 연관성 분석")
 
@@ -238,16 +224,15 @@ def render_tag_analysis_tab(landmarks_data):
         return
 
     # 정의된 태그 그룹과 실제 데이터의 태그 비교
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
     tag_groups = get_tag_groups()
-    data_tags = set()
+    data_tags = set(tag_index.tags)
     defined_tags = set()
     for group_tags in tag_groups.values():
         defined_tags.update(group_tags)
 
-    for _, row in tag_data.iterrows():
-        if isinstance(row['tags'], list):
-            data_tags.update(row['tags'])
-
     all_unique_tags = sorted(list(data_tags.union(defined_tags)))
 
     st.write(f"### 📊 태그 현황")
@@ -262,30 +247,31 @@ def render_tag_analysis_tab(landmarks_data):
     # 태그 조합 분석
     st.write("### 🔄 태그 조합 분석")
 
-    # 조합 길이 선택
-    combination_length = st.selectbox(
-        "분석할 조합 길이:",
-        [2, 3, 4, 5],
-        index=0
-    )
+    # 조합 길이 / 최소 지지도 선택
+    col1, col2 = st.columns(2)
+    with col1:
+        combination_length = st.selectbox(
+            "분석할 조합 길이:",
+            [2, 3, 4, 5],
+            index=0
+        )
+    with col2:
+        min_support = st.number_input(
+            "최소 빈도 (얼굴 수):",
+            min_value=1,
+            value=1,
+            step=1,
+            help="이 빈도 미만인 조합은 탐색하지 않습니다."
+        )
 
     if st.button("조합 분석 실행"):
-        tag_combinations = []
-
-        for _, row in tag_data.iterrows():
-            if isinstance(row['tags'], list) and len(row['tags']) >= combination_length:
-                # 해당 길이의 모든 조합 생성
-                for combo in combinations(row['tags'], combination_length):
-                    tag_combinations.append(combo)
-
-        if tag_combinations:
-            # 조합 빈도 계산
-            combination_counts = Counter(tag_combinations)
+        # 태그 비트셋 기반 빈발 조합 탐색 (조합은 태그 이름 순으로 정렬된 튜플)
+        top_combinations = mine_tag_combinations(tag_index, combination_length, min_support=min_support, top_k=20)
 
+        if top_combinations:
             # 상위 조합 표시
             st.write(f"#### 🏆 상위 {combination_length}개 태그 조합")
 
-            top_combinations = combination_counts.most_common(20)
             combo_data = []
 
             for combo, count in top_combinations:
@@ -309,18 +295,8 @@ def render_tag_analysis_tab(landmarks_data):
 
                 top_tags = sorted(list(top_tags))
 
-                # 히트맵 매트릭스 생성
-                matrix = []
-                for tag1 in top_tags:
-                    row = []
-                    for tag2 in top_tags:
-                        if tag1 == tag2:
-                            count = combination_counts.get((tag1,), 0)  # 자기 자신은 단일 태그 빈도
-                        else:
-                            # 두 태그의 조합 빈도 (순서 무관)
-                            count = combination_counts.get((tag1, tag2), 0) + combination_counts.get((tag2, tag1), 0)
-                        row.append(count)
-                    matrix.append(row)
+                # 히트맵 매트릭스: 두 태그를 함께 가진 얼굴 수 (대각선은 단일 태그 빈도)
+                matrix = tag_cooccurrence_matrix(tag_index, top_tags).tolist()
 
                 if matrix and len(top_tags) > 1:
                     fig_heatmap = px.imshow(
@@ -337,7 +313,7 @@ def render_tag_analysis_tab(landmarks_data):
             st.warning(f"길이 {combination_length}의 태그 조합이 없습니다.")
 
 
-def render_sankey_diagram_tab(landmarks_data):
+def render_sankey_diagram_tab(landmarks_data, tag_index=None):
     """Sankey 다이어그램 탭 렌더링"""
     st.header("🌊 태그 관계도 (Sankey Diagram)")
 
@@ -346,7 +322,7 @@ def render_sankey_diagram_tab(landmarks_data):
         return
 
     # 태그 관계 분석
-    relationships = analyze_tag_relationships(landmarks_data)
+    relationships = analyze_tag_relationships(landmarks_data, tag_index)
 
     if not any(relationships.values()):
         st.warning("💡 태그 관계를 분석할 데이터가 충분하지 않습니다.")
@@ -413,7 +389,7 @@ def render_sankey_diagram_tab(landmarks_data):
     )
 
 
-def render_tag_analysis_tab_new(landmarks_data):
+def render_tag_analysis_tab_new(landmarks_data, tag_index=None, pool=None):
     """태그-수치 분석 탭 렌더링"""
     st.header("📊 태그-수치 분석")
 
@@ -427,31 +403,31 @@ def render_tag_analysis_tab_new(landmarks_data):
         ["🏷️ 단일 태그 분석", "📊 레벨별 비교 분석"]
     )
 
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
     if analysis_type == "🏷️ 단일 태그 분석":
-        render_single_tag_analysis(landmarks_data, 33, 133, "직선거리")
+        render_single_tag_analysis(landmarks_data, 33, 133, "직선거리", tag_index, pool)
     else:
-        render_level_comparison_analysis(landmarks_data, 33, 133, "직선거리")
+        render_level_comparison_analysis(landmarks_data, 33, 133, "직선거리", tag_index, pool)
 
 
-def render_single_tag_analysis(landmarks_data, point1, point2, calc_type):
+def render_single_tag_analysis(landmarks_data, point1, point2, calc_type, tag_index=None, pool=None):
     """단일 태그 분석 렌더링"""
     st.write("### 🏷️ 단일 태그 분석")
 
-    # 사용 가능한 태그 추출
-    all_tags = set()
-    for _, row in landmarks_data.iterrows():
-        if 'tags' in row and row['tags']:
-            tags = row['tags'] if isinstance(row['tags'], list) else []
-            all_tags.update(tags)
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
 
-    if not all_tags:
+    # 사용 가능한 태그 (역색인에 정렬되어 있음)
+    if not tag_index.tags:
         st.warning("분석할 태그가 없습니다.")
         return
 
     # 태그 선택
     selected_tag = st.selectbox(
         "분석할 태그 선택:",
-        sorted(list(all_tags))
+        tag_index.tags
     )
 
     # 측정 설정
@@ -464,10 +440,11 @@ def render_single_tag_analysis(landmarks_data, point1, point2, calc_type):
         calc_type = st.selectbox("계산 방식", ["직선거리", "X좌표거리", "Y좌표거리"], index=0)
 
     if st.button("단일 태그 분석 실행"):
-        execute_single_tag_analysis(landmarks_data, selected_tag, point1, point2, calc_type)
+        execute_single_tag_analysis(landmarks_data, selected_tag, point1, point2, calc_type,
+                                    pool=pool, tag_index=tag_index)
 
 
-def render_level_comparison_analysis(landmarks_data, point1, point2, calc_type):
+def render_level_comparison_analysis(landmarks_data, point1, point2, calc_type, tag_index=None, pool=None):
     """레벨별 비교 분석 렌더링"""
     st.write("### 📊 레벨별 비교 분석")
 
@@ -513,7 +490,8 @@ def render_level_comparison_analysis(landmarks_data, point1, point2, calc_type):
             calc_type = st.selectbox("계산 방식", ["직선거리", "X좌표거리", "Y좌표거리"], index=0, key="level_calc")
 
         if st.button("레벨별 비교 분석 실행", key="level_simple_exec"):
-            execute_level_comparison_analysis(landmarks_data, selected_feature, point1, point2, calc_type)
+            execute_level_comparison_analysis(landmarks_data, selected_feature, point1, point2, calc_type,
+                                              pool=pool, tag_index=tag_index)
 
     elif measurement_type == "비율 계산":
         # 분모와 분자를 한 줄에 배치
@@ -539,7 +517,8 @@ def render_level_comparison_analysis(landmarks_data, point1, point2, calc_type):
             calc_type1 = st.selectbox("분자-방식", ["직선거리", "X좌표거리", "Y좌표거리"], index=0, key="level_calc_num")
 
         if st.button("레벨별 비교 분석 실행 (비율)", key="level_ratio_exec"):
-            execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, point1, point2, calc_type1, point3, point4, calc_type2)
+            execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, point1, point2, calc_type1,
+                                                    point3, point4, calc_type2, pool=pool, tag_index=tag_index)
 
     elif measurement_type == "곡률 패턴":
         st.write("#### 곡률 패턴 분석 설정")
@@ -561,7 +540,8 @@ def render_level_comparison_analysis(landmarks_data, point1, point2, calc_type):
                 st.success(f"{len(point_group)}개 점 선택됨")
 
                 if st.button("레벨별 곡률 패턴 분석 실행", key="level_curvature_exec"):
-                    execute_level_curvature_analysis(landmarks_data, selected_feature, point_group)
+                    execute_level_curvature_analysis(landmarks_data, selected_feature, point_group,
+                                                     pool=pool, tag_index=tag_index)
         except:
             st.error("올바른 숫자 형식으로 입력하세요.")
             point_group = [33, 161, 160, 159, 158]
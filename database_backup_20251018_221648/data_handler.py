@@ -10,17 +10,22 @@ from typing import List, Dict, Optional
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.schema_def import (
-    PoolProfile, PoolBasicRatio, PoolLandmark, PoolTag,
-    Pool2ndTagDef, PoolTagThreshold, Pool2ndTagValue,
+    PoolProfile, PoolBasicRatioComponent, PoolLandmark, PoolTag,
+    Pool2ndTagDef, Pool2ndTagValue,
     UserProfile, UserLandmark, UserTag, PoolTagRelation
 )
-from database.ratio_storage import calculate_and_save_ratios
+from database.ratio_storage import save_ratios_from_landmarks, delete_ratio_rows, DEFAULT_RATIO_OPTIONS
+from database.measurement_plan import MeasurementPlan
+from database.threshold_registry import threshold_registry
+from database.ingest_worker import round_landmark_points
+from database.pool_state import get_pool_version as read_pool_version, get_definitions_version
+from database.face_landmarks import to_face_landmarks
 import pandas as pd
 import json
 import hashlib
 from datetime import datetime
-import math
 from pathlib import Path
+from sqlalchemy import func, insert, literal, select
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import Session
 
@@ -29,52 +34,141 @@ class DatabaseCRUD:
 
     def __init__(self):
         self._tag_classification_cache = None
+        self._measurement_plan = None  # (MeasurementPlan, 정의 테이블 key)
         print("🗄️ 데이터베이스 서비스 초기화 완료")
 
     # ==================== 데이터 조회 및 분석 ====================
 
+    # 기존 ratio_x/ratio_y 필터 - 대응하는 얼굴길이 비율(face_length_ratio)은 헤어라인 좌표가
+    # 있어야 계산되므로 저장되지 않음 (DEFAULT_RATIO_OPTIONS['hairline_point'] = None)
+    LEGACY_RATIO_RANGE_FILTERS = ('ratio_x_range', 'ratio_y_range')
+
+    @staticmethod
+    def ratio_range_condition(part, ratio_type, side='center', component=1, min_value=None, max_value=None):
+        """비율 성분 범위 조건 → PoolProfile.id IN (서브쿼리)
+
+        (part, ratio_type, side, component, value) 인덱스로 SQL에서 바로 걸러지므로
+        Pool 전체를 읽지 않습니다. min/max가 None이면 해당 쪽은 제한하지 않습니다.
+        """
+        subquery = select(PoolBasicRatioComponent.profile_id).where(
+            PoolBasicRatioComponent.part == part,
+            PoolBasicRatioComponent.ratio_type == ratio_type,
+            PoolBasicRatioComponent.side == side,
+            PoolBasicRatioComponent.component == component
+        )
+        if min_value is not None:
+            subquery = subquery.where(PoolBasicRatioComponent.value >= min_value)
+        if max_value is not None:
+            subquery = subquery.where(PoolBasicRatioComponent.value <= max_value)
+        return PoolProfile.id.in_(subquery)
+
+    def _apply_filters(self, query, filters):
+        """query_data / get_dataframe 공통 필터 (모든 조건은 PoolProfile 행을 늘리지 않는 WHERE 조건)
+
+        Args:
+            filters: dict
+                - tags: 태그 이름 목록 (부분 일치, 모두 만족)
+                - date_range: (시작, 끝) 업로드 날짜
+                - ratio_ranges: [{part, ratio_type, side, component, min, max}, ...]
+                  (side 기본 'center', component 기본 1 - 1부터 시작)
+                - ratio_x_range / ratio_y_range: 지원하지 않음 (ratio_ranges 사용)
+
+        Raises:
+            ValueError: ratio_x_range / ratio_y_range 필터가 지정됨
+        """
+        if not filters:
+            return query
+
+        # 태그 필터 (JOIN 대신 서브쿼리 - 태그가 여러 개 맞아도 프로필이 중복되지 않음)
+        for tag in filters.get('tags') or []:
+            query = query.filter(PoolProfile.id.in_(
+                select(PoolTag.profile_id).where(PoolTag.tag_name.like(f'%{tag}%'))
+            ))
+
+        # 날짜 필터
+        if 'date_range' in filters and filters['date_range']:
+            start_date, end_date = filters['date_range']
+            query = query.filter(PoolProfile.upload_date.between(start_date, end_date))
+
+        # 비율 범위 필터 (숫자 성분 테이블에서 SQL로 처리)
+        for filter_key in self.LEGACY_RATIO_RANGE_FILTERS:
+            if filters.get(filter_key):
+                raise ValueError(
+                    f"{filter_key} 필터는 지원하지 않습니다 (저장된 얼굴길이 비율 없음) - "
+                    f"ratio_ranges에 part/ratio_type/component를 지정하세요"
+                )
+
+        for ratio_range in filters.get('ratio_ranges') or []:
+            query = query.filter(self.ratio_range_condition(
+                ratio_range['part'],
+                ratio_range['ratio_type'],
+                ratio_range.get('side', 'center'),
+                ratio_range.get('component', 1),
+                ratio_range.get('min'),
+                ratio_range.get('max')
+            ))
+
+        return query
+
     def query_data(self, filters=None):
-        """데이터 쿼리"""
+        """데이터 쿼리 (필터는 _apply_filters 참고)"""
         from database.connect_db import db_manager
         with db_manager.get_session() as session:
-            query = session.query(PoolProfile).join(PoolBasicRatio, isouter=True)
-
-            if filters:
-                # 태그 필터
-                if 'tags' in filters and filters['tags']:
-                    tag_conditions = []
-                    for tag in filters['tags']:
-                        query = query.join(PoolTag).filter(PoolTag.tag_name.like(f'%{tag}%'))
-
-                # 날짜 필터
-                if 'date_range' in filters and filters['date_range']:
-                    start_date, end_date = filters['date_range']
-                    query = query.filter(PoolProfile.upload_date.between(start_date, end_date))
-
-                # 비율 범위 필터는 새로운 스키마에서는 다르게 처리 필요
-                # TODO: PoolBasicRatio의 새 구조(part, ratio_type, side)에 맞게 필터링 재구현
-                # if 'ratio_x_range' in filters and filters['ratio_x_range']:
-                #     min_val, max_val = filters['ratio_x_range']
-                #     query = query.filter(PoolBasicRatio.calculated_value...)
-                # if 'ratio_y_range' in filters and filters['ratio_y_range']:
-                #     min_val, max_val = filters['ratio_y_range']
-                #     query = query.filter(PoolBasicRatio.calculated_value...)
-
+            query = self._apply_filters(session.query(PoolProfile), filters)
             results = query.all()
             return [result.to_dict() for result in results]
 
-    def get_dataframe(self, filters=None):
-        """pandas DataFrame으로 데이터 반환"""
-        data = self.query_data(filters)
-        if not data:
-            return pd.DataFrame()
+    def get_dataframe(self, filters=None, include_landmarks=True):
+        """pandas DataFrame으로 데이터 반환
 
-        # 태그들을 문자열로 변환
-        for item in data:
-            item['tags_str'] = ', '.join(item.get('tags', []))
-            item['tag_count'] = len(item.get('tags', []))
+        ORM 객체/관계 lazy load 없이 두 번의 쿼리로 컬럼을 바로 만듭니다.
+        - 프로필 컬럼 + landmarks_json + ratios_json (1회)
+        - 태그 (profile_id, tag_name) (1회, 프로필별로 모음)
 
-        return pd.DataFrame(data)
+        landmarks 컬럼은 FaceLandmarks 배열 (landmarks가 없으면 None),
+        basic_ratio 컬럼은 ratios_json 항목 리스트 (없으면 None)입니다.
+        include_landmarks=False면 landmarks_json을 읽지 않고 landmarks 컬럼은 모두 None
+        (호출자가 mmap 저장소 등 다른 곳에서 채우는 경우)
+        """
+        from database.connect_db import db_manager
+        landmarks_column = PoolProfile.landmarks_json if include_landmarks else literal(None)
+        with db_manager.get_session() as session:
+            profile_query = self._apply_filters(session.query(
+                PoolProfile.id, PoolProfile.name, PoolProfile.json_file_path,
+                PoolProfile.image_file_path, PoolProfile.upload_date,
+                landmarks_column.label('landmarks_json'), PoolProfile.ratios_json
+            ), filters)
+            rows = profile_query.order_by(PoolProfile.id).all()
+            if not rows:
+                return pd.DataFrame()
+
+            tags_by_profile = {}
+            tag_query = session.query(PoolTag.profile_id, PoolTag.tag_name)
+            if filters:
+                filtered_ids = self._apply_filters(session.query(PoolProfile.id), filters).subquery()
+                tag_query = tag_query.filter(PoolTag.profile_id.in_(select(filtered_ids.c.id)))
+            for profile_id, tag_name in tag_query.order_by(PoolTag.id):
+                tags_by_profile.setdefault(profile_id, []).append(tag_name)
+
+        tags = [tags_by_profile.get(row.id, []) for row in rows]
+        return pd.DataFrame({
+            'id': [row.id for row in rows],
+            'name': [row.name for row in rows],
+            'json_file_path': [row.json_file_path for row in rows],
+            'image_file_path': [row.image_file_path for row in rows],
+            'upload_date': [row.upload_date.isoformat() if row.upload_date else None for row in rows],
+            'tags': tags,
+            'basic_ratio': [row.ratios_json or None for row in rows],
+            'landmarks': [to_face_landmarks(row.landmarks_json) if row.landmarks_json else None for row in rows],
+            'tags_str': [', '.join(profile_tags) for profile_tags in tags],
+            'tag_count': [len(profile_tags) for profile_tags in tags],
+        })
+
+    def get_pool_version(self) -> int:
+        """현재 Pool 데이터 버전 (동기화/수집으로 Pool이 바뀔 때마다 증가)"""
+        from database.connect_db import db_manager
+        with db_manager.get_session() as session:
+            return read_pool_version(session)
 
     def get_available_variables(self):
         """사용 가능한 변수 목록 반환"""
@@ -217,213 +311,113 @@ class DatabaseCRUD:
         # 기본값: 1차 태그로 분류
         return 1
 
+    def get_measurement_plan(self, session: Session) -> MeasurementPlan:
+        """Pool2ndTagDef 전체를 컴파일한 측정 계획 (정의가 바뀌었을 때만 다시 컴파일)
+
+        key = (정의 개수, 최대 id, 정의 버전) - 행 추가/삭제는 개수/id로, 기존 행 UPDATE는
+        bump_definitions_version()으로 올린 버전으로 감지
+        """
+        key = tuple(session.query(func.count(Pool2ndTagDef.id), func.max(Pool2ndTagDef.id)).one()) \
+            + (get_definitions_version(session),)
+        # (계획, key)를 한 번에 읽고 교체 - API worker 스레드들이 동시에 호출해도 짝이 어긋나지 않음
+        cached = self._measurement_plan
+        if cached is not None and cached[1] == key:
+            return cached[0]
+
+        definitions = session.query(Pool2ndTagDef).order_by(Pool2ndTagDef.id).all()
+        plan = MeasurementPlan(definitions)
+        self._measurement_plan = (plan, key)
+        return plan
+
+    def invalidate_measurement_plan(self):
+        """측정 계획 캐시 무효화"""
+        self._measurement_plan = None
+
     def auto_generate_secondary_tags(self, session: Session, profile_id: int, landmarks):
         """임계값 기반 2차 태그 자동 생성"""
         if not landmarks:
             return
 
-        # 모든 태그 카테고리와 측정 정의 가져오기
-        tag_definitions = session.query(Pool2ndTagDef).all()
+        # 모든 측정 정의를 한 번에 계산
+        plan = self.get_measurement_plan(session)
+        value_rows, tag_rows = self.build_secondary_tag_rows(
+            session, profile_id, plan.definitions, plan.evaluate(landmarks)
+        )
+
+        if value_rows:
+            session.execute(insert(Pool2ndTagValue), value_rows)
+        if tag_rows:
+            session.execute(insert(PoolTag), tag_rows)
 
-        for definition in tag_definitions:
-            try:
-                # 측정값 계산
-                calculated_value = self.calculate_measurement_value(landmarks, definition)
-
-                # 1. 측정값 저장 (3구간비율 제외, None이어도 저장)
-                if definition.measurement_type != "3구간비율":
-                    measurement_value = Pool2ndTagValue(
-                        profile_id=profile_id,
-                        tag_name=definition.tag_name,
-                        side=definition.side,
-                        측정값=calculated_value
-                    )
-                    session.add(measurement_value)
-
-                # 2. 값이 있을 때만 임계값 분류 및 태그 저장 (3구간비율도 제외)
-                if calculated_value is not None and definition.measurement_type != "3구간비율":
-                    tag_value = self.classify_by_threshold(session, definition.tag_name, calculated_value)
-
-                    if tag_value:
-                        # 3. 2차 태그 저장 (tag_name에 side 추가)
-                        if definition.side == "center":
-                            full_tag_name = definition.tag_name
-                        else:
-                            full_tag_name = f"{definition.tag_name}-{definition.side}"
-
-                        secondary_tag = PoolTag(
-                            profile_id=profile_id,
-                            tag_name=full_tag_name,  # "eye-길이-left", "eye-길이-right" 또는 "forehead-높이"
-                            tag_level=2,
-                            tag_value=tag_value  # "긴", "보통", "짧은"
-                        )
-                        session.add(secondary_tag)
+    def build_secondary_tag_rows(self, session: Session, profile_id: int, definitions, values):
+        """측정값 → (Pool2ndTagValue 행, 2차 PoolTag 행)
 
-            except Exception as e:
-                print(f"Error generating secondary tag for {definition.tag_name}: {e}")
+        Args:
+            definitions: MeasurementPlan.definitions
+            values: MeasurementPlan.evaluate() 결과 (definitions 순서)
+        """
+        value_rows = []
+        tag_rows = []
+
+        for definition, calculated_value in zip(definitions, values):
+            # 3구간비율은 문자열이므로 저장/분류 제외
+            if definition['measurement_type'] == "3구간비율":
                 continue
 
+            # 1. 측정값 저장 (None이어도 저장)
+            value_rows.append({
+                'profile_id': profile_id,
+                'tag_name': definition['tag_name'],
+                'side': definition['side'],
+                '측정값': calculated_value
+            })
+
+            # 2. 값이 있을 때만 임계값 분류 및 태그 저장
+            if calculated_value is None:
+                continue
+
+            tag_value = self.classify_by_threshold(session, definition['tag_name'], calculated_value)
+            if tag_value:
+                # 3. 2차 태그 저장 (tag_name에 side 추가)
+                if definition['side'] == "center":
+                    full_tag_name = definition['tag_name']
+                else:
+                    full_tag_name = f"{definition['tag_name']}-{definition['side']}"
+
+                tag_rows.append({
+                    'profile_id': profile_id,
+                    'tag_name': full_tag_name,  # "eye-길이-left", "eye-길이-right" 또는 "forehead-높이"
+                    'tag_level': 2,
+                    'tag_value': tag_value  # "긴", "보통", "짧은"
+                })
+
+        return value_rows, tag_rows
+
     def calculate_measurement_value(self, landmarks, definition):
-        """측정 정의에 따른 실제 측정값 계산"""
+        """측정 정의에 따른 실제 측정값 계산
+
+        여러 정의를 계산할 때는 get_measurement_plan()으로 한 번에 계산하는 편이 빠릅니다.
+        """
         if not landmarks or not definition:
             return None
 
-        # landmarks를 dict로 변환 (mpidx를 key로)
-        landmarks_dict = {}
-        for lm in landmarks:
-            if isinstance(lm, dict) and 'mpidx' in lm:
-                landmarks_dict[lm['mpidx']] = lm
-
         try:
-            if definition.measurement_type == "길이":
-                # 길이 측정 (분자만 사용)
-                if definition.분자_점1 is not None and definition.분자_점2 is not None:
-                    if definition.분자_점1 not in landmarks_dict or definition.분자_점2 not in landmarks_dict:
-                        return None
-
-                    p1 = landmarks_dict[definition.분자_점1]
-                    p2 = landmarks_dict[definition.분자_점2]
-
-                    # 거리 계산 방식에 따라
-                    if definition.거리계산방식 == "직선거리":
-                        distance = math.sqrt((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)
-                    elif definition.거리계산방식 == "x좌표거리":
-                        distance = abs(p1['x'] - p2['x'])
-                    elif definition.거리계산방식 == "y좌표거리":
-                        distance = abs(p1['y'] - p2['y'])
-                    else:
-                        distance = math.sqrt((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)
-
-                    return distance
-
-            elif definition.measurement_type == "각도":
-                # 각도 측정 (분자만 사용)
-                if definition.분자_점1 is not None and definition.분자_점2 is not None:
-                    if definition.분자_점1 not in landmarks_dict or definition.분자_점2 not in landmarks_dict:
-                        return None
-
-                    p1 = landmarks_dict[definition.분자_점1]
-                    p2 = landmarks_dict[definition.분자_점2]
-
-                    # 두 점을 잇는 선분과 x축 사이의 각도 (항상 예각)
-                    dx = p2['x'] - p1['x']
-                    dy = p2['y'] - p1['y']
-                    # atan2는 -π ~ π 범위의 라디안 반환
-                    angle_rad = math.atan2(dy, dx)
-                    # 라디안을 도(degree)로 변환
-                    angle_deg = math.degrees(angle_rad)
-                    # 항상 양수로 변환
-                    angle_deg = abs(angle_deg)
-                    # 예각으로 변환 (90도 초과시 180 - angle)
-                    if angle_deg > 90:
-                        angle_deg = 180 - angle_deg
-
-                    return angle_deg
-
-            elif definition.measurement_type == "비율":
-                # 비율 측정 (분자/분모)
-                if (definition.분자_점1 is not None and definition.분자_점2 is not None and
-                    definition.분모_점1 is not None and definition.분모_점2 is not None):
-
-                    if (definition.분자_점1 not in landmarks_dict or definition.분자_점2 not in landmarks_dict or
-                        definition.분모_점1 not in landmarks_dict or definition.분모_점2 not in landmarks_dict):
-                        return None
-
-                    # 분자 거리
-                    num_p1 = landmarks_dict[definition.분자_점1]
-                    num_p2 = landmarks_dict[definition.분자_점2]
-
-                    # 분모 거리
-                    den_p1 = landmarks_dict[definition.분모_점1]
-                    den_p2 = landmarks_dict[definition.분모_점2]
-
-                    # 거리 계산 방식에 따라
-                    if definition.거리계산방식 == "직선거리":
-                        numerator = math.sqrt((num_p1['x'] - num_p2['x'])**2 + (num_p1['y'] - num_p2['y'])**2)
-                        denominator = math.sqrt((den_p1['x'] - den_p2['x'])**2 + (den_p1['y'] - den_p2['y'])**2)
-                    elif definition.거리계산방식 == "x좌표거리":
-                        numerator = abs(num_p1['x'] - num_p2['x'])
-                        denominator = abs(den_p1['x'] - den_p2['x'])
-                    elif definition.거리계산방식 == "y좌표거리":
-                        numerator = abs(num_p1['y'] - num_p2['y'])
-                        denominator = abs(den_p1['y'] - den_p2['y'])
-                    else:
-                        numerator = math.sqrt((num_p1['x'] - num_p2['x'])**2 + (num_p1['y'] - num_p2['y'])**2)
-                        denominator = math.sqrt((den_p1['x'] - den_p2['x'])**2 + (den_p1['y'] - den_p2['y'])**2)
-
-                    if denominator != 0:
-                        return numerator / denominator
-
-            elif definition.measurement_type == "3구간비율":
-                # 3구간 비율 측정 (1:x:y 형식)
-                # 분자_점1-분자_점2: 첫 번째 구간 (기준=1)
-                # 분자_점2-분모_점1: 두 번째 구간
-                # 분모_점1-분모_점2: 세 번째 구간
-                if (definition.분자_점1 is not None and definition.분자_점2 is not None and
-                    definition.분모_점1 is not None and definition.분모_점2 is not None):
-
-                    if (definition.분자_점1 not in landmarks_dict or definition.분자_점2 not in landmarks_dict or
-                        definition.분모_점1 not in landmarks_dict or definition.분모_점2 not in landmarks_dict):
-                        return None
-
-                    # 3개 점 추출
-                    p1 = landmarks_dict[definition.분자_점1]
-                    p2 = landmarks_dict[definition.분자_점2]
-                    p3 = landmarks_dict[definition.분모_점1]
-                    p4 = landmarks_dict[definition.분모_점2]
-
-                    # 거리 계산 방식에 따라 3개 구간 거리 계산
-                    if definition.거리계산방식 == "직선거리":
-                        seg1 = math.sqrt((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)
-                        seg2 = math.sqrt((p2['x'] - p3['x'])**2 + (p2['y'] - p3['y'])**2)
-                        seg3 = math.sqrt((p3['x'] - p4['x'])**2 + (p3['y'] - p4['y'])**2)
-                    elif definition.거리계산방식 == "x좌표거리":
-                        seg1 = abs(p1['x'] - p2['x'])
-                        seg2 = abs(p2['x'] - p3['x'])
-                        seg3 = abs(p3['x'] - p4['x'])
-                    elif definition.거리계산방식 == "y좌표거리":
-                        seg1 = abs(p1['y'] - p2['y'])
-                        seg2 = abs(p2['y'] - p3['y'])
-                        seg3 = abs(p3['y'] - p4['y'])
-                    else:
-                        seg1 = math.sqrt((p1['x'] - p2['x'])**2 + (p1['y'] - p2['y'])**2)
-                        seg2 = math.sqrt((p2['x'] - p3['x'])**2 + (p2['y'] - p3['y'])**2)
-                        seg3 = math.sqrt((p3['x'] - p4['x'])**2 + (p3['y'] - p4['y'])**2)
-
-                    # 첫 번째 구간을 1로 기준
-                    if seg1 != 0:
-                        ratio_x = seg2 / seg1
-                        ratio_y = seg3 / seg1
-                        # "1:x:y" 형식으로 반환
-                        return f"1:{ratio_x:.2f}:{ratio_y:.2f}"
-
-            elif definition.measurement_type == "곡률":
-                # 곡률 측정 (향후 구현)
-                return None
-
-        except (IndexError, KeyError, TypeError) as e:
+            return MeasurementPlan([definition]).evaluate(landmarks)[0]
+        except (IndexError, KeyError, TypeError, ValueError) as e:
             print(f"Error calculating measurement for {definition.tag_name}: {e}")
             return None
 
-        return None
-
     def classify_by_threshold(self, session: Session, tag_name: str, value: float):
-        """임계값에 따른 태그 값 분류"""
-        thresholds = session.query(PoolTagThreshold).filter_by(tag_name=tag_name).all()
+        """임계값에 따른 태그 값 분류 (캐시된 임계값 구간 테이블 사용)"""
+        return threshold_registry.classify(session, tag_name, value)
 
-        for threshold in thresholds:
-            if (threshold.min_threshold is None or value >= threshold.min_threshold) and \
-               (threshold.max_threshold is None or value < threshold.max_threshold):
-                return threshold.value_name
-
-        return None
-
-    def process_tags_for_face(self, session, profile_id: int, tags_data, landmarks=None):
-        """프로필에 태그들을 처리하여 추가 (공통 로직)"""
+    def build_tag_rows(self, profile_id: int, tags_data) -> List[Dict]:
+        """태그 데이터 → PoolTag 행 목록 ("eye-길이-긴" 형태는 2차 태그로 분리)"""
         tags = tags_data or []
         if isinstance(tags, str):
             tags = [tag.strip() for tag in tags.split(',')]
 
+        rows = []
         for tag in tags:
             if tag.strip():
                 tag_level = self.determine_tag_level(tag)
@@ -433,21 +427,30 @@ class DatabaseCRUD:
                     parts = tag.split('-')
                     tag_category = f"{parts[0]}-{parts[1]}"  # "eye-길이"
                     tag_value = parts[2]  # "긴"
-                    tag_obj = PoolTag(
-                        profile_id=profile_id,
-                        tag_name=tag_category,
-                        tag_level=tag_level,
-                        tag_value=tag_value
-                    )
+                    rows.append({
+                        'profile_id': profile_id,
+                        'tag_name': tag_category,
+                        'tag_level': tag_level,
+                        'tag_value': tag_value
+                    })
                 else:
                     # 0차, 1차 태그 또는 패턴이 맞지 않는 태그
-                    tag_obj = PoolTag(
-                        profile_id=profile_id,
-                        tag_name=tag.strip(),
-                        tag_level=tag_level,
-                        tag_value=None
-                    )
-                session.add(tag_obj)
+                    rows.append({
+                        'profile_id': profile_id,
+                        'tag_name': tag.strip(),
+                        'tag_level': tag_level,
+                        'tag_value': None
+                    })
+        return rows
+
+    def process_tags_for_face(self, session, profile_id: int, tags_data, landmarks=None):
+        """프로필에 태그들을 처리하여 추가 (공통 로직)
+
+        Returns:
+            저장된 소수점 3자리 landmarks (landmarks가 없으면 None)
+        """
+        for row in self.build_tag_rows(profile_id, tags_data):
+            session.add(PoolTag(**row))
 
         # 2차 태그 자동 생성 (임계값 기반)
         if landmarks:
@@ -455,7 +458,8 @@ class DatabaseCRUD:
 
         # Landmark 데이터를 별도 테이블에 저장
         if landmarks:
-            self.save_landmarks_to_table(session, profile_id, landmarks)
+            return self.save_landmarks_to_table(session, profile_id, landmarks)
+        return None
 
     def save_landmarks_to_table(self, session, profile_id: int, landmarks, is_user: bool = False):
         """landmarks 데이터를 별도 Landmark 테이블에 저장
@@ -465,13 +469,33 @@ class DatabaseCRUD:
             profile_id: Profile ID (Pool) or User ID (User)
             landmarks: landmarks 데이터
             is_user: True면 UserLandmark, False면 PoolLandmark
+
+        Returns:
+            소수점 3자리로 반올림된 JSONB용 landmarks 리스트 (mp_idx 키 사용) 또는 None
         """
         if not landmarks:
-            return
+            return None
+
+        saved = self.save_landmarks_bulk(session, {profile_id: landmarks}, is_user=is_user)
+        return saved.get(profile_id)
+
+    def save_landmarks_bulk(self, session, landmarks_by_id: Dict[int, object], is_user: bool = False) -> Dict[int, List[Dict]]:
+        """여러 얼굴의 landmarks를 한 번의 DELETE와 multi-row INSERT로 저장
+
+        Args:
+            session: DB session
+            landmarks_by_id: {profile_id (또는 user_id): landmarks 데이터}
+            is_user: True면 UserLandmark, False면 PoolLandmark
+
+        Returns:
+            {profile_id: 소수점 3자리로 반올림된 JSONB용 landmarks 리스트}
+        """
+        landmarks_by_id = {key: value for key, value in landmarks_by_id.items() if value}
+        if not landmarks_by_id:
+            return {}
 
         # 테이블 선택
         if is_user:
-            from database.schema_def import UserLandmark
             LandmarkModel = UserLandmark
             id_field = 'user_id'
         else:
@@ -479,51 +503,39 @@ class DatabaseCRUD:
             id_field = 'profile_id'
 
         # 기존 landmarks 삭제 (중복 방지)
-        session.query(LandmarkModel).filter_by(**{id_field: profile_id}).delete()
-
-        # landmarks가 JSON 문자열인 경우 파싱
-        if isinstance(landmarks, str):
-            import json
-            try:
-                landmarks = json.loads(landmarks)
-            except json.JSONDecodeError:
-                print(f"Warning: Invalid JSON in landmarks for {id_field} {profile_id}")
-                return
-
-        # 각 landmark 포인트를 테이블에 저장 (소수점 3자리까지만) + JSONB 병행 저장
-        jsonb_landmarks = []
-        for landmark in landmarks:
-            if isinstance(landmark, dict) and 'mpidx' in landmark:
-                mp_idx = landmark.get('mpidx')
-                x = round(landmark.get('x', 0.0), 3)
-                y = round(landmark.get('y', 0.0), 3)
-                z_val = round(landmark.get('z', 0.0), 3) if landmark.get('z') is not None else None
-
-                landmark_obj = LandmarkModel(
-                    **{id_field: profile_id},
-                    mp_idx=mp_idx,
-                    x=x,
-                    y=y,
-                    z=z_val
-                )
-                session.add(landmark_obj)
-
-                # JSONB용 구조(mp_idx 키 사용)
-                jsonb_item = {
-                    'mp_idx': mp_idx,
-                    'x': float(x),
-                    'y': float(y)
-                }
-                if z_val is not None:
-                    jsonb_item['z'] = float(z_val)
-                jsonb_landmarks.append(jsonb_item)
+        session.query(LandmarkModel).filter(
+            getattr(LandmarkModel, id_field).in_(list(landmarks_by_id))
+        ).delete(synchronize_session=False)
+
+        rows = []
+        saved = {}
+        for profile_id, landmarks in landmarks_by_id.items():
+            # landmarks가 JSON 문자열인 경우 파싱
+            if isinstance(landmarks, str):
+                try:
+                    landmarks = json.loads(landmarks)
+                except json.JSONDecodeError:
+                    print(f"Warning: Invalid JSON in landmarks for {id_field} {profile_id}")
+                    continue
+
+            # 각 landmark 포인트 (소수점 3자리까지만) + JSONB 병행 저장
+            points, jsonb_landmarks = round_landmark_points(landmarks)
+            rows.extend(dict(point, **{id_field: profile_id}) for point in points)
+            saved[profile_id] = jsonb_landmarks
+
+        # ORM 객체 없이 한 번의 executemany (드라이버에서 multi-row INSERT로 묶임)
+        if rows:
+            session.execute(insert(LandmarkModel), rows)
 
         # PoolProfile.landmarks_json에 병행 저장 (Pool만 해당)
+        # session.get()은 같은 세션에서 만든 프로필을 identity map에서 바로 반환 (추가 조회 없음)
         if not is_user:
-            from database.schema_def import PoolProfile
-            profile = session.query(PoolProfile).filter_by(id=profile_id).first()
-            if profile is not None:
-                profile.landmarks_json = jsonb_landmarks
+            for profile_id, jsonb_landmarks in saved.items():
+                profile = session.get(PoolProfile, profile_id)
+                if profile is not None:
+                    profile.landmarks_json = jsonb_landmarks
+
+        return saved
 
     def remove_all_tags_for_face(self, session, profile_id: int):
         """특정 프로필의 모든 태그 삭제"""
@@ -586,35 +598,44 @@ class DatabaseCRUD:
         session.flush()  # ID 생성을 위해
 
         # 태그 및 landmarks 저장 (통합된 메서드 사용)
-        self.process_tags_for_face(
+        saved_landmarks = self.process_tags_for_face(
             session,
             profile.id,
             json_data.get('tags', []),
             json_data.get('landmarks', [])
         )
 
-        session.flush()  # landmarks가 DB에 저장되도록
-
-        # PoolBasicRatio는 landmarks로부터 자동 계산
-        # ratio_storage의 calculate_and_save_ratios 함수가 처리
-        options = {
-            'hairline_point': None,  # user_clicked 헤어라인은 JSON에 없으면 None
-            'double_eyelid': False,  # 기본값
-            'image_width': 800,
-            'image_height': 600
-        }
-
-        # landmarks 저장 후 비율 계산
-        calculate_and_save_ratios(session, profile.id, options)
+        # PoolBasicRatio는 저장된 landmarks(메모리)로부터 자동 계산 - 재조회/중간 커밋 없음
+        # (hairline_point: JSON에 없으면 None, double_eyelid: 기본값 False)
+        options = dict(DEFAULT_RATIO_OPTIONS)
+        save_ratios_from_landmarks(session, profile.id, saved_landmarks, options)
 
         return profile
 
     def update_face_tags(self, session, face_id: int, tags_data, landmarks=None):
-        """기존 프로필의 태그 업데이트"""
+        """기존 프로필의 태그/측정값/비율 업데이트 (수정된 JSON 파일 동기화)
 
-        # 기존 태그 삭제 후 새 태그 추가
+        태그만이 아니라 이전 landmarks로 계산한 Pool2ndTagValue와 PoolBasicRatio(숫자 성분, ratios_json)도
+        지우고 새 landmarks로 다시 계산합니다 (남기면 측정값이 중복되고 비율 필터가 이전 값을 봄).
+        """
+
+        # 기존 태그/2차 태그 측정값 삭제 후 새로 추가
         self.remove_all_tags_for_face(session, face_id)
-        self.process_tags_for_face(session, face_id, tags_data, landmarks)
+        session.query(Pool2ndTagValue).filter_by(profile_id=face_id).delete(synchronize_session=False)
+        saved_landmarks = self.process_tags_for_face(session, face_id, tags_data, landmarks)
+
+        if saved_landmarks:
+            # 기존 비율 행은 save_ratios_from_landmarks 안에서 삭제 후 재계산
+            save_ratios_from_landmarks(session, face_id, saved_landmarks, dict(DEFAULT_RATIO_OPTIONS))
+            return
+
+        # landmarks가 없어진 파일 - 이전 landmarks와 비율도 제거
+        self.remove_all_landmarks_for_face(session, face_id)
+        delete_ratio_rows(session, [face_id])
+        profile = session.get(PoolProfile, face_id)
+        if profile is not None:
+            profile.landmarks_json = []
+            profile.ratios_json = []
 
     def delete_face_data(self, session, profile):
         """프로필 데이터 및 관련 태그 삭제"""
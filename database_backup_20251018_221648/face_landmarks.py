@@ -0,0 +1,181 @@
+"""
+mpidx 기반 고정 크기 랜드마크 배열 표현
+"""
+import json
+
+import numpy as np
+
+
+# MediaPipe 인덱스 범위 (0~491, 500) - 492~499는 항상 비어있음
+MAX_MPIDX = 500
+LANDMARK_SLOTS = MAX_MPIDX + 1
+
+
+class FaceLandmarks:
+    """얼굴 1개의 랜드마크를 mpidx로 바로 조회할 수 있는 배열
+
+    - coords: (501, 3) float32 배열, 행 번호 = mpidx
+    - mask: (501,) bool 배열, 해당 mpidx 점의 존재 여부
+
+    z 값이 없는 점은 NaN으로 저장되어, z를 사용하는 계산만 실패합니다.
+    """
+
+    __slots__ = ('coords', 'mask')
+
+    def __init__(self, coords=None, mask=None, dtype=np.float32):
+        if coords is None:
+            coords = np.full((LANDMARK_SLOTS, 3), np.nan, dtype=dtype)
+        if mask is None:
+            mask = ~np.isnan(coords[:, 0])
+        self.coords = coords
+        self.mask = mask
+
+    @classmethod
+    def from_landmarks(cls, landmarks, dtype=np.float32):
+        """다양한 랜드마크 입력을 FaceLandmarks로 변환
+
+        Args:
+            landmarks: FaceLandmarks, JSON 문자열, 또는
+                [{'mpidx'|'mp_idx': int, 'x': float, 'y': float, 'z': float}, ...]
+            dtype: 좌표 배열 타입 (DB 저장용 측정값처럼 정밀도가 필요하면 np.float64)
+
+        Returns:
+            FaceLandmarks (이미 FaceLandmarks면 그대로 반환)
+        """
+        if isinstance(landmarks, cls):
+            return landmarks
+        # 이 모듈은 database.face_landmarks / face_db_core.face_landmarks 두 이름으로 로드될 수 있어
+        # 클래스가 둘이 됨 - 다른 쪽 FaceLandmarks도 배열을 복사하지 않고 감싸서 사용
+        if hasattr(landmarks, 'coords') and hasattr(landmarks, 'mask'):
+            return cls(landmarks.coords, landmarks.mask)
+
+        if isinstance(landmarks, str):
+            landmarks = json.loads(landmarks)
+
+        face = cls(dtype=dtype)
+        if not landmarks:
+            return face
+
+        for lm in landmarks:
+            if not isinstance(lm, dict):
+                continue
+            idx = lm.get('mpidx', lm.get('mp_idx'))
+            if idx is None or not 0 <= int(idx) <= MAX_MPIDX:
+                continue
+            x, y, z = lm.get('x'), lm.get('y'), lm.get('z')
+            if x is None or y is None:
+                continue
+            face.coords[int(idx)] = (x, y, np.nan if z is None else z)
+            face.mask[int(idx)] = True
+
+        return face
+
+    def has(self, point_ids):
+        """모든 점이 존재하는지 확인"""
+        try:
+            return bool(self.mask[list(point_ids)].all())
+        except (IndexError, TypeError):
+            return False
+
+    def take(self, point_ids):
+        """점 번호 순서대로 (n, 3) float64 좌표 배열 반환 (하나라도 없으면 None)"""
+        ids = list(point_ids)
+        if any(not isinstance(i, (int, np.integer)) or not 0 <= i <= MAX_MPIDX for i in ids):
+            return None
+        if not self.mask[ids].all():
+            return None
+        return self.coords[ids].astype(np.float64)
+
+    def get(self, point_id):
+        """단일 점 {'mpidx', 'x', 'y', 'z'} 반환 (없으면 None)"""
+        point = self.take([point_id])
+        if point is None:
+            return None
+        x, y, z = point[0]
+        return {'mpidx': point_id, 'x': float(x), 'y': float(y), 'z': None if np.isnan(z) else float(z)}
+
+    def to_list(self):
+        """기존 list-of-dict 형식으로 변환"""
+        return [self.get(int(idx)) for idx in np.flatnonzero(self.mask)]
+
+    def __len__(self):
+        return int(self.mask.sum())
+
+    def __repr__(self):
+        return f"FaceLandmarks({len(self)} points)"
+
+
+def to_face_landmarks(landmarks, dtype=np.float32):
+    """DataFrame 컬럼 변환용: 변환 불가능한 값은 None"""
+    if landmarks is None or (isinstance(landmarks, float) and np.isnan(landmarks)):
+        return None
+    try:
+        return FaceLandmarks.from_landmarks(landmarks, dtype=dtype)
+    except (ValueError, TypeError):
+        return None
+
+
+class PoolTensor:
+    """여러 얼굴의 랜드마크를 (faces × 501 × 3) 배열로 묶은 풀 텐서
+
+    - coords: (F, 501, 3) float32 배열 (from_faces의 dtype으로 변경 가능)
+    - mask: (F, 501) bool 배열
+    - ids: 각 행에 대응하는 얼굴 식별자 (DataFrame 행 순서와 동일)
+    """
+
+    __slots__ = ('coords', 'mask', 'ids')
+
+    def __init__(self, coords, mask, ids=None):
+        self.coords = coords
+        self.mask = mask
+        self.ids = list(ids) if ids is not None else list(range(len(coords)))
+
+    @classmethod
+    def from_faces(cls, faces, ids=None, dtype=np.float32):
+        """FaceLandmarks(또는 변환 가능한 값) 목록으로 풀 텐서 생성 - 변환 불가 행은 빈 얼굴
+
+        DB 저장값처럼 단일 계산 경로와 같은 결과가 필요하면 dtype=np.float64
+        """
+        faces = [to_face_landmarks(face, dtype) for face in faces]
+        coords = np.full((len(faces), LANDMARK_SLOTS, 3), np.nan, dtype=dtype)
+        mask = np.zeros((len(faces), LANDMARK_SLOTS), dtype=bool)
+        for i, face in enumerate(faces):
+            if face is not None:
+                coords[i] = face.coords
+                mask[i] = face.mask
+        return cls(coords, mask, ids)
+
+    @classmethod
+    def from_dataframe(cls, landmarks_data, id_column='name'):
+        """landmarks 컬럼을 가진 DataFrame으로 풀 텐서 생성 (행 순서 유지)"""
+        if landmarks_data.empty or 'landmarks' not in landmarks_data.columns:
+            return cls.from_faces([])
+        ids = landmarks_data[id_column].tolist() if id_column in landmarks_data.columns else None
+        return cls.from_faces(landmarks_data['landmarks'].tolist(), ids)
+
+    def take(self, point_ids):
+        """점 번호 순서대로 (F, n, 3) float64 좌표 반환
+
+        점이 없는 얼굴(또는 범위를 벗어난 점 번호)은 해당 위치가 NaN
+        """
+        result = np.full((len(self), len(point_ids), 3), np.nan)
+        for j, point_id in enumerate(point_ids):
+            if isinstance(point_id, (int, np.integer)) and 0 <= point_id <= MAX_MPIDX:
+                result[:, j] = self.coords[:, point_id]
+                result[~self.mask[:, point_id], j] = np.nan
+        return result
+
+    def has(self, point_ids):
+        """(F,) bool - 모든 점이 존재하는 얼굴"""
+        present = np.ones(len(self), dtype=bool)
+        for point_id in point_ids:
+            if not isinstance(point_id, (int, np.integer)) or not 0 <= point_id <= MAX_MPIDX:
+                return np.zeros(len(self), dtype=bool)
+            present &= self.mask[:, point_id]
+        return present
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __repr__(self):
+        return f"PoolTensor({len(self)} faces)"
@@ -1,64 +1,150 @@
 """
 파일 감시 서비스
 """
+import threading
 import time
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 
+class DebouncedEventQueue:
+    """경로별로 합쳐지는 파일 이벤트 큐
+
+    - 같은 경로의 이벤트는 마지막 이벤트 하나로 합쳐짐 (중복 제거)
+    - 마지막 이벤트 후 debounce 초 동안 조용한 경로만 꺼냄 (쓰기 완료 대기)
+    - 처리에 실패한 경로는 requeue()로 지정한 시간 뒤에 다시 꺼냄
+    """
+
+    def __init__(self, debounce=0.5):
+        self.debounce = debounce
+        self._pending = {}  # 경로 → (이벤트 종류, 꺼낼 수 있는 시각)
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, path, kind):
+        """이벤트 추가 (kind: "changed" 또는 "deleted") - 즉시 반환"""
+        with self._condition:
+            self._pending[path] = (kind, time.monotonic() + self.debounce)
+            self._condition.notify()
+
+    def requeue(self, items, delay):
+        """처리하지 못한 [(경로, 이벤트 종류), ...]를 delay초 뒤에 다시 꺼내도록 등록
+
+        그 사이 같은 경로에 새 이벤트가 들어왔으면 새 이벤트를 유지합니다.
+        """
+        with self._condition:
+            ready_at = time.monotonic() + delay
+            for path, kind in items:
+                self._pending.setdefault(path, (kind, ready_at))
+            self._condition.notify()
+
+    def get_batch(self, max_items=100):
+        """debounce가 지난 경로들을 최대 max_items개 꺼냄
+
+        Returns:
+            [(경로, 이벤트 종류), ...] - 큐가 닫히고 비었으면 None
+        """
+        with self._condition:
+            while True:
+                if self._closed and not self._pending:
+                    return None
+
+                now = time.monotonic()
+                ready = [
+                    path for path, (_, ready_at) in self._pending.items()
+                    if self._closed or now >= ready_at
+                ]
+                if ready:
+                    return [(path, self._pending.pop(path)[0]) for path in ready[:max_items]]
+
+                if self._pending:
+                    # 가장 먼저 준비될 경로까지만 대기
+                    earliest = min(ready_at for _, ready_at in self._pending.values())
+                    self._condition.wait(max(earliest - now, 0.01))
+                else:
+                    self._condition.wait()
+
+    def close(self):
+        """남은 이벤트는 debounce 없이 꺼낼 수 있도록 하고 대기 중인 worker를 깨움"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+
 class JSONFileHandler(FileSystemEventHandler):
-    """JSON 파일 변경 감지 핸들러"""
+    """JSON 파일 변경 감지 핸들러 - 이벤트를 큐에 넣기만 함 (DB 작업 없음)"""
 
-    def __init__(self, db_manager):
-        self.db_manager = db_manager
+    def __init__(self, event_queue, watch_path):
+        self.event_queue = event_queue
+        self.watch_path = Path(watch_path).resolve()
         print("📁 파일 감시 핸들러 초기화 완료")
 
+    def _is_watched_json(self, path):
+        path = Path(path)
+        return path.suffix == '.json' and path.resolve().parent == self.watch_path
+
     def on_created(self, event):
         """새 파일 생성 시"""
         if event.is_directory:
             return
 
-        if event.src_path.endswith('.json'):
-            print(f"🆕 새 JSON 파일 발견: {event.src_path}")
-            self._process_file(event.src_path)
+        if self._is_watched_json(event.src_path):
+            self.event_queue.put(event.src_path, "changed")
 
     def on_modified(self, event):
         """파일 수정 시"""
         if event.is_directory:
             return
 
-        if event.src_path.endswith('.json'):
-            print(f"📝 JSON 파일 수정됨: {event.src_path}")
-            self._process_file(event.src_path)
+        if self._is_watched_json(event.src_path):
+            self.event_queue.put(event.src_path, "changed")
 
-    def _process_file(self, file_path):
-        """파일 처리"""
-        try:
-            # 파일 쓰기가 완료될 때까지 잠시 대기
-            time.sleep(0.5)
+    def on_deleted(self, event):
+        """파일 삭제 시"""
+        if event.is_directory:
+            return
 
-            # 폴더 동기화 실행 (단일 파일도 폴더 동기화로 처리)
-            folder_path = str(Path(file_path).parent)
-            result = self.db_manager.sync_with_folder(folder_path)
+        if event.src_path.endswith('.json'):
+            self.event_queue.put(event.src_path, "deleted")
 
-            if result and (result.get('added', 0) > 0 or result.get('updated', 0) > 0):
-                print(f"   ✅ {Path(file_path).name} 처리 완료")
-            else:
-                print(f"   ⚠️ {Path(file_path).name} 변경사항 없음")
+    def on_moved(self, event):
+        """파일 이동/이름 변경 시 - 원래 경로는 삭제, 새 경로는 변경으로 처리"""
+        if event.is_directory:
+            return
 
-        except Exception as e:
-            print(f"   ❌ 파일 처리 오류: {e}")
+        if event.src_path.endswith('.json'):
+            self.event_queue.put(event.src_path, "deleted")
+        if self._is_watched_json(event.dest_path):
+            self.event_queue.put(event.dest_path, "changed")
 
 
 class FileWatcherService:
-    """파일 감시 서비스"""
+    """파일 감시 서비스
+
+    watchdog 스레드는 이벤트를 큐에 넣기만 하고, 별도 worker 스레드가
+    debounce가 지난 파일들만 모아 db_manager.sync_files()로 배치 처리합니다.
+    배치 처리 중 오류가 나면 (트랜잭션이 롤백되므로) 배치 전체를 지수 백오프
+    (retry_delay, 2배씩, 최대 max_retry_delay초) 후 다시 시도하고,
+    max_retries번 연속 실패한 경로만 버립니다.
+    """
 
-    def __init__(self, db_manager, watch_path="source_data/people_json"):
+    def __init__(self, db_manager, watch_path="source_data/people_json", debounce=0.5, batch_size=100,
+                 max_retries=5, retry_delay=1.0, max_retry_delay=60.0):
         self.db_manager = db_manager
         self.watch_path = Path(watch_path)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._failures = {}  # 경로 → 연속 실패 횟수 (worker 스레드에서만 사용)
         self.observer = Observer()
-        self.handler = JSONFileHandler(db_manager)
+        self.event_queue = DebouncedEventQueue(debounce)
+        self.worker = threading.Thread(target=self._run_worker, name="file-watcher-sync", daemon=True)
 
         # 감시할 디렉토리 확인
         if not self.watch_path.exists():
@@ -66,11 +152,62 @@ class FileWatcherService:
             self.watch_path.mkdir(parents=True, exist_ok=True)
             print(f"📁 디렉토리 생성: {self.watch_path}")
 
+        self.handler = JSONFileHandler(self.event_queue, self.watch_path)
+
+    def _run_worker(self):
+        """큐에서 debounce가 지난 파일들을 꺼내 배치 동기화"""
+        while True:
+            batch = self.event_queue.get_batch(self.batch_size)
+            if batch is None:
+                break
+
+            changed = [Path(path).name for path, kind in batch if kind == "changed"]
+            deleted = [Path(path).name for path, kind in batch if kind == "deleted"]
+
+            try:
+                result = self.db_manager.sync_files(
+                    self.watch_path, changed=changed, deleted=deleted, batch_size=self.batch_size
+                )
+                print(
+                    f"   ✅ {len(batch)}개 파일 처리 완료 "
+                    f"(추가 {result['added']}, 수정 {result['updated']}, 삭제 {result['deleted']}, "
+                    f"변경없음 {result['unchanged']}, 실패 {result['failed']})"
+                )
+            except Exception as e:
+                print(f"   ❌ 파일 처리 오류: {e}")
+                self._retry_later(batch)
+                continue
+
+            for path, _ in batch:
+                self._failures.pop(path, None)
+
+    def _retry_later(self, batch):
+        """실패한 배치를 백오프 후 다시 큐에 넣음 (재시도 한도를 넘은 경로는 버림)"""
+        retry, dropped = [], []
+        for path, kind in batch:
+            failures = self._failures.get(path, 0) + 1
+            if failures > self.max_retries:
+                self._failures.pop(path, None)
+                dropped.append(path)
+            else:
+                self._failures[path] = failures
+                retry.append((path, kind))
+
+        if dropped:
+            print(f"   ⚠️ {len(dropped)}개 파일 {self.max_retries}회 재시도 실패 - 건너뜀 "
+                  f"(sync_with_folder로 다시 동기화 필요): {', '.join(Path(path).name for path in dropped[:5])}")
+        if retry:
+            attempts = max(self._failures[path] for path, _ in retry)
+            delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+            print(f"   🔁 {len(retry)}개 파일 {delay:.1f}초 후 재시도 ({attempts}/{self.max_retries})")
+            self.event_queue.requeue(retry, delay)
+
     def start(self):
         """서비스 시작"""
         print(f"👁️ 파일 감시 시작: {self.watch_path.absolute()}")
 
         try:
+            self.worker.start()
             self.observer.schedule(
                 self.handler,
                 str(self.watch_path),
@@ -79,8 +216,7 @@ class FileWatcherService:
             self.observer.start()
 
             print("🔄 파일 감시 서비스가 시작되었습니다.")
-            print("   - 새 JSON 파일 추가 시 자동 DB 동기화")
-            print("   - 기존 JSON 파일 수정 시 자동 업데이트")
+            print(f"   - JSON 파일 추가/수정/삭제/이동 시 {self.event_queue.debounce}초 후 변경된 파일만 DB 동기화")
             print("   - Ctrl+C로 종료")
 
             # 무한 대기
@@ -94,8 +230,11 @@ class FileWatcherService:
             print(f"❌ 파일 감시 시작 실패: {e}")
 
     def stop(self):
-        """서비스 중지"""
+        """서비스 중지 (남은 이벤트는 처리 후 종료)"""
         print("\n🛑 파일 감시 서비스 중지 중...")
         self.observer.stop()
         self.observer.join()
-        print("✅ 파일 감시 서비스가 중지되었습니다.")
\ No newline at end of file
+        self.event_queue.close()
+        if self.worker.is_alive():
+            self.worker.join()
+        print("✅ 파일 감시 서비스가 중지되었습니다.")
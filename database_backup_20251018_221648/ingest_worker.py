@@ -0,0 +1,105 @@
+"""
+Pool JSON 대량 수집용 worker 함수
+- 프로세스 풀에서 실행: JSON 파싱, 2차 태그 측정값, 기본 비율 계산
+- DB에는 접근하지 않음 (저장은 DatabaseManager.bulk_import의 단일 writer가 담당)
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from database.measurement_plan import MeasurementPlan
+from database.ratio_storage import calculate_ratio_rows
+
+
+def round_landmark_points(landmarks):
+    """landmarks → 소수점 3자리로 반올림한 Landmark 테이블 행과 JSONB용 리스트
+
+    Returns:
+        (points, jsonb_landmarks)
+        - points: [{'mp_idx', 'x', 'y', 'z'}, ...] (z가 없으면 None)
+        - jsonb_landmarks: [{'mp_idx', 'x', 'y'[, 'z']}, ...]
+    """
+    points = []
+    jsonb_landmarks = []
+    for landmark in landmarks:
+        if isinstance(landmark, dict) and 'mpidx' in landmark:
+            mp_idx = landmark.get('mpidx')
+            x = round(landmark.get('x', 0.0), 3)
+            y = round(landmark.get('y', 0.0), 3)
+            z_val = round(landmark.get('z', 0.0), 3) if landmark.get('z') is not None else None
+
+            points.append({'mp_idx': mp_idx, 'x': x, 'y': y, 'z': z_val})
+
+            # JSONB용 구조(mp_idx 키 사용)
+            jsonb_item = {
+                'mp_idx': mp_idx,
+                'x': float(x),
+                'y': float(y)
+            }
+            if z_val is not None:
+                jsonb_item['z'] = float(z_val)
+            jsonb_landmarks.append(jsonb_item)
+
+    return points, jsonb_landmarks
+
+
+# worker 프로세스별 상태 (init_worker에서 한 번 생성)
+_plan = None
+_options = None
+
+
+def init_worker(definitions, options):
+    """프로세스 풀 initializer - 측정 계획을 프로세스당 한 번만 컴파일
+
+    Args:
+        definitions: Pool2ndTagDef.to_dict() 리스트
+        options: 비율 계산 옵션 (DEFAULT_RATIO_OPTIONS)
+    """
+    global _plan, _options
+    _plan = MeasurementPlan(definitions)
+    _options = options
+
+
+def prepare_face_file(file_path):
+    """JSON 파일 1개 → writer가 그대로 저장할 수 있는 계산 결과
+
+    Returns:
+        dict {file_name, name, mtime_ns, size, content_hash, tags,
+              points, landmarks_json, values, ratios} 또는 None (읽기/파싱 실패)
+    """
+    try:
+        stat = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        json_data = json.loads(raw.decode('utf-8'))
+        file_name = Path(file_path).name
+        name = json_data.get('name', Path(file_name).stem)
+
+        landmarks = json_data.get('landmarks', [])
+        if isinstance(landmarks, str):
+            landmarks = json.loads(landmarks)
+    except Exception as e:
+        print(f"Error preparing {file_path}: {e}")
+        return None
+
+    points, landmarks_json = round_landmark_points(landmarks) if landmarks else ([], [])
+
+    # 2차 태그 측정값은 원본 좌표로 계산 (auto_generate_secondary_tags와 동일)
+    values = _plan.evaluate(landmarks) if landmarks else None
+
+    # 기본 비율은 DB에 저장되는 소수점 3자리 좌표로 계산 (calculate_and_save_ratios와 동일)
+    ratios = calculate_ratio_rows(points, _options) if points else []
+
+    return {
+        'file_name': file_name,
+        'name': name,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'content_hash': hashlib.sha256(raw).hexdigest(),
+        'tags': json_data.get('tags', []),
+        'points': points,
+        'landmarks_json': landmarks_json,
+        'values': values,
+        'ratios': ratios
+    }
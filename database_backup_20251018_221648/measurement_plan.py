@@ -0,0 +1,169 @@
+"""
+2차 태그 측정 정의(Pool2ndTagDef) 컴파일 및 벡터 계산
+"""
+import numpy as np
+
+from database.face_landmarks import FaceLandmarks, MAX_MPIDX
+
+
+# 거리계산방식 → 모드 (정의되지 않은 방식은 직선거리)
+DISTANCE_MODES = {"직선거리": 0, "x좌표거리": 1, "y좌표거리": 2}
+
+
+def _point_index(value):
+    """정의의 점 번호를 배열 인덱스로 (없거나 범위 밖이면 None)"""
+    if value is None:
+        return None
+    value = int(value)
+    return value if 0 <= value <= MAX_MPIDX else -1
+
+
+def _distances(coords, first, second, modes):
+    """(F, 501, 3) 좌표에서 점쌍별 2D 거리 (F, k) - 모드별 직선/x/y 거리"""
+    delta = coords[:, first, :2] - coords[:, second, :2]
+    straight = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+    return np.where(modes == 0, straight, np.where(modes == 1, np.abs(delta[..., 0]), np.abs(delta[..., 1])))
+
+
+class MeasurementPlan:
+    """측정 정의 목록을 한 번 컴파일해 둔 계산 계획
+
+    정의마다 문자열 비교를 반복하는 대신 측정 타입별로 점 인덱스 배열을 묶어 두고,
+    얼굴 1개 또는 여러 개에 대해 모든 정의를 한 번에 계산합니다.
+
+    - 길이: 분자_점1-분자_점2 거리
+    - 각도: 분자_점1→분자_점2 선분과 x축 사이의 예각
+    - 비율: 분자 거리 / 분모 거리
+    - 3구간비율: "1:x:y" 문자열 (얼굴 1개 계산에서만 반환)
+    - 곡률 및 점이 정의되지 않은 항목: 항상 None
+    """
+
+    def __init__(self, definitions):
+        """
+        Args:
+            definitions: Pool2ndTagDef 객체 또는 to_dict() 형태의 dict 리스트
+        """
+        self.definitions = []
+        groups = {"길이": [], "각도": [], "비율": [], "3구간비율": []}
+
+        for position, definition in enumerate(definitions):
+            if not isinstance(definition, dict):
+                definition = definition.to_dict()
+
+            measurement_type = definition['measurement_type']
+            self.definitions.append({
+                'tag_name': definition['tag_name'],
+                'side': definition.get('side'),
+                'measurement_type': measurement_type
+            })
+
+            points = [_point_index(definition.get(key)) for key in ('분자_점1', '분자_점2', '분모_점1', '분모_점2')]
+            mode = DISTANCE_MODES.get(definition.get('거리계산방식'), 0)
+
+            if measurement_type in ("길이", "각도"):
+                required = points[:2]
+            elif measurement_type in ("비율", "3구간비율"):
+                required = points
+            else:
+                continue
+
+            # 점이 정의되지 않은 항목은 계산하지 않음 (항상 None)
+            if any(point is None for point in required):
+                continue
+            groups[measurement_type].append((position, required, mode))
+
+        self._groups = {}
+        for measurement_type, entries in groups.items():
+            if not entries:
+                continue
+            positions = np.array([entry[0] for entry in entries])
+            points = np.array([entry[1] for entry in entries])
+            modes = np.array([entry[2] for entry in entries])
+            self._groups[measurement_type] = (positions, points, modes)
+
+    def __len__(self):
+        return len(self.definitions)
+
+    def _evaluate_arrays(self, coords, mask):
+        """(F, 501, 3) 좌표와 (F, 501) 마스크에 대해 모든 정의를 계산
+
+        Returns:
+            values: (F, D) float64 - 수치 측정값 (계산 불가는 NaN)
+            segments: (F, D, 2) float64 - 3구간비율의 (x, y) (그 외는 NaN)
+        """
+        n_faces = len(coords)
+        values = np.full((n_faces, len(self.definitions)), np.nan)
+        segments = np.full((n_faces, len(self.definitions), 2), np.nan)
+
+        # 범위 밖 점(-1)은 항상 없는 점으로 취급하기 위해 빈 슬롯을 하나 덧붙임
+        coords = np.concatenate([coords, np.full((n_faces, 1, 3), np.nan)], axis=1).astype(np.float64)
+        mask = np.concatenate([mask, np.zeros((n_faces, 1), dtype=bool)], axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if "길이" in self._groups:
+                positions, points, modes = self._groups["길이"]
+                distance = _distances(coords, points[:, 0], points[:, 1], modes)
+                present = mask[:, points[:, 0]] & mask[:, points[:, 1]]
+                values[:, positions] = np.where(present, distance, np.nan)
+
+            if "각도" in self._groups:
+                positions, points, _ = self._groups["각도"]
+                delta = coords[:, points[:, 1], :2] - coords[:, points[:, 0], :2]
+                # 두 점을 잇는 선분과 x축 사이의 각도 (항상 예각)
+                angle = np.abs(np.arctan2(delta[..., 1], delta[..., 0]) * (180.0 / np.pi))
+                angle = np.where(angle > 90, 180 - angle, angle)
+                present = mask[:, points[:, 0]] & mask[:, points[:, 1]]
+                values[:, positions] = np.where(present, angle, np.nan)
+
+            if "비율" in self._groups:
+                positions, points, modes = self._groups["비율"]
+                numerator = _distances(coords, points[:, 0], points[:, 1], modes)
+                denominator = _distances(coords, points[:, 2], points[:, 3], modes)
+                present = mask[:, points].all(axis=2) & (denominator != 0)
+                values[:, positions] = np.where(present, numerator / denominator, np.nan)
+
+            if "3구간비율" in self._groups:
+                # 분자_점1-분자_점2 (기준=1), 분자_점2-분모_점1, 분모_점1-분모_점2
+                positions, points, modes = self._groups["3구간비율"]
+                seg1 = _distances(coords, points[:, 0], points[:, 1], modes)
+                seg2 = _distances(coords, points[:, 1], points[:, 2], modes)
+                seg3 = _distances(coords, points[:, 2], points[:, 3], modes)
+                present = mask[:, points].all(axis=2) & (seg1 != 0)
+                segments[:, positions, 0] = np.where(present, seg2 / seg1, np.nan)
+                segments[:, positions, 1] = np.where(present, seg3 / seg1, np.nan)
+
+        return values, segments
+
+    def evaluate(self, landmarks):
+        """얼굴 1개에 대해 모든 정의의 측정값 계산
+
+        Args:
+            landmarks: FaceLandmarks 또는 랜드마크 리스트
+
+        Returns:
+            self.definitions 순서의 측정값 리스트 (float, 3구간비율은 "1:x:y" 문자열, 계산 불가는 None)
+        """
+        face = FaceLandmarks.from_landmarks(landmarks, dtype=np.float64)
+        values, segments = self._evaluate_arrays(face.coords[None], face.mask[None])
+
+        results = []
+        for position, definition in enumerate(self.definitions):
+            if definition['measurement_type'] == "3구간비율":
+                ratio_x, ratio_y = segments[0, position]
+                results.append(None if np.isnan(ratio_x) else f"1:{ratio_x:.2f}:{ratio_y:.2f}")
+            else:
+                value = values[0, position]
+                results.append(None if np.isnan(value) else float(value))
+        return results
+
+    def evaluate_batch(self, pool_tensor):
+        """여러 얼굴에 대해 모든 정의의 수치 측정값을 한 번에 계산
+
+        Args:
+            pool_tensor: PoolTensor (faces × 501 × 3)
+
+        Returns:
+            (faces × definitions) float64 행렬 (계산 불가 및 3구간비율은 NaN)
+        """
+        values, _ = self._evaluate_arrays(pool_tensor.coords, pool_tensor.mask)
+        return values
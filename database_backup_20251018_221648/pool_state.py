@@ -0,0 +1,84 @@
+"""
+Pool 데이터 버전 카운터
+- Pool 프로필/태그/랜드마크/비율을 바꾸는 트랜잭션은 bump_pool_version()을 호출
+- 캐시(앱 Pool 스냅샷 등)는 get_pool_version()이 바뀔 때만 다시 읽음
+- 측정 정의(Pool2ndTagDef) / 임계값(PoolTagThreshold) / 태그 관계(PoolTagRelation)도 같은 테이블의
+  별도 행으로 버전 관리 (정의를 INSERT/UPDATE/DELETE하는 트랜잭션은 bump_definitions_version() /
+  bump_thresholds_version() / bump_relations_version() 호출)
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from database.schema_def import PoolState
+
+
+POOL_STATE_ID = 1
+DEFINITIONS_STATE_ID = 2
+THRESHOLDS_STATE_ID = 3
+RELATIONS_STATE_ID = 4
+
+
+def bump_state_version(session, state_id: int):
+    """state_id 행의 버전 1 증가 (커밋은 호출자 트랜잭션과 함께)
+
+    Returns:
+        int: 증가 후 버전
+    """
+    result = session.execute(
+        update(PoolState)
+        .where(PoolState.id == state_id)
+        .values(version=PoolState.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        session.add(PoolState(id=state_id, version=1, updated_at=datetime.utcnow()))
+        session.flush()
+        return 1
+    return get_state_version(session, state_id)
+
+
+def get_state_version(session, state_id: int):
+    """state_id 행의 현재 버전 (한 번도 바뀌지 않았으면 0)"""
+    version = session.query(PoolState.version).filter(PoolState.id == state_id).scalar()
+    return version or 0
+
+
+def bump_pool_version(session):
+    """Pool 버전 1 증가"""
+    return bump_state_version(session, POOL_STATE_ID)
+
+
+def get_pool_version(session):
+    """현재 Pool 버전"""
+    return get_state_version(session, POOL_STATE_ID)
+
+
+def bump_definitions_version(session):
+    """측정 정의(Pool2ndTagDef) 버전 1 증가"""
+    return bump_state_version(session, DEFINITIONS_STATE_ID)
+
+
+def get_definitions_version(session):
+    """현재 측정 정의 버전"""
+    return get_state_version(session, DEFINITIONS_STATE_ID)
+
+
+
+def bump_thresholds_version(session):
+    """임계값(PoolTagThreshold) 버전 1 증가"""
+    return bump_state_version(session, THRESHOLDS_STATE_ID)
+
+
+def get_thresholds_version(session):
+    """현재 임계값 버전"""
+    return get_state_version(session, THRESHOLDS_STATE_ID)
+
+
+def bump_relations_version(session):
+    """태그 관계(PoolTagRelation) 버전 1 증가"""
+    return bump_state_version(session, RELATIONS_STATE_ID)
+
+
+def get_relations_version(session):
+    """현재 태그 관계 버전"""
+    return get_state_version(session, RELATIONS_STATE_ID)
@@ -6,6 +6,50 @@ import math
 import json
 from pathlib import Path
 
+import numpy as np
+
+
+# ratio_type별 문자열 형식: (구분자, 컬럼별 소수 자릿수 (None = 고정값 1), 접미사)
+# eye_width_segments처럼 컬럼 수가 정의마다 다르면 자릿수 하나로 모든 컬럼에 적용
+RATIO_FORMATS = {
+    "pupil_white_ratio": (":", (2, None, 2), ""),
+    "double_eyelid_height": (":", (2, None, 2), ""),
+    "nose_length": (":", (2, None, 2), ""),
+    "canthal_tilt": ("", (2,), "°"),
+    "ratio_axis": ("", (3,), ""),
+    "vertical_gap_normalized": ("", (3,), ""),
+    "ratio": ("", (3,), ""),
+    "eye_width_segments": (":", 2, ""),
+    "nose_width_ratio": (":", (None, 2), ""),
+    "nose_tip_width": (":", (None, 2), ""),
+    "nose_height": (":", (None, 2), ""),
+    "lip_ratio": (":", (None, 2), ""),
+    "lower_face_ratio": (":", (None, 2), ""),
+    "conditional_ratio_axis": (":", (None, 2), ""),
+    "face_length_ratio": (":", (None, 2, 2), ""),
+    "eyebrow_detail": ("|", (3, 3), ""),
+}
+
+
+def format_ratio_values(ratio_type, values):
+    """배치 계산 결과 (F, k) 배열 → calculate_ratio()와 같은 문자열 리스트 (계산 불가 행은 None)
+
+    반올림은 Python round()로 하므로 단일 계산 경로와 문자열이 정확히 같습니다.
+    """
+    separator, decimals, suffix = RATIO_FORMATS[ratio_type]
+    if isinstance(decimals, int):
+        decimals = (decimals,) * values.shape[1]
+
+    valid = ~np.isnan(values).any(axis=1)
+    formatted = []
+    for row, ok in zip(values.tolist(), valid.tolist()):
+        if not ok:
+            formatted.append(None)
+            continue
+        parts = ["1" if digits is None else str(round(value, digits)) for value, digits in zip(row, decimals)]
+        formatted.append(separator.join(parts) + suffix)
+    return formatted
+
 
 class RatioCalculator:
     """랜드마크 기반 얼굴 비율 계산"""
@@ -50,6 +94,22 @@ class RatioCalculator:
         results = []
 
         # 각 부위별로 계산
+        for part, side, definition in self.iter_definitions():
+            # 계산
+            value = self.calculate_ratio(landmark_dict, definition, options)
+
+            if value is not None:
+                results.append({
+                    'part': part,
+                    'ratio_type': definition['type'],
+                    'side': side,
+                    'calculated_value': value
+                })
+
+        return results
+
+    def iter_definitions(self):
+        """정의 순서대로 (part, side, definition) - side는 이름의 (좌)/(우)가 우선"""
         for part, part_definitions in self.definitions.items():
             for name, definition in part_definitions.items():
                 # side 추출
@@ -58,19 +118,7 @@ class RatioCalculator:
                     side = 'left'
                 elif '(우)' in name:
                     side = 'right'
-
-                # 계산
-                value = self.calculate_ratio(landmark_dict, definition, options)
-
-                if value is not None:
-                    results.append({
-                        'part': part,
-                        'ratio_type': definition['type'],
-                        'side': side,
-                        'calculated_value': value
-                    })
-
-        return results
+                yield part, side, definition
 
     def calculate_ratio(self, landmark_dict, definition, options):
         """
@@ -526,3 +574,207 @@ class RatioCalculator:
 
         ratio = round(num_dist / den_dist, 3)
         return str(ratio)
+
+    # ========== 풀 전체 배치 계산 ==========
+
+    def calculate_all_ratios_batch(self, pool_tensor, options=None):
+        """
+        모든 비율을 풀 전체 얼굴에 대해 한 번에 계산
+
+        Args:
+            pool_tensor: PoolTensor (faces × 501 × 3) - 단일 경로와 같은 결과를 원하면 float64 좌표
+            options: dict {hairline_point, double_eyelid} (모든 얼굴에 공통 적용)
+
+        Returns:
+            dict {(part, ratio_type, side): (faces × k) float64 배열}
+            - k는 문자열의 구간 수 ("0.85:1:1.12" → 3, 고정값 1도 포함), 반올림 전 값
+            - 계산 불가 얼굴의 행은 NaN
+            - 같은 키가 여러 정의에서 나오면 (eyebrow_detail) 값이 같으므로 하나만 남음
+        """
+        return {
+            (part, ratio_type, side): values
+            for part, ratio_type, side, values in self.calculate_ratio_arrays(pool_tensor, options)
+        }
+
+    def calculate_ratio_arrays(self, pool_tensor, options=None):
+        """
+        정의 순서대로 [(part, ratio_type, side, (faces × k) 배열), ...]
+
+        calculate_all_ratios()의 결과 순서와 같으며, eyebrow_detail은 left/right 두 항목으로 펼쳐집니다.
+        """
+        if options is None:
+            options = {}
+
+        arrays = []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for part, side, definition in self.iter_definitions():
+                ratio_type = definition['type']
+
+                if ratio_type == "eyebrow_detail":
+                    left = self._batch_single_eyebrow(pool_tensor, definition['left_points'])
+                    right = self._batch_single_eyebrow(pool_tensor, definition['right_points'])
+                    # 좌우가 모두 있을 때만 값이 있음
+                    both = ~(np.isnan(left).any(axis=1) | np.isnan(right).any(axis=1))
+                    arrays.append((part, ratio_type, 'left', np.where(both[:, None], left, np.nan)))
+                    arrays.append((part, ratio_type, 'right', np.where(both[:, None], right, np.nan)))
+                    continue
+
+                kernel = self._BATCH_KERNELS.get(ratio_type)
+                if kernel is None:
+                    continue
+                arrays.append((part, ratio_type, side, kernel(self, pool_tensor, definition, options)))
+
+        return arrays
+
+    @staticmethod
+    def _batch_points(pool_tensor, point_ids):
+        """(F, n) x, y 좌표와 모든 점이 있는 얼굴 마스크"""
+        points = pool_tensor.take(point_ids)
+        return points[..., 0], points[..., 1], pool_tensor.has(point_ids)
+
+    @staticmethod
+    def _batch_columns(valid, *columns):
+        """컬럼들을 (F, k) 배열로 묶고 valid가 아닌 행은 NaN"""
+        values = np.column_stack([np.broadcast_to(np.asarray(c, dtype=np.float64), valid.shape) for c in columns])
+        values[~valid] = np.nan
+        return values
+
+    def _batch_three_segments(self, pool_tensor, definition, axis, second_segment):
+        """3구간 비율 (2번째 구간=1) - pupil_white_ratio, double_eyelid_height, nose_length"""
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        c = x if axis == 'x' else y
+        seg1 = np.abs(c[:, 1] - c[:, 0])
+        seg2 = np.abs(c[:, 2] - c[:, 1])
+        seg3 = np.abs(c[:, second_segment + 1] - c[:, second_segment])
+        return self._batch_columns(present & (seg2 != 0), seg1 / seg2, 1.0, seg3 / seg2)
+
+    def _batch_pupil_white_ratio(self, pool_tensor, definition, options):
+        return self._batch_three_segments(pool_tensor, definition, 'x', 2)
+
+    def _batch_double_eyelid_height(self, pool_tensor, definition, options):
+        return self._batch_three_segments(pool_tensor, definition, 'y', 2)
+
+    def _batch_nose_length(self, pool_tensor, definition, options):
+        return self._batch_three_segments(pool_tensor, definition, 'y', 3)
+
+    def _batch_canthal_tilt(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        dy = y[:, 1] - y[:, 0]
+        dx = x[:, 1] - x[:, 0]
+        valid = present & (dx != 0)
+        # 문자열 반올림 결과가 단일 경로와 같도록 math.atan 사용
+        angle = np.array([
+            math.degrees(math.atan(slope)) if ok else np.nan
+            for slope, ok in zip((dy / dx).tolist(), valid.tolist())
+        ])
+        return self._batch_columns(valid, angle)
+
+    def _batch_ratio_axis(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['numerator'] + definition['denominator'])
+        num_c = y if definition['numeratorAxis'] == 'y' else x
+        den_c = y if definition['denominatorAxis'] == 'y' else x
+        num = np.abs(num_c[:, 1] - num_c[:, 0])
+        den = np.abs(den_c[:, 3] - den_c[:, 2])
+        return self._batch_columns(present & (den != 0), num / den)
+
+    def _batch_vertical_gap_normalized(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        return self._batch_columns(present, np.abs(y[:, 1] - y[:, 0]))
+
+    def _batch_eye_width_segments(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        segments = np.abs(np.diff(x, axis=1))
+        # 단일 경로의 sum()과 같은 순서로 누적
+        total = np.zeros(len(x))
+        for i in range(segments.shape[1]):
+            total = total + segments[:, i]
+        return self._batch_columns(present & (total != 0), *(segments / total[:, None]).T)
+
+    def _batch_two_widths(self, pool_tensor, first, second):
+        """1:x 너비 비율 (첫 번째 x축 너비 기준)"""
+        x, y, present = self._batch_points(pool_tensor, first + second)
+        base = np.abs(x[:, 1] - x[:, 0])
+        other = np.abs(x[:, 3] - x[:, 2])
+        return self._batch_columns(present & (base != 0), 1.0, other / base)
+
+    def _batch_nose_width_ratio(self, pool_tensor, definition, options):
+        return self._batch_two_widths(pool_tensor, definition['midbrow_points'], definition['nose_points'])
+
+    def _batch_nose_tip_width(self, pool_tensor, definition, options):
+        return self._batch_two_widths(pool_tensor, definition['upper_points'], definition['lower_points'])
+
+    def _batch_nose_height(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        mid_y = (y[:, 1] + y[:, 2]) / 2
+        seg1 = np.abs(mid_y - y[:, 0])
+        seg2 = np.abs(y[:, 3] - mid_y)
+        return self._batch_columns(present & (seg1 != 0), 1.0, seg2 / seg1)
+
+    def _batch_lip_ratio(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        avg_y = (y[:, 0] + y[:, 1]) / 2
+        seg1 = np.abs(y[:, 2] - avg_y)
+        seg2 = np.abs(y[:, 4] - y[:, 3])
+        return self._batch_columns(present & (seg1 != 0), 1.0, seg2 / seg1)
+
+    def _batch_lower_face_ratio(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['points'])
+        seg1 = np.abs(y[:, 1] - y[:, 0])
+        seg2 = np.abs(y[:, 3] - y[:, 2])
+        return self._batch_columns(present & (seg1 != 0), 1.0, seg2 / seg1)
+
+    def _batch_single_eyebrow(self, pool_tensor, points_def):
+        x, y, present = self._batch_points(pool_tensor, [points_def['base'], points_def['end'], points_def['peak']])
+        width = np.abs(x[:, 1] - x[:, 0])
+        base_end_y = (y[:, 0] + y[:, 1]) / 2
+        height = np.abs(y[:, 2] - base_end_y)
+        peak_x_pos = np.abs(x[:, 2] - x[:, 0])
+        return self._batch_columns(present & (width != 0), height / width, peak_x_pos / width)
+
+    def _batch_conditional_ratio_axis(self, pool_tensor, definition, options):
+        points_to_use = definition['with_double'] if options.get('double_eyelid', False) else definition['without_double']
+        x, y, present = self._batch_points(pool_tensor, points_to_use['up'] + points_to_use['down'])
+        c = y if definition['axis'] == 'y' else x
+        seg_up = np.abs(c[:, 1] - c[:, 0])
+        seg_down = np.abs(c[:, 3] - c[:, 2])
+        return self._batch_columns(present & (seg_up != 0), 1.0, seg_down / seg_up)
+
+    def _batch_face_length_ratio(self, pool_tensor, definition, options):
+        hairline = options.get('hairline_point')
+        if not hairline:
+            return np.full((len(pool_tensor), 3), np.nan)
+
+        points = definition['points']
+        x, y, present = self._batch_points(pool_tensor, [points['eyebrow_lower'], points['nose_tip'], points['chin']])
+        seg1 = np.abs(y[:, 0] - hairline['y'])
+        seg2 = np.abs(y[:, 1] - y[:, 0])
+        seg3 = np.abs(y[:, 2] - y[:, 1])
+        return self._batch_columns(present & (seg1 != 0), 1.0, seg2 / seg1, seg3 / seg1)
+
+    def _batch_ratio(self, pool_tensor, definition, options):
+        x, y, present = self._batch_points(pool_tensor, definition['numerator'] + definition['denominator'])
+        num_dx = x[:, 0] - x[:, 1]
+        num_dy = y[:, 0] - y[:, 1]
+        den_dx = x[:, 2] - x[:, 3]
+        den_dy = y[:, 2] - y[:, 3]
+        num_dist = np.sqrt(num_dx * num_dx + num_dy * num_dy)
+        den_dist = np.sqrt(den_dx * den_dx + den_dy * den_dy)
+        return self._batch_columns(present & (den_dist != 0), num_dist / den_dist)
+
+    _BATCH_KERNELS = {
+        "pupil_white_ratio": _batch_pupil_white_ratio,
+        "canthal_tilt": _batch_canthal_tilt,
+        "ratio_axis": _batch_ratio_axis,
+        "vertical_gap_normalized": _batch_vertical_gap_normalized,
+        "double_eyelid_height": _batch_double_eyelid_height,
+        "eye_width_segments": _batch_eye_width_segments,
+        "nose_width_ratio": _batch_nose_width_ratio,
+        "nose_length": _batch_nose_length,
+        "nose_tip_width": _batch_nose_tip_width,
+        "nose_height": _batch_nose_height,
+        "lip_ratio": _batch_lip_ratio,
+        "lower_face_ratio": _batch_lower_face_ratio,
+        "conditional_ratio_axis": _batch_conditional_ratio_axis,
+        "face_length_ratio": _batch_face_length_ratio,
+        "ratio": _batch_ratio,
+    }
@@ -1,69 +1,41 @@
 """
 계산된 비율을 DB에 저장하는 유틸리티
 """
-from database.schema_def import PoolBasicRatio, PoolLandmark, PoolProfile
-from database.ratio_calculator import RatioCalculator
+from functools import lru_cache
 
+import numpy as np
+from sqlalchemy import insert, update
 
-def calculate_and_save_ratios(session, profile_id, options=None):
-    """
-    프로필의 모든 비율을 계산하고 PoolBasicRatio에 저장
+from database.schema_def import PoolBasicRatio, PoolBasicRatioComponent, PoolLandmark, PoolProfile
+from database.ratio_calculator import RatioCalculator, format_ratio_values
+from database.pool_state import bump_pool_version
+from database.face_landmarks import PoolTensor
 
-    Args:
-        session: SQLAlchemy session
-        profile_id: 프로필 ID
-        options: dict {hairline_point, double_eyelid, image_width, image_height}
 
-    Returns:
-        int: 저장된 비율 개수
-    """
-    if options is None:
-        options = {}
+# Pool JSON 수집 시 기본 비율 계산 옵션
+DEFAULT_RATIO_OPTIONS = {
+    'hairline_point': None,  # user_clicked 헤어라인은 JSON에 없으면 None
+    'double_eyelid': False,  # 기본값
+    'image_width': 800,
+    'image_height': 600
+}
 
-    # 1. landmarks 가져오기
-    landmarks = session.query(PoolLandmark).filter_by(profile_id=profile_id).all()
-
-    if not landmarks:
-        print(f"No landmarks found for profile_id={profile_id}")
-        return 0
-
-    # landmarks를 딕셔너리 리스트로 변환
-    landmarks_list = [
-        {
-            'mp_idx': lm.mp_idx,
-            'x': float(lm.x),
-            'y': float(lm.y),
-            'z': float(lm.z) if lm.z else 0.0
-        }
-        for lm in landmarks
-    ]
 
-    # 2. 비율 계산
-    calculator = RatioCalculator()
-    ratio_results = calculator.calculate_all_ratios(landmarks_list, options)
+def build_ratio_rows(ratio_results):
+    """
+    calculate_all_ratios 결과를 PoolBasicRatio 행(= ratios_json 항목)으로 변환
 
-    # 3. 기존 비율 데이터 삭제 (재계산 시)
-    session.query(PoolBasicRatio).filter_by(profile_id=profile_id).delete()
+    eyebrow_detail처럼 좌우 값을 dict로 반환하는 경우 side별 행으로 펼침
 
-    # 4. 새로운 비율 데이터 저장 + JSONB 병행 저장
-    saved_count = 0
-    ratios_json = []
+    Returns:
+        list of dict: [{part, ratio_type, side, calculated_value}, ...]
+    """
+    rows = []
     for result in ratio_results:
-        # eyebrow_detail처럼 좌우 값을 별도로 반환하는 경우 처리
         if isinstance(result['calculated_value'], dict):
             # {'left': value, 'right': value} 형태
             for side, value in result['calculated_value'].items():
-                ratio_record = PoolBasicRatio(
-                    profile_id=profile_id,
-                    part=result['part'],
-                    ratio_type=result['ratio_type'],
-                    side=side,
-                    calculated_value=value
-                )
-                session.add(ratio_record)
-                saved_count += 1
-
-                ratios_json.append({
+                rows.append({
                     'part': result['part'],
                     'ratio_type': result['ratio_type'],
                     'side': side,
@@ -71,32 +43,296 @@ def calculate_and_save_ratios(session, profile_id, options=None):
                 })
         else:
             # 일반적인 경우
-            ratio_record = PoolBasicRatio(
-                profile_id=profile_id,
-                part=result['part'],
-                ratio_type=result['ratio_type'],
-                side=result['side'],
-                calculated_value=result['calculated_value']
-            )
-            session.add(ratio_record)
-            saved_count += 1
-
-            ratios_json.append({
+            rows.append({
                 'part': result['part'],
                 'ratio_type': result['ratio_type'],
                 'side': result['side'],
                 'calculated_value': result['calculated_value']
             })
+    return rows
 
-    session.commit()
 
-    # PoolProfile.ratios_json에 병행 저장
-    profile = session.query(PoolProfile).filter_by(id=profile_id).first()
+def parse_ratio_components(calculated_value):
+    """
+    비율 문자열 → 성분별 실수 리스트
+
+    예: "1:0.85:1.12" → [1.0, 0.85, 1.12], "5.2°" → [5.2], "0.123|0.456" → [0.123, 0.456]
+
+    Returns:
+        list of float (숫자가 아닌 성분이 있으면 빈 리스트)
+    """
+    if not calculated_value:
+        return []
+
+    text = str(calculated_value).replace('°', '').replace('|', ':')
+    try:
+        return [float(part) for part in text.split(':')]
+    except ValueError:
+        return []
+
+
+def build_ratio_component_rows(profile_id, ratio_rows):
+    """
+    PoolBasicRatio 행 → PoolBasicRatioComponent 행 (component는 1부터)
+
+    Returns:
+        list of dict: [{profile_id, part, ratio_type, side, component, value}, ...]
+    """
+    return [
+        {
+            'profile_id': profile_id,
+            'part': row['part'],
+            'ratio_type': row['ratio_type'],
+            'side': row['side'],
+            'component': component,
+            'value': value
+        }
+        for row in ratio_rows
+        for component, value in enumerate(parse_ratio_components(row['calculated_value']), start=1)
+    ]
+
+
+def delete_ratio_rows(session, profile_ids):
+    """프로필들의 PoolBasicRatio와 숫자 성분 행 삭제 (재계산 전)"""
+    for model in (PoolBasicRatio, PoolBasicRatioComponent):
+        session.query(model).filter(model.profile_id.in_(profile_ids)).delete(synchronize_session=False)
+
+
+def insert_ratio_rows(session, ratio_rows):
+    """profile_id가 채워진 PoolBasicRatio 행과 그 숫자 성분 행을 일괄 저장"""
+    if not ratio_rows:
+        return
+    session.execute(insert(PoolBasicRatio), ratio_rows)
+
+    component_rows = [
+        component_row
+        for row in ratio_rows
+        for component_row in build_ratio_component_rows(row['profile_id'], [row])
+    ]
+    if component_rows:
+        session.execute(insert(PoolBasicRatioComponent), component_rows)
+
+
+@lru_cache(maxsize=1)
+def get_ratio_calculator():
+    """프로세스 공유 RatioCalculator (ratio_definitions.json을 한 번만 읽음)"""
+    return RatioCalculator()
+
+
+def calculate_ratio_rows(landmark_points, options=None):
+    """
+    메모리의 landmarks로 모든 비율을 계산해 PoolBasicRatio 행으로 반환
+
+    Args:
+        landmark_points: [{mp_idx, x, y[, z]}, ...] (DB에 저장된 소수점 3자리 좌표)
+        options: dict {hairline_point, double_eyelid, image_width, image_height}
+
+    Returns:
+        list of dict: [{part, ratio_type, side, calculated_value}, ...]
+    """
+    landmarks_list = [
+        {
+            'mp_idx': lm['mp_idx'],
+            'x': float(lm['x']),
+            'y': float(lm['y']),
+            'z': float(lm['z']) if lm.get('z') else 0.0
+        }
+        for lm in landmark_points
+    ]
+    return build_ratio_rows(get_ratio_calculator().calculate_all_ratios(landmarks_list, options or {}))
+
+
+def save_ratios_from_landmarks(session, profile_id, landmark_points, options=None):
+    """
+    메모리의 landmarks로 비율을 계산해 PoolBasicRatio와 ratios_json에 저장 (커밋하지 않음)
+
+    save_landmarks_to_table()이 반환한 landmarks를 그대로 받아 Landmark 테이블 재조회 없이 계산하고,
+    비율 행은 한 번의 multi-row INSERT로 저장합니다.
+
+    Args:
+        session: SQLAlchemy session
+        profile_id: 프로필 ID
+        landmark_points: [{mp_idx, x, y[, z]}, ...]
+        options: dict {hairline_point, double_eyelid, image_width, image_height}
+
+    Returns:
+        int: 저장된 비율 개수
+    """
+    if not landmark_points:
+        print(f"No landmarks found for profile_id={profile_id}")
+        return 0
+
+    ratios_json = calculate_ratio_rows(landmark_points, options)
+
+    # 기존 비율 데이터 삭제 (재계산 시) 후 숫자 성분과 함께 일괄 저장
+    delete_ratio_rows(session, [profile_id])
+    insert_ratio_rows(session, [dict(row, profile_id=profile_id) for row in ratios_json])
+
+    # PoolProfile.ratios_json에 병행 저장 (같은 세션의 프로필은 identity map에서 조회)
+    profile = session.get(PoolProfile, profile_id)
     if profile is not None:
         profile.ratios_json = ratios_json
-        session.commit()
 
-    print(f"Saved {saved_count} ratio records for profile_id={profile_id}")
+    print(f"Saved {len(ratios_json)} ratio records for profile_id={profile_id}")
+    return len(ratios_json)
+
+
+def calculate_ratio_rows_batch(pool_tensor, options=None):
+    """
+    풀 전체 얼굴의 PoolBasicRatio 행을 한 번에 계산
+
+    Args:
+        pool_tensor: PoolTensor (float64 좌표)
+        options: dict {hairline_point, double_eyelid} (모든 얼굴에 공통)
+
+    Returns:
+        얼굴별 [{part, ratio_type, side, calculated_value}, ...] 리스트 (calculate_ratio_rows와 같은 순서/문자열)
+    """
+    rows = [[] for _ in range(len(pool_tensor))]
+    for part, ratio_type, side, values in get_ratio_calculator().calculate_ratio_arrays(pool_tensor, options):
+        for face_rows, value in zip(rows, format_ratio_values(ratio_type, values)):
+            if value is not None:
+                face_rows.append({
+                    'part': part,
+                    'ratio_type': ratio_type,
+                    'side': side,
+                    'calculated_value': value
+                })
+    return rows
+
+
+def recalculate_all_ratios(session, options=None, batch_size=5000):
+    """
+    비율 정의 변경 후 풀 전체 PoolBasicRatio / ratios_json 재계산 (재수집 없이 landmarks_json 사용)
+
+    Args:
+        session: SQLAlchemy session (커밋은 호출자가 담당)
+        options: dict {hairline_point, double_eyelid} - None이면 DEFAULT_RATIO_OPTIONS
+        batch_size: 한 번에 계산할 프로필 수
+
+    Returns:
+        int: 저장된 비율 개수
+    """
+    if options is None:
+        options = dict(DEFAULT_RATIO_OPTIONS)
+
+    profile_ids = [profile_id for (profile_id,) in session.query(PoolProfile.id).order_by(PoolProfile.id)]
+    saved_count = 0
+
+    for start in range(0, len(profile_ids), batch_size):
+        batch_ids = profile_ids[start:start + batch_size]
+        # landmarks가 없는 프로필은 기존 비율 유지 (단일 경로와 동일)
+        profiles = [
+            (profile_id, landmarks_json)
+            for profile_id, landmarks_json in session.query(PoolProfile.id, PoolProfile.landmarks_json).filter(
+                PoolProfile.id.in_(batch_ids)
+            )
+            if landmarks_json
+        ]
+        if not profiles:
+            continue
+
+        pool_tensor = PoolTensor.from_faces(
+            [landmarks_json for _, landmarks_json in profiles],
+            ids=[profile_id for profile_id, _ in profiles],
+            dtype=np.float64
+        )
+        rows_per_face = calculate_ratio_rows_batch(pool_tensor, options)
+
+        delete_ratio_rows(session, pool_tensor.ids)
+
+        ratio_rows = [
+            dict(row, profile_id=profile_id)
+            for profile_id, rows in zip(pool_tensor.ids, rows_per_face)
+            for row in rows
+        ]
+        insert_ratio_rows(session, ratio_rows)
+
+        session.execute(update(PoolProfile), [
+            {'id': profile_id, 'ratios_json': rows}
+            for profile_id, rows in zip(pool_tensor.ids, rows_per_face)
+        ])
+
+        saved_count += len(ratio_rows)
+        print(f"Recalculated ratios for {start + len(batch_ids)}/{len(profile_ids)} profiles")
+
+    if profile_ids:
+        bump_pool_version(session)
+
+    return saved_count
+
+
+def backfill_ratio_components(session, batch_size=5000):
+    """
+    기존 PoolBasicRatio 문자열로 PoolBasicRatioComponent 재생성 (비율 재계산 없이)
+
+    숫자 성분 테이블이 생기기 전에 저장된 Pool을 범위 필터에 쓰려면 한 번 실행합니다.
+
+    Args:
+        session: SQLAlchemy session (커밋은 호출자가 담당)
+        batch_size: 한 번에 처리할 프로필 수
+
+    Returns:
+        int: 저장된 성분 개수
+    """
+    profile_ids = [
+        profile_id for (profile_id,) in
+        session.query(PoolBasicRatio.profile_id).distinct().order_by(PoolBasicRatio.profile_id)
+    ]
+    saved_count = 0
+
+    for start in range(0, len(profile_ids), batch_size):
+        batch_ids = profile_ids[start:start + batch_size]
+        ratio_rows = session.query(
+            PoolBasicRatio.profile_id, PoolBasicRatio.part, PoolBasicRatio.ratio_type,
+            PoolBasicRatio.side, PoolBasicRatio.calculated_value
+        ).filter(PoolBasicRatio.profile_id.in_(batch_ids)).order_by(PoolBasicRatio.id).all()
+
+        session.query(PoolBasicRatioComponent).filter(
+            PoolBasicRatioComponent.profile_id.in_(batch_ids)
+        ).delete(synchronize_session=False)
+
+        component_rows = [
+            component_row
+            for row in ratio_rows
+            for component_row in build_ratio_component_rows(row.profile_id, [row._asdict()])
+        ]
+        if component_rows:
+            session.execute(insert(PoolBasicRatioComponent), component_rows)
+        saved_count += len(component_rows)
+
+    return saved_count
+
+
+def calculate_and_save_ratios(session, profile_id, options=None):
+    """
+    프로필의 모든 비율을 계산하고 PoolBasicRatio에 저장
+
+    landmarks가 이미 메모리에 있으면 save_ratios_from_landmarks()를 사용하세요.
+
+    Args:
+        session: SQLAlchemy session
+        profile_id: 프로필 ID
+        options: dict {hairline_point, double_eyelid, image_width, image_height}
+
+    Returns:
+        int: 저장된 비율 개수
+    """
+    # landmarks 가져오기
+    landmarks = session.query(PoolLandmark).filter_by(profile_id=profile_id).all()
+
+    landmark_points = [
+        {
+            'mp_idx': lm.mp_idx,
+            'x': float(lm.x),
+            'y': float(lm.y),
+            'z': float(lm.z) if lm.z else 0.0
+        }
+        for lm in landmarks
+    ]
+
+    saved_count = save_ratios_from_landmarks(session, profile_id, landmark_points, options)
+    session.commit()
     return saved_count
 
 
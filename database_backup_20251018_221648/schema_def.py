@@ -1,7 +1,7 @@
 """
 데이터베이스 모델 정의
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Numeric, UniqueConstraint, Index
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, Text, ForeignKey, JSON, Numeric, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -29,6 +29,7 @@ class PoolProfile(Base):
     tags = relationship("PoolTag", back_populates="profile", cascade="all, delete-orphan")
     landmarks_points = relationship("PoolLandmark", back_populates="profile", cascade="all, delete-orphan")
     basic_ratio = relationship("PoolBasicRatio", back_populates="profile", cascade="all, delete-orphan")
+    ratio_components = relationship("PoolBasicRatioComponent", back_populates="profile", cascade="all, delete-orphan")
     measurement_values = relationship("Pool2ndTagValue", back_populates="profile", cascade="all, delete-orphan")
 
     def to_dict(self):
@@ -86,6 +87,43 @@ class PoolBasicRatio(Base):
         }
 
 
+class PoolBasicRatioComponent(Base):
+    """풀 기본 비율의 숫자 성분 테이블 (SQL 범위 필터용)
+
+    calculated_value 문자열을 저장 시점에 성분별 실수로 분해합니다.
+    예: "1:0.85:1.12" → component 1, 2, 3 = 1.0, 0.85, 1.12 / "5.2°" → component 1 = 5.2
+    """
+    __tablename__ = 'pool_basic_ratio_component'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_id = Column(Integer, ForeignKey('pool_profiles.id'), nullable=False)
+    part = Column(String(50), nullable=False)
+    ratio_type = Column(String(50), nullable=False)
+    side = Column(String(10), nullable=False, default="center")
+    component = Column(Integer, nullable=False)  # 1부터 시작 (RatioParser의 ratio_1, ratio_2 ...와 같은 번호)
+    value = Column(Float, nullable=False)
+
+    # 관계
+    profile = relationship("PoolProfile", back_populates="ratio_components")
+
+    # 인덱스: (part, ratio_type, side, component)로 찾은 뒤 value 범위 스캔
+    __table_args__ = (
+        Index('idx_ratio_component_range', 'part', 'ratio_type', 'side', 'component', 'value'),
+        Index('idx_ratio_component_profile', 'profile_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'profile_id': self.profile_id,
+            'part': self.part,
+            'ratio_type': self.ratio_type,
+            'side': self.side,
+            'component': self.component,
+            'value': self.value
+        }
+
+
 class PoolTag(Base):
     """풀 태그 테이블"""
     __tablename__ = 'pool_tags'
@@ -227,6 +265,51 @@ class Pool2ndTagValue(Base):
         }
 
 
+
+class PoolSourceFile(Base):
+    """풀 원본 JSON 파일 매니페스트 - 폴더 동기화 시 변경 감지용"""
+    __tablename__ = 'pool_source_files'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_name = Column(String(500), nullable=False, unique=True)  # people_json 폴더 내 파일명
+    profile_name = Column(String(255), nullable=False)  # 파일이 만든 PoolProfile.name
+    mtime_ns = Column(BigInteger, nullable=False)  # 마지막 동기화 시점의 수정 시각 (ns)
+    size = Column(BigInteger, nullable=False)  # 마지막 동기화 시점의 파일 크기
+    content_hash = Column(String(64), nullable=False)  # 파일 내용 sha256
+    synced_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'file_name': self.file_name,
+            'profile_name': self.profile_name,
+            'mtime_ns': self.mtime_ns,
+            'size': self.size,
+            'content_hash': self.content_hash,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None
+        }
+
+
+class PoolState(Base):
+    """풀 데이터 버전 - 동기화/수집으로 Pool이 바뀔 때마다 version 증가
+
+    앱의 Pool 스냅샷 캐시는 이 값이 바뀔 때만 DB를 다시 읽습니다.
+    id 1: Pool 데이터, 2: 측정 정의, 3: 임계값, 4: 태그 관계 (pool_state.py 참고)
+    """
+    __tablename__ = 'pool_state'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
 # ==================== User Domain Models ====================
 
 class UserProfile(Base):
@@ -248,6 +331,7 @@ class UserProfile(Base):
     tags = relationship("UserTag", back_populates="user", cascade="all, delete-orphan")
     landmarks_points = relationship("UserLandmark", back_populates="user", cascade="all, delete-orphan")
     measurement_values = relationship("User2ndTagValue", back_populates="user", cascade="all, delete-orphan")
+    tag_percentiles = relationship("UserTagPercentile", back_populates="user", cascade="all, delete-orphan")
 
     def to_dict(self, include_password=False):
         """딕셔너리로 변환"""
@@ -353,6 +437,46 @@ class User2ndTagValue(Base):
         }
 
 
+class UserTagPercentile(Base):
+    """유저 2차 태그 percentile 테이블 - 분석 시 계산한 Pool 대비 percentile 보관
+
+    임계값만 바꾼 분석은 Pool 측정값을 다시 읽지 않고 이 벡터를 필터링합니다.
+    pool_digest가 현재 Pool 분포의 digest와 다르면 해당 태그만 다시 계산합니다.
+    """
+    __tablename__ = 'user_tag_percentile'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('user_profiles.user_id'), nullable=False)
+    value_id = Column(Integer, nullable=False)  # 계산에 사용한 User2ndTagValue.id
+    tag_name = Column(String(100), nullable=False)
+    side = Column(String(10), default="center", nullable=False)
+    측정값 = Column(Float, nullable=True)  # User 측정값 (계산 불가시 NULL)
+    percentile = Column(Float, nullable=True)  # 0.0 ~ 1.0 (측정값이나 Pool 데이터가 없으면 NULL)
+    pool_digest = Column(String(32), nullable=True)  # 계산 당시 (tag_name, side) Pool 분포 digest
+    computed_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    # 관계
+    user = relationship("UserProfile", back_populates="tag_percentiles")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'tag_name', 'side', name='uq_user_tag_percentile'),
+        Index('idx_user_percentile_tag', 'tag_name', 'side'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'value_id': self.value_id,
+            'tag_name': self.tag_name,
+            'side': self.side,
+            '측정값': self.측정값,
+            'percentile': self.percentile,
+            'pool_digest': self.pool_digest,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+
 # ==================== Pool Tag Relation ====================
 
 class PoolTagRelation(Base):
@@ -11,6 +11,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connect_db import db_manager
 from database.schema_def import Base, Pool2ndTagDef, PoolTagThreshold, PoolTagRelation
+from database.threshold_registry import threshold_registry
+from database.data_handler import crud_service
+from database.pool_state import bump_definitions_version, bump_thresholds_version, bump_relations_version
 import json
 
 class SchemaManager:
@@ -119,7 +122,9 @@ class SchemaManager:
                     )
                     session.add(new_def)
 
+                bump_definitions_version(session)
                 session.commit()
+                crud_service.invalidate_measurement_plan()
 
                 final_count = session.query(Pool2ndTagDef).count()
                 print(f"✅ {final_count}개 측정 정의 로드 완료")
@@ -165,7 +170,9 @@ class SchemaManager:
                     )
                     session.add(new_threshold)
 
+                bump_thresholds_version(session)
                 session.commit()
+                threshold_registry.invalidate()
 
                 final_count = session.query(PoolTagThreshold).count()
                 print(f"✅ {final_count}개 임계값 정의 로드 완료")
@@ -210,6 +217,7 @@ class SchemaManager:
                     )
                     session.add(new_relation)
 
+                bump_relations_version(session)
                 session.commit()
 
                 final_count = session.query(PoolTagRelation).count()
@@ -0,0 +1,133 @@
+"""
+2차 태그 임계값(PoolTagThreshold) 구간 테이블 캐시
+"""
+import bisect
+import threading
+
+import numpy as np
+from sqlalchemy import func
+
+from database.pool_state import get_thresholds_version
+from database.schema_def import PoolTagThreshold
+
+
+class _IntervalTable:
+    """태그 1개의 임계값 구간 테이블
+
+    모든 min/max 경계를 정렬해 구간을 나누고, 구간마다 분류 결과를 미리 계산합니다.
+    구간 안에서는 어떤 임계값의 [min, max) 포함 여부도 바뀌지 않으므로,
+    기존처럼 임계값을 순서대로 확인해 처음 맞는 것을 고르는 결과와 같습니다.
+    """
+
+    __slots__ = ('bounds', 'labels', 'nan_label')
+
+    def __init__(self, thresholds):
+        """
+        Args:
+            thresholds: [(value_name, min_threshold, max_threshold), ...] (우선순위 순서)
+        """
+        bounds = sorted({edge for _, low, high in thresholds for edge in (low, high) if edge is not None})
+
+        def first_match(value):
+            for value_name, low, high in thresholds:
+                if (low is None or value >= low) and (high is None or value < high):
+                    return value_name
+            return None
+
+        # 구간 i = [bounds[i-1], bounds[i]) (첫 구간은 -inf부터)
+        self.bounds = bounds
+        self.labels = [first_match(float('-inf'))] + [first_match(edge) for edge in bounds]
+        # NaN은 min/max가 모두 없는 임계값에만 해당
+        self.nan_label = first_match(float('nan'))
+
+    def classify(self, value):
+        if value != value:
+            return self.nan_label
+        return self.labels[bisect.bisect_right(self.bounds, value)]
+
+    def classify_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        labels = np.array(self.labels, dtype=object)[np.searchsorted(self.bounds, values, side='right')]
+        labels[np.isnan(values)] = self.nan_label
+        return labels
+
+
+class ThresholdRegistry:
+    """tag_name → 임계값 구간 테이블 (프로세스 전역)
+
+    상태 = (임계값 개수, 최대 id, 임계값 버전) - 행 추가/삭제는 개수/id로,
+    기존 행 UPDATE는 bump_thresholds_version()으로 올린 버전으로 감지합니다.
+    상태 확인은 세션마다 한 번만 합니다 (세션 안에서 값마다 쿼리하지 않도록).
+    같은 프로세스에서 임계값을 바꿨다면 invalidate()로 바로 무효화할 수 있습니다.
+    """
+
+    _SESSION_CHECKED = 'threshold_registry_checked'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None  # (상태, {tag_name: _IntervalTable})
+
+    @staticmethod
+    def _current_fingerprint(session):
+        count, max_id = session.query(
+            func.count(PoolTagThreshold.id), func.max(PoolTagThreshold.id)
+        ).one()
+        return count, max_id, get_thresholds_version(session)
+
+    def refresh(self, session, force: bool = False):
+        """임계값이 바뀌었을 때만 구간 테이블 재구축
+
+        Returns:
+            {tag_name: _IntervalTable}
+        """
+        fingerprint = self._current_fingerprint(session)
+        state = self._state
+        if not force and state is not None and state[0] == fingerprint:
+            return state[1]
+
+        with self._lock:
+            # 다른 스레드가 먼저 재구축했으면 생략
+            state = self._state
+            if not force and state is not None and state[0] == fingerprint:
+                return state[1]
+
+            grouped = {}
+            for threshold in session.query(PoolTagThreshold).order_by(PoolTagThreshold.id).all():
+                grouped.setdefault(threshold.tag_name, []).append(
+                    (threshold.value_name, threshold.min_threshold, threshold.max_threshold)
+                )
+            tables = {tag_name: _IntervalTable(rows) for tag_name, rows in grouped.items()}
+            self._state = (fingerprint, tables)
+            return tables
+
+    def _ensure_loaded(self, session):
+        state = self._state
+        if state is not None and session.info.get(self._SESSION_CHECKED) is state:
+            return state[1]
+
+        tables = self.refresh(session)
+        session.info[self._SESSION_CHECKED] = self._state
+        return tables
+
+    def invalidate(self):
+        """임계값 변경 후 캐시 무효화"""
+        with self._lock:
+            self._state = None
+
+    def classify(self, session, tag_name: str, value: float):
+        """값 1개를 임계값에 따라 분류 (해당 구간이 없으면 None)"""
+        table = self._ensure_loaded(session).get(tag_name)
+        if table is None:
+            return None
+        return table.classify(value)
+
+    def classify_many(self, session, tag_name: str, values):
+        """값 배열을 한 번에 분류 - object 배열 (해당 구간이 없으면 None)"""
+        table = self._ensure_loaded(session).get(tag_name)
+        if table is None:
+            return np.full(len(values), None, dtype=object)
+        return table.classify_many(values)
+
+
+# 전역 임계값 레지스트리 인스턴스
+threshold_registry = ThresholdRegistry()
@@ -11,9 +11,11 @@ project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
 from face_db_core import SchemaManager, DatabaseManager
+from utils.pool_store import attach_pool_store
+from utils.relation_index import get_tag_relation_index
 
-# Initialize db_manager
-db_manager = DatabaseManager()
+# Initialize db_manager (파일 감시 동기화 후 mmap Pool 저장소도 갱신)
+db_manager = attach_pool_store(DatabaseManager())
 
 def main():
     """메인 함수"""
@@ -26,6 +28,9 @@ def main():
     if not schema_manager.reset_database_dev():
         print("❌ 데이터베이스 설정 실패. 종료합니다.")
         return
+    # 태그 관계를 다시 적재했으므로 이 프로세스의 역색인도 무효화
+    # (다른 프로세스는 태그 관계 버전이 바뀐 것을 보고 다음 조회 때 재구축)
+    get_tag_relation_index().invalidate()
 
     print("\n" + "=" * 60)
 
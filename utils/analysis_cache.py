@@ -0,0 +1,108 @@
+"""
+User 분석 결과 캐시
+- key: (user_id, 임계값, User 측정값 상태, Pool percentile 인덱스 버전, relation 인덱스 버전)
+- 셋 중 하나라도 바뀌면 key가 달라지므로 별도 무효화 없이 새로 계산
+- LRU: 최대 개수를 넘으면 가장 오래 조회되지 않은 결과부터 삭제
+- ETag: key의 해시 (같은 key면 같은 결과이므로 If-None-Match 비교에 사용)
+
+캐시된 결과 dict는 요청 간에 공유되므로 읽기 전용으로 사용해야 합니다.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def analysis_etag(key: Hashable) -> str:
+    """캐시 key → HTTP ETag (큰따옴표 포함)"""
+    return '"' + hashlib.blake2b(repr(key).encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag를 포함하는지 (*, 쉼표 목록, 약한 ETag W/ 허용)"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or any(
+        (value[2:] if value.startswith('W/') else value) == etag for value in candidates
+    )
+
+
+class AnalysisResultCache:
+    """분석 결과 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries: 최대 보관 개수 (None이면 API_ANALYSIS_CACHE_SIZE, 기본 1024)
+        """
+        if max_entries is None:
+            max_entries = int(os.getenv("API_ANALYSIS_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self.max_entries = max(max_entries, 0)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: Dict):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Dict]) -> Dict:
+        """캐시에 있으면 반환, 없으면 compute() 결과를 저장 후 반환
+
+        같은 key를 동시에 계산할 수 있지만 결과가 같으므로 나중 결과로 덮어씀
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def invalidate(self):
+        """모든 결과 삭제"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"AnalysisResultCache({len(self)}/{self.max_entries} entries)"
+
+
+# 프로세스 전역 캐시 (모든 요청이 공유)
+_analysis_result_cache = AnalysisResultCache()
+
+
+def get_analysis_cache() -> AnalysisResultCache:
+    """프로세스 전역 User 분석 결과 캐시"""
+    return _analysis_result_cache
@@ -6,13 +6,26 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import json
-from .landmark_calculator import calculate_length, calculate_curvature
+from .landmark_calculator import compute_curvature, compute_length
+from .face_landmarks import PoolTensor
+from .tag_index import TagIndex
+
+
+def _row_tag_lists(landmarks_data):
+    """행별 태그 리스트 (태그가 없거나 리스트가 아니면 빈 리스트)"""
+    if 'tags' not in landmarks_data.columns:
+        return [[] for _ in range(len(landmarks_data))]
+    return [tags if isinstance(tags, list) else [] for tags in landmarks_data['tags']]
 
 
 def execute_length_based_analysis(landmarks_data, l1_p1, l1_p2, l1_calc, l2_p1, l2_p2, l2_calc, purpose,
-                                   normalize_ratio=False, swap_axes=False, enable_tag_highlight=False, selected_tags=None, point_group=None):
-    """길이 기반 분석 실행"""
+                                   normalize_ratio=False, swap_axes=False, enable_tag_highlight=False, selected_tags=None, point_group=None,
+                                   pool=None, tag_index=None):
+    """길이 기반 분석 실행
+
+    pool: 미리 만들어 둔 PoolTensor (없으면 landmarks_data로 생성)
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
     if selected_tags is None:
         selected_tags = []
     st.write("### 🔄 분석 실행 중...")
@@ -24,102 +37,71 @@ def execute_length_based_analysis(landmarks_data, l1_p1, l1_p2, l1_calc, l2_p1,
     tags_list = []
     colors = []
 
-    # 태그별 컬러 매핑 생성
-    if enable_tag_highlight:
-        all_tags = set()
-        for _, row in landmarks_data.iterrows():
-            if 'tags' in row and row['tags']:
-                tags = row['tags'] if isinstance(row['tags'], list) else []
-                all_tags.update(tags)
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
 
-        # 태그별 고유 색상 생성
+    # 행별 색상: 선택된 태그 중 첫 번째로 가진 태그의 색상 (없으면 회색)
+    row_colors = np.full(len(landmarks_data), '#808080', dtype=object)
+    if enable_tag_highlight:
+        # 태그별 고유 색상 생성 (역색인의 태그 목록은 정렬되어 있음)
         color_palette = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel + px.colors.qualitative.Set1
-        tag_color_map = {tag: color_palette[i % len(color_palette)] for i, tag in enumerate(sorted(all_tags))}
+        tag_color_map = {tag: color_palette[i % len(color_palette)] for i, tag in enumerate(tag_index.tags)}
         tag_color_map['기타'] = '#808080'  # 회색
 
-    for _, row in landmarks_data.iterrows():
-        try:
-            # 랜드마크 데이터 파싱
-            if isinstance(row['landmarks'], str):
-                landmarks = json.loads(row['landmarks'])
-            else:
-                landmarks = row['landmarks']
-
-            if purpose == "🌊 곡률 분석":
-                # 곡률 분석: 점 그룹의 곡률 계산
-                curvatures = calculate_curvature(landmarks, point_group)
-                if curvatures is not None:
-                    # 곡률 분석에서는 각 점별로 곡률 데이터를 저장
-                    for i, curvature in enumerate(curvatures):
-                        length1_values.append(i)  # X축: 점 인덱스 (0, 1, 2, ...)
-                        length2_values.append(round(curvature, 4))  # Y축: 곡률값
-                        names.append(f"{row['name']}_점{i}")
-                        # 태그 정보 수집
-                        row_tags = []
-                        if 'tags' in row and row['tags']:
-                            row_tags = row['tags'] if isinstance(row['tags'], list) else []
-                        tags_list.append(', '.join(row_tags) if row_tags else '태그없음')
-
-                        # 색상 결정
-                        if enable_tag_highlight and selected_tags:
-                            matching_tags = [tag for tag in selected_tags if tag in row_tags]
-                            if matching_tags:
-                                color = tag_color_map.get(matching_tags[0], '#FF0000')
-                            else:
-                                color = '#808080'  # 회색으로 dimmed
-                        else:
-                            color = '#808080'  # 기본 회색
-                        colors.append(color)
-            else:
-                # 기존 길이/비율 계산
-                length1 = calculate_length(landmarks, l1_p1, l1_p2, l1_calc)
-                length2 = calculate_length(landmarks, l2_p1, l2_p2, l2_calc)
-
-                if length1 is not None and (length2 is not None or purpose == "📏 거리 측정"):
-                    final_length1 = length1
-                    final_length2 = length2 if length2 is not None else 0
-
-                    # 정규화 적용 (비율 계산이고 normalize_ratio가 True일 때)
-                    if purpose == "⚖️ 비율 계산" and normalize_ratio and final_length1 != 0:
-                        # X축(길이1)을 1로 고정하고 Y축(길이2)을 비례적으로 스케일링
-                        scale_factor = final_length1
-                        final_length1 = 1.0
-                        final_length2 = final_length2 / scale_factor if scale_factor != 0 else 0
-
-                    # 소수점 둘째자리까지 반올림
-                    final_length1 = round(final_length1, 2)
-                    final_length2 = round(final_length2, 2)
-
-                    # 태그 정보 수집
-                    row_tags = []
-                    if 'tags' in row and row['tags']:
-                        row_tags = row['tags'] if isinstance(row['tags'], list) else []
-
-                    # 색상 결정
-                    if enable_tag_highlight and selected_tags:
-                        # 특정 태그들이 선택된 경우에만 색상 적용
-                        matching_tags = [tag for tag in selected_tags if tag in row_tags]
-                        if matching_tags:
-                            # 선택된 태그 중 첫 번째 매칭되는 태그의 색상 사용
-                            color = tag_color_map.get(matching_tags[0], '#FF0000')
-                            opacity = 1.0
-                        else:
-                            color = '#808080'  # 회색으로 dimmed
-                            opacity = 0.6
-                    else:
-                        # 기본 회색 (태그 하이라이트 비활성화 또는 태그 미선택 시)
-                        color = '#808080'  # 회색
-                        opacity = 1.0
-
-                    length1_values.append(final_length1)
-                    length2_values.append(final_length2)
-                    names.append(row['name'])
-                    tags_list.append(', '.join(row_tags) if row_tags else '태그없음')
-                    colors.append(color)
-
-        except Exception as e:
-            st.error(f"데이터 처리 오류 ({row['name']}): {e}")
-            continue
+        if selected_tags:
+            first_tag = tag_index.first_match(selected_tags)
+            matched = first_tag >= 0
+            row_colors[matched] = [tag_color_map.get(selected_tags[i], '#FF0000') for i in first_tag[matched]]
+
+    if pool is None:
+        pool = PoolTensor.from_dataframe(landmarks_data)
+    all_row_tags = _row_tag_lists(landmarks_data)
+    all_names = landmarks_data['name'].to_numpy()
+
+    if purpose == "🌊 곡률 분석":
+        # 곡률 분석: 전체 얼굴의 점 그룹 곡률을 (얼굴 × 점) 행렬로 한 번에 계산
+        curvature_matrix = compute_curvature(pool, point_group)
+        valid = ~np.isnan(curvature_matrix).any(axis=1)
+
+        # 곡률 분석에서는 각 점별로 곡률 데이터를 저장
+        for row_idx in np.flatnonzero(valid):
+            row_tags = all_row_tags[row_idx]
+            tags_str = ', '.join(row_tags) if row_tags else '태그없음'
+            color = row_colors[row_idx]
+            for i, curvature in enumerate(np.round(curvature_matrix[row_idx], 4).tolist()):
+                length1_values.append(i)  # X축: 점 인덱스 (0, 1, 2, ...)
+                length2_values.append(curvature)  # Y축: 곡률값
+                names.append(f"{all_names[row_idx]}_점{i}")
+                tags_list.append(tags_str)
+                colors.append(color)
+    else:
+        # 길이/비율 계산: 전체 얼굴을 한 번에 벡터 계산
+        all_length1 = compute_length(pool, l1_p1, l1_p2, l1_calc)
+        all_length2 = compute_length(pool, l2_p1, l2_p2, l2_calc)
+
+        valid = ~np.isnan(all_length1)
+        if purpose != "📏 거리 측정":
+            valid &= ~np.isnan(all_length2)
+
+        final_length1 = all_length1[valid]
+        final_length2 = np.nan_to_num(all_length2[valid], nan=0.0)
+
+        # 정규화 적용 (비율 계산이고 normalize_ratio가 True일 때)
+        if purpose == "⚖️ 비율 계산" and normalize_ratio:
+            # X축(길이1)을 1로 고정하고 Y축(길이2)을 비례적으로 스케일링
+            scalable = final_length1 != 0
+            final_length2 = np.where(scalable, final_length2 / np.where(scalable, final_length1, 1), final_length2)
+            final_length1 = np.where(scalable, 1.0, final_length1)
+
+        # 소수점 둘째자리까지 반올림
+        length1_values = np.round(final_length1, 2).tolist()
+        length2_values = np.round(final_length2, 2).tolist()
+        names = all_names[valid].tolist()
+
+        for i in np.flatnonzero(valid):
+            row_tags = all_row_tags[i]
+            tags_list.append(', '.join(row_tags) if row_tags else '태그없음')
+            colors.append(row_colors[i])
 
     if not length1_values:
         st.error("❌ 계산할 수 있는 데이터가 없습니다.")
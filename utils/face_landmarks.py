@@ -0,0 +1,15 @@
+"""
+mpidx 기반 고정 크기 랜드마크 배열 표현 (face_db_core.face_landmarks 재노출)
+
+DB 코어(측정 계획, 비율 저장)도 같은 배열 표현을 사용하므로 구현은 face_db_core에 있고,
+앱 모듈은 기존처럼 utils.face_landmarks에서 가져다 씁니다.
+"""
+from face_db_core.face_landmarks import (
+    LANDMARK_SLOTS,
+    MAX_MPIDX,
+    FaceLandmarks,
+    PoolTensor,
+    to_face_landmarks
+)
+
+__all__ = ['LANDMARK_SLOTS', 'MAX_MPIDX', 'FaceLandmarks', 'PoolTensor', 'to_face_landmarks']
@@ -1,244 +1,271 @@
 """
 랜드마크 좌표 기반 계산 유틸리티
 """
+from functools import lru_cache
+
 import numpy as np
 from scipy import interpolate
+from .face_landmarks import FaceLandmarks, PoolTensor
 
 
-def calculate_landmarks_metric(landmarks, points, calc_type):
-    """랜드마크 기반 메트릭 계산"""
-    try:
-        # landmarks에서 선택된 점들 추출
-        selected_landmarks = []
-        for point_id in points:
-            landmark = next((lm for lm in landmarks if lm['mpidx'] == point_id), None)
-            if landmark:
-                selected_landmarks.append(landmark)
-
-        if len(selected_landmarks) != len(points):
-            return None
+# calc_type별 필요한 최소 점 개수
+METRIC_MIN_POINTS = {
+    "X 좌표": 1, "Y 좌표": 1, "Z 좌표": 1, "원점에서의 거리": 1,
+    "유클리드 거리": 2, "맨하탄 거리": 2, "X축 거리": 2, "Y축 거리": 2, "Z축 거리": 2,
+    "거리 비율 (A-B : C-D)": 4, "X축 비율": 4, "Y축 비율": 4, "Z축 비율": 4,
+    "벡터 각도": 3, "평면 각도": 3, "기울기 각도": 3,
+    "삼각형 넓이": 3, "다각형 넓이": 3,
+    "좌우 대칭 비율": 4, "중심축 기준 거리차": 4, "대칭도 점수": 4,
+}
 
-        # 계산 실행 - 새로운 목적 기반 구조
-
-        # 📍 단일 점 분석
-        if calc_type == "X 좌표":
-            return selected_landmarks[0]['x']
-        elif calc_type == "Y 좌표":
-            return selected_landmarks[0]['y']
-        elif calc_type == "Z 좌표":
-            return selected_landmarks[0]['z']
-        elif calc_type == "원점에서의 거리":
-            p = selected_landmarks[0]
-            return np.sqrt(p['x']**2 + p['y']**2 + p['z']**2)
-
-        # 📏 거리 측정
-        elif calc_type == "유클리드 거리":
-            p1, p2 = selected_landmarks[0], selected_landmarks[1]
-            return np.sqrt((p1['x']-p2['x'])**2 + (p1['y']-p2['y'])**2 + (p1['z']-p2['z'])**2)
-        elif calc_type == "맨하탄 거리":
-            p1, p2 = selected_landmarks[0], selected_landmarks[1]
-            return abs(p1['x']-p2['x']) + abs(p1['y']-p2['y']) + abs(p1['z']-p2['z'])
-        elif calc_type == "X축 거리":
-            p1, p2 = selected_landmarks[0], selected_landmarks[1]
-            return abs(p1['x'] - p2['x'])
-        elif calc_type == "Y축 거리":
-            p1, p2 = selected_landmarks[0], selected_landmarks[1]
-            return abs(p1['y'] - p2['y'])
-        elif calc_type == "Z축 거리":
-            p1, p2 = selected_landmarks[0], selected_landmarks[1]
-            return abs(p1['z'] - p2['z'])
-
-        # ⚖️ 비율 계산 (4개 점: A-B 거리 vs C-D 거리)
-        elif calc_type == "거리 비율 (A-B : C-D)":
-            if len(selected_landmarks) >= 4:
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                dist1 = np.sqrt((p1['x']-p2['x'])**2 + (p1['y']-p2['y'])**2 + (p1['z']-p2['z'])**2)
-                dist2 = np.sqrt((p3['x']-p4['x'])**2 + (p3['y']-p4['y'])**2 + (p3['z']-p4['z'])**2)
-                return dist1 / dist2 if dist2 != 0 else 0
-        elif calc_type == "X축 비율":
-            if len(selected_landmarks) >= 4:
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                dist1 = abs(p1['x'] - p2['x'])
-                dist2 = abs(p3['x'] - p4['x'])
-                return dist1 / dist2 if dist2 != 0 else 0
-        elif calc_type == "Y축 비율":
-            if len(selected_landmarks) >= 4:
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                dist1 = abs(p1['y'] - p2['y'])
-                dist2 = abs(p3['y'] - p4['y'])
-                return dist1 / dist2 if dist2 != 0 else 0
-        elif calc_type == "Z축 비율":
-            if len(selected_landmarks) >= 4:
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                dist1 = abs(p1['z'] - p2['z'])
-                dist2 = abs(p3['z'] - p4['z'])
-                return dist1 / dist2 if dist2 != 0 else 0
-
-        # 📐 각도 측정
-        elif calc_type == "벡터 각도":
-            if len(selected_landmarks) >= 3:
-                p1, p2, p3 = selected_landmarks[:3]
-                # p2를 중심으로 p1과 p3 사이의 각도
-                v1 = np.array([p1['x']-p2['x'], p1['y']-p2['y'], p1['z']-p2['z']])
-                v2 = np.array([p3['x']-p2['x'], p3['y']-p2['y'], p3['z']-p2['z']])
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1, 1)  # 부동소수점 오차 방지
-                return np.degrees(np.arccos(cos_angle))
-        elif calc_type == "평면 각도":
-            if len(selected_landmarks) >= 3:
-                p1, p2, p3 = selected_landmarks[:3]
-                # XY 평면에서의 각도만 계산
-                v1 = np.array([p1['x']-p2['x'], p1['y']-p2['y']])
-                v2 = np.array([p3['x']-p2['x'], p3['y']-p2['y']])
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1, 1)
-                return np.degrees(np.arccos(cos_angle))
-        elif calc_type == "기울기 각도":
-            if len(selected_landmarks) >= 3:
-                p1, p2, p3 = selected_landmarks[:3]
-                # 첫 번째와 마지막 점을 연결한 직선의 기울기
-                slope = (p3['y'] - p1['y']) / (p3['x'] - p1['x']) if p3['x'] != p1['x'] else float('inf')
-                return np.degrees(np.arctan(slope)) if slope != float('inf') else 90
-
-        # 📊 면적 계산
-        elif calc_type == "삼각형 넓이":
-            if len(selected_landmarks) >= 3:
-                p1, p2, p3 = selected_landmarks[:3]
-                # 3D 삼각형 넓이 계산 (외적 사용)
-                v1 = np.array([p2['x']-p1['x'], p2['y']-p1['y'], p2['z']-p1['z']])
-                v2 = np.array([p3['x']-p1['x'], p3['y']-p1['y'], p3['z']-p1['z']])
-                cross = np.cross(v1, v2)
-                return 0.5 * np.linalg.norm(cross)
-        elif calc_type == "다각형 넓이":
-            if len(selected_landmarks) >= 3:
-                # 2D 다각형 넓이 (Shoelace formula)
-                points = [(p['x'], p['y']) for p in selected_landmarks]
-                n = len(points)
-                area = 0
-                for i in range(n):
-                    j = (i + 1) % n
-                    area += points[i][0] * points[j][1]
-                    area -= points[j][0] * points[i][1]
-                return abs(area) / 2
-
-        # ⚖️ 대칭성 분석
-        elif calc_type == "좌우 대칭 비율":
-            if len(selected_landmarks) >= 4:
-                # 첫 두 점 vs 나중 두 점의 거리 비교
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                left_dist = np.sqrt((p1['x']-p2['x'])**2 + (p1['y']-p2['y'])**2)
-                right_dist = np.sqrt((p3['x']-p4['x'])**2 + (p3['y']-p4['y'])**2)
-                return left_dist / right_dist if right_dist != 0 else 0
-        elif calc_type == "중심축 기준 거리차":
-            if len(selected_landmarks) >= 4:
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                # 중심축을 Y축으로 가정하고 좌우 점들의 중심축으로부터의 거리 차이
-                center_x = (p1['x'] + p2['x'] + p3['x'] + p4['x']) / 4
-                left_dist = abs(p1['x'] - center_x) + abs(p2['x'] - center_x)
-                right_dist = abs(p3['x'] - center_x) + abs(p4['x'] - center_x)
-                return abs(left_dist - right_dist)
-        elif calc_type == "대칭도 점수":
-            if len(selected_landmarks) >= 4:
-                # 0에 가까울수록 대칭적
-                p1, p2, p3, p4 = selected_landmarks[:4]
-                center_x = (p1['x'] + p2['x'] + p3['x'] + p4['x']) / 4
-                left_deviation = np.sqrt((p1['x'] - center_x)**2 + (p2['x'] - center_x)**2)
-                right_deviation = np.sqrt((p3['x'] - center_x)**2 + (p4['x'] - center_x)**2)
-                return abs(left_deviation - right_deviation)
+# calculate_length 계산방식 → calc_type
+LENGTH_CALC_TYPES = {
+    "직선거리": "유클리드 거리",
+    "X좌표거리": "X축 거리",
+    "Y좌표거리": "Y축 거리",
+}
 
-        return None
+_AXIS = {"X": 0, "Y": 1, "Z": 2}
 
-    except Exception as e:
-        return None
 
+def _safe_divide(numerator, denominator):
+    """분모가 0이면 0 (기존 스칼라 계산과 동일)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), 0.0)
 
-def calculate_length(landmarks, point1_id, point2_id, calc_type):
-    """두 점 사이의 거리 계산"""
-    try:
-        # 점 찾기
-        p1 = next((lm for lm in landmarks if lm['mpidx'] == point1_id), None)
-        p2 = next((lm for lm in landmarks if lm['mpidx'] == point2_id), None)
 
-        if not p1 or not p2:
-            return None
+def _angle_between(v1, v2):
+    """(F, d) 벡터쌍 사이 각도 (도)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.sum(v1 * v2, axis=1) / (np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1))
+    return np.degrees(np.arccos(np.clip(cos_angle, -1, 1)))  # 부동소수점 오차 방지
 
-        if calc_type == "직선거리":
-            return np.sqrt((p1['x']-p2['x'])**2 + (p1['y']-p2['y'])**2 + (p1['z']-p2['z'])**2)
-        elif calc_type == "X좌표거리":
-            return abs(p1['x'] - p2['x'])
-        elif calc_type == "Y좌표거리":
-            return abs(p1['y'] - p2['y'])
-        else:
-            return None
 
-    except Exception as e:
+def _metric_kernel(P, calc_type):
+    """(F, n, 3) 좌표에 대해 calc_type 메트릭을 한 번에 계산
+
+    Returns:
+        (F,) float64 배열 (계산 불가는 NaN) 또는 None (알 수 없는 calc_type / 점 부족)
+    """
+    if calc_type not in METRIC_MIN_POINTS or P.shape[1] < METRIC_MIN_POINTS[calc_type]:
         return None
 
-
-def calculate_curvature(landmarks, point_ids):
-    """점 그룹의 곡률 계산
+    # 📍 단일 점 분석
+    if calc_type in ("X 좌표", "Y 좌표", "Z 좌표"):
+        return P[:, 0, _AXIS[calc_type[0]]]
+    if calc_type == "원점에서의 거리":
+        return np.linalg.norm(P[:, 0], axis=1)
+
+    # 📏 거리 측정
+    if calc_type == "유클리드 거리":
+        return np.linalg.norm(P[:, 0] - P[:, 1], axis=1)
+    if calc_type == "맨하탄 거리":
+        return np.abs(P[:, 0] - P[:, 1]).sum(axis=1)
+    if calc_type in ("X축 거리", "Y축 거리", "Z축 거리"):
+        axis = _AXIS[calc_type[0]]
+        return np.abs(P[:, 0, axis] - P[:, 1, axis])
+
+    # ⚖️ 비율 계산 (4개 점: A-B 거리 vs C-D 거리)
+    if calc_type == "거리 비율 (A-B : C-D)":
+        dist1 = np.linalg.norm(P[:, 0] - P[:, 1], axis=1)
+        dist2 = np.linalg.norm(P[:, 2] - P[:, 3], axis=1)
+        return _safe_divide(dist1, dist2)
+    if calc_type in ("X축 비율", "Y축 비율", "Z축 비율"):
+        axis = _AXIS[calc_type[0]]
+        dist1 = np.abs(P[:, 0, axis] - P[:, 1, axis])
+        dist2 = np.abs(P[:, 2, axis] - P[:, 3, axis])
+        return _safe_divide(dist1, dist2)
+
+    # 📐 각도 측정 (p2를 중심으로 p1과 p3 사이의 각도)
+    if calc_type == "벡터 각도":
+        return _angle_between(P[:, 0] - P[:, 1], P[:, 2] - P[:, 1])
+    if calc_type == "평면 각도":
+        # XY 평면에서의 각도만 계산
+        return _angle_between(P[:, 0, :2] - P[:, 1, :2], P[:, 2, :2] - P[:, 1, :2])
+    if calc_type == "기울기 각도":
+        # 첫 번째와 마지막 점을 연결한 직선의 기울기
+        dx = P[:, 2, 0] - P[:, 0, 0]
+        dy = P[:, 2, 1] - P[:, 0, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            angle = np.degrees(np.arctan(dy / np.where(dx != 0, dx, 1)))
+        return np.where(dx != 0, angle, 90.0)
+
+    # 📊 면적 계산
+    if calc_type == "삼각형 넓이":
+        # 3D 삼각형 넓이 계산 (외적 사용)
+        cross = np.cross(P[:, 1] - P[:, 0], P[:, 2] - P[:, 0])
+        return 0.5 * np.linalg.norm(cross, axis=1)
+    if calc_type == "다각형 넓이":
+        # 2D 다각형 넓이 (Shoelace formula)
+        x, y = P[:, :, 0], P[:, :, 1]
+        x_next, y_next = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+        return np.abs(np.sum(x * y_next - x_next * y, axis=1)) / 2
+
+    # ⚖️ 대칭성 분석
+    if calc_type == "좌우 대칭 비율":
+        # 첫 두 점 vs 나중 두 점의 거리 비교
+        left_dist = np.linalg.norm(P[:, 0, :2] - P[:, 1, :2], axis=1)
+        right_dist = np.linalg.norm(P[:, 2, :2] - P[:, 3, :2], axis=1)
+        return _safe_divide(left_dist, right_dist)
+
+    # 중심축을 Y축으로 가정하고 좌우 점들의 중심축으로부터의 편차 비교
+    x = P[:, :4, 0]
+    center_x = x.mean(axis=1)
+    offsets = x - center_x[:, None]
+    if calc_type == "중심축 기준 거리차":
+        left_dist = np.abs(offsets[:, :2]).sum(axis=1)
+        right_dist = np.abs(offsets[:, 2:]).sum(axis=1)
+        return np.abs(left_dist - right_dist)
+    # 대칭도 점수: 0에 가까울수록 대칭적
+    left_deviation = np.sqrt((offsets[:, :2] ** 2).sum(axis=1))
+    right_deviation = np.sqrt((offsets[:, 2:] ** 2).sum(axis=1))
+    return np.abs(left_deviation - right_deviation)
+
+
+def compute_metric(pool_tensor, points, calc_type):
+    """풀 전체 얼굴에 대해 메트릭을 한 번에 계산
 
     Args:
-        landmarks: 랜드마크 리스트
-        point_ids: 점 번호 리스트 (5-7개)
+        pool_tensor: PoolTensor (faces × 501 × 3)
+        points: 점 번호 리스트
+        calc_type: calculate_landmarks_metric과 동일한 계산 방식
 
     Returns:
-        각 점에서의 곡률 값 리스트 또는 None
+        pool_tensor.ids 순서에 맞춘 (F,) float64 배열 (계산 불가는 NaN)
     """
+    P = pool_tensor.take(list(points))
+    values = _metric_kernel(P, calc_type)
+    if values is None:
+        return np.full(len(pool_tensor), np.nan)
+    values = np.asarray(values, dtype=np.float64)
+    # 점이 하나라도 없는 얼굴은 NaN
+    values[~pool_tensor.has(points)] = np.nan
+    return values
+
+
+def compute_length(pool_tensor, point1_id, point2_id, calc_type):
+    """풀 전체 얼굴에 대해 calculate_length를 한 번에 계산 ((F,) 배열, 계산 불가는 NaN)"""
+    if calc_type not in LENGTH_CALC_TYPES:
+        return np.full(len(pool_tensor), np.nan)
+    return compute_metric(pool_tensor, [point1_id, point2_id], LENGTH_CALC_TYPES[calc_type])
+
+
+def _single_face_metric(landmarks, points, calc_type):
+    """단일 얼굴 계산: 1개짜리 풀 텐서로 배치 계산 후 NaN은 None으로 변환"""
+    face = FaceLandmarks.from_landmarks(landmarks)
+    pool = PoolTensor(face.coords[None], face.mask[None])
+    value = compute_metric(pool, points, calc_type)[0]
+    return None if np.isnan(value) else value
+
+
+def calculate_landmarks_metric(landmarks, points, calc_type):
+    """랜드마크 기반 메트릭 계산"""
     try:
-        if len(point_ids) < 3:
-            return None
+        return _single_face_metric(landmarks, points, calc_type)
+    except Exception as e:
+        return None
 
-        # 랜드마크에서 선택된 점들 추출
-        selected_points = []
-        for point_id in point_ids:
-            landmark = next((lm for lm in landmarks if lm['mpidx'] == point_id), None)
-            if landmark:
-                selected_points.append([landmark['x'], landmark['y']])
-            else:
-                return None
 
-        if len(selected_points) != len(point_ids):
+def calculate_length(landmarks, point1_id, point2_id, calc_type):
+    """두 점 사이의 거리 계산"""
+    try:
+        if calc_type not in LENGTH_CALC_TYPES:
             return None
+        return _single_face_metric(landmarks, [point1_id, point2_id], LENGTH_CALC_TYPES[calc_type])
+    except Exception as e:
+        return None
 
-        # numpy 배열로 변환
-        points = np.array(selected_points)
 
-        # 얼굴 중심 기준으로 방향 정규화 판단
-        direction_factor = determine_direction_factor(points, point_ids)
+@lru_cache(maxsize=None)
+def _spline_derivative_basis(n_points):
+    """고정 파라미터 격자 t = 0..n-1 위의 보간 스플라인 1차/2차 미분 기저 행렬
 
-        # parametric t 값 생성 (0부터 점 개수-1까지)
-        t = np.arange(len(points))
+    s=0 보간 스플라인은 매듭이 t에만 의존하므로 데이터에 대해 선형입니다.
+    따라서 단위벡터마다 한 번씩 스플라인을 만들어 두면
+    어떤 좌표열 y에 대해서도 미분값 = 기저 행렬 @ y 로 계산됩니다.
 
-        # x, y 좌표에 대해 각각 스플라인 보간
-        spline_x = interpolate.UnivariateSpline(t, points[:, 0], s=0)
-        spline_y = interpolate.UnivariateSpline(t, points[:, 1], s=0)
+    Returns:
+        (B1, B2): 각각 (n, n) 행렬, B1 @ y = 각 점에서의 1차 미분
+    """
+    t = np.arange(n_points)
+    identity = np.eye(n_points)
+    first = np.empty((n_points, n_points))
+    second = np.empty((n_points, n_points))
+    for j in range(n_points):
+        spline = interpolate.UnivariateSpline(t, identity[j], s=0)
+        first[:, j] = spline.derivative(1)(t)
+        second[:, j] = spline.derivative(2)(t)
+    first.setflags(write=False)
+    second.setflags(write=False)
+    return first, second
+
+
+def _curvature_kernel(points, point_ids):
+    """(F, n, 2) 좌표에 대한 부호 있는 곡률 (F, n) - 방향 정규화 포함"""
+    first, second = _spline_derivative_basis(points.shape[1])
+    x, y = points[:, :, 0], points[:, :, 1]
+
+    # 1차, 2차 미분 계산 (모든 얼굴, 모든 점 한 번에)
+    dx, dy = x @ first.T, y @ first.T
+    d2x, d2y = x @ second.T, y @ second.T
+
+    # 부호 있는 곡률 공식: (x'y'' - y'x'') / (x'^2 + y'^2)^(3/2)
+    # 양수: 위로 볼록(∩), 음수: 아래로 볼록(∪)
+    numerator = dx * d2y - dy * d2x
+    denominator = (dx**2 + dy**2)**(3/2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curvatures = np.where(denominator == 0, 0.0, numerator / np.where(denominator == 0, 1, denominator))
+
+    # 얼굴 중심 기준 방향 정규화 적용
+    direction_factor = determine_direction_factor(points, point_ids)
+    return curvatures * direction_factor[:, None]
+
+
+def compute_curvature(pool_tensor, point_group):
+    """풀 전체 얼굴에 대해 점 그룹의 곡률을 한 번에 계산
 
-        # 각 원본 점에서의 곡률 계산
-        curvatures = []
-        for i in range(len(points)):
-            # 1차, 2차 미분 계산
-            dx = spline_x.derivative(1)(i)
-            dy = spline_y.derivative(1)(i)
-            d2x = spline_x.derivative(2)(i)
-            d2y = spline_y.derivative(2)(i)
+    Args:
+        pool_tensor: PoolTensor (faces × 501 × 3)
+        point_group: 점 번호 리스트 (4개 이상 - 3차 스플라인 보간 조건)
 
-            # 부호 있는 곡률 공식: (x'y'' - y'x'') / (x'^2 + y'^2)^(3/2)
-            # 양수: 위로 볼록(∩), 음수: 아래로 볼록(∪)
-            numerator = dx * d2y - dy * d2x
-            denominator = (dx**2 + dy**2)**(3/2)
+    Returns:
+        (faces × points) float64 행렬 (점이 없는 얼굴의 행은 NaN)
 
-            if denominator == 0:
-                curvature = 0
-            else:
-                curvature = numerator / denominator
+    Note:
+        미분 기저 행렬 계산 자체는 기존 얼굴별 스플라인과 같은 값이지만 (float64 입력 기준 상대오차 1e-10 이하),
+        기본 PoolTensor 좌표는 float32라서 기존 float64 calculate_curvature와 정확히 같지 않습니다.
+        (샘플 300명 × 곡률 정의 8개: 상대오차 중앙값 ~2e-6, 99% ~1.4e-4, 최대 ~3.6e-3)
+        같은 값이 필요하면 PoolTensor.from_faces(..., dtype=np.float64)로 만든 텐서를 넘기세요.
+    """
+    point_group = list(point_group)
+    result = np.full((len(pool_tensor), len(point_group)), np.nan)
+    if len(point_group) < 4:
+        # 3차 스플라인은 점이 4개 이상이어야 함 (기존 UnivariateSpline과 동일)
+        return result
 
-            # 방향 정규화 적용
-            curvature *= direction_factor
+    valid = pool_tensor.has(point_group)
+    if valid.any():
+        points = pool_tensor.take(point_group)[valid][:, :, :2]
+        result[valid] = _curvature_kernel(points, point_group)
+    return result
 
-            curvatures.append(curvature)
 
-        return curvatures
+def calculate_curvature(landmarks, point_ids):
+    """점 그룹의 곡률 계산
+
+    Args:
+        landmarks: FaceLandmarks 또는 랜드마크 리스트
+        point_ids: 점 번호 리스트 (5-7개)
+
+    Returns:
+        각 점에서의 곡률 값 리스트 또는 None
+    """
+    try:
+        face = FaceLandmarks.from_landmarks(landmarks)
+        curvatures = compute_curvature(PoolTensor(face.coords[None], face.mask[None]), point_ids)[0]
+        if np.isnan(curvatures).any():
+            return None
+        return curvatures.tolist()
 
     except Exception as e:
         return None
@@ -249,34 +276,40 @@ def determine_direction_factor(points, point_ids):
 
     Args:
         points: 점들의 좌표 배열 [[x1, y1], [x2, y2], ...]
+            또는 여러 얼굴을 묶은 (F, n, 2) 배열
         point_ids: MediaPipe 점 번호들
 
     Returns:
-        1 또는 -1 (방향 정규화 인수)
+        1 또는 -1 (방향 정규화 인수) - (F, n, 2) 입력이면 (F,) 배열
     """
 
+    points = np.asarray(points)
+
     # 얼굴 중심 X 좌표 (대략 200-250 범위, 이미지 너비 500 기준)
     face_center_x = 250
 
     # 시작점과 끝점의 X 좌표
-    start_x = points[0][0]
-    end_x = points[-1][0]
+    start_x = points[..., 0, 0]
+    end_x = points[..., -1, 0]
 
     # 전체 이동 방향 (내측→외측 기준)
     overall_direction = end_x - start_x
 
     # 좌측/우측 판단
-    avg_x = np.mean(points[:, 0])
+    avg_x = np.mean(points[..., 0], axis=-1)
     is_left_side = avg_x < face_center_x
 
     # 방향 정규화 로직
-    if is_left_side:
-        # 좌측: 내측→외측이 X 증가 방향 (양수)
-        # 정상적인 내측→외측 이동이면 그대로, 반대면 뒤집기
-        direction_factor = 1 if overall_direction > 0 else -1
-    else:
-        # 우측: 내측→외측이 X 감소 방향 (음수)
-        # 정상적인 내측→외측 이동이면 뒤집기, 반대면 그대로
-        direction_factor = -1 if overall_direction < 0 else 1
-
-    return direction_factor
\ No newline at end of file
+    # 좌측: 내측→외측이 X 증가 방향 (양수)
+    #   정상적인 내측→외측 이동이면 그대로, 반대면 뒤집기
+    # 우측: 내측→외측이 X 감소 방향 (음수)
+    #   정상적인 내측→외측 이동이면 뒤집기, 반대면 그대로
+    direction_factor = np.where(
+        is_left_side,
+        np.where(overall_direction > 0, 1, -1),
+        np.where(overall_direction < 0, -1, 1)
+    )
+
+    if direction_factor.ndim == 0:
+        return int(direction_factor)
+    return direction_factor
@@ -0,0 +1,130 @@
+"""
+Pool 2차 태그 측정값 percentile 인덱스
+- (tag_name, side)별 정렬된 측정값 배열을 프로세스 전역으로 공유
+- np.searchsorted로 percentile 계산 (Pool 크기와 무관한 조회 비용)
+- Pool 버전(pool_state, Pool을 바꾸는 모든 트랜잭션이 증가)이 바뀌면 다음 조회 시 자동 재구축
+- (tag_name, side)별 분포 digest: 저장된 User percentile이 어느 분포로 계산됐는지 비교용
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from face_db_core.pool_state import get_pool_version
+from face_db_core.schema_def import Pool2ndTagValue
+
+
+def percentile_of(values: Optional[np.ndarray], value) -> Optional[float]:
+    """정렬된 Pool 배열에서 value 이하인 비율 (배열이 비었거나 value가 None이면 None)"""
+    if values is None or len(values) == 0 or value is None:
+        return None
+    return float(np.searchsorted(values, value, side='right') / len(values))
+
+
+class PoolPercentileIndex:
+    """(tag_name, side) → (정렬된 Pool 측정값 배열, 분포 digest)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[Tuple[str, str], Tuple[np.ndarray, str]] = {}
+        self._fingerprint = None
+
+    @property
+    def version(self):
+        """현재 인덱스가 반영하는 Pool 버전"""
+        return self._fingerprint
+
+    def _current_fingerprint(self, session: Session):
+        """Pool 버전 - 측정값 추가/삭제뿐 아니라 기존 행 UPDATE도 반영됨"""
+        return get_pool_version(session)
+
+    def refresh(self, session: Session, force: bool = False) -> "PoolPercentileIndex":
+        """Pool이 바뀌었을 때만 인덱스 재구축
+
+        Args:
+            session: DB 세션
+            force: True면 상태와 무관하게 재구축
+
+        Returns:
+            self (체이닝용)
+        """
+        fingerprint = self._current_fingerprint(session)
+        if not force and fingerprint == self._fingerprint:
+            return self
+
+        with self._lock:
+            # 다른 스레드가 먼저 재구축했으면 생략
+            if not force and fingerprint == self._fingerprint:
+                return self
+
+            rows = session.query(
+                Pool2ndTagValue.tag_name, Pool2ndTagValue.side, Pool2ndTagValue.측정값
+            ).filter(
+                Pool2ndTagValue.측정값.isnot(None)
+            ).all()
+
+            grouped = {}
+            for tag_name, side, value in rows:
+                grouped.setdefault((tag_name, side), []).append(value)
+
+            tables = {}
+            for key, values in grouped.items():
+                array = np.sort(np.asarray(values, dtype=np.float64))
+                tables[key] = (array, hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest())
+
+            # 완성된 dict를 한 번에 교체 (조회 중인 요청은 이전 dict를 계속 사용)
+            self._tables = tables
+            self._fingerprint = fingerprint
+
+        return self
+
+    def invalidate(self):
+        """다음 refresh()에서 무조건 재구축"""
+        with self._lock:
+            self._fingerprint = None
+
+    def values(self, tag_name: str, side: str) -> Optional[np.ndarray]:
+        """정렬된 Pool 측정값 배열 (없으면 None)"""
+        return self.lookup(tag_name, side)[0]
+
+    def digest(self, tag_name: str, side: str) -> Optional[str]:
+        """정렬된 Pool 측정값 배열의 digest (Pool 데이터가 없으면 None)
+
+        값이 하나라도 추가/삭제/변경되면 달라지므로 저장된 percentile의 유효성 확인에 사용
+        """
+        return self.lookup(tag_name, side)[1]
+
+    def lookup(self, tag_name: str, side: str) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        """(정렬된 배열, digest)를 같은 세대에서 함께 조회 (재구축 중에도 짝이 맞음)"""
+        return self._tables.get((tag_name, side), (None, None))
+
+    def keys(self):
+        """Pool 측정값이 있는 (tag_name, side) 목록"""
+        return list(self._tables)
+
+    def percentile(self, tag_name: str, side: str, value: float) -> Optional[float]:
+        """Pool에서 value 이하인 측정값의 비율 (0.0 ~ 1.0, Pool 데이터가 없으면 None)"""
+        return percentile_of(self.values(tag_name, side), value)
+
+    def percentiles(self, tag_name: str, side: str, user_values) -> Optional[np.ndarray]:
+        """여러 측정값의 percentile을 한 번에 계산"""
+        values = self.values(tag_name, side)
+        if values is None or len(values) == 0:
+            return None
+        return np.searchsorted(values, np.asarray(user_values, dtype=np.float64), side='right') / len(values)
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __repr__(self):
+        return f"PoolPercentileIndex({len(self)} tags, version={self._fingerprint})"
+
+
+# 프로세스 전역 인덱스 (모든 요청이 공유)
+_pool_percentile_index = PoolPercentileIndex()
+
+
+def get_pool_percentile_index() -> PoolPercentileIndex:
+    """프로세스 전역 Pool percentile 인덱스"""
+    return _pool_percentile_index
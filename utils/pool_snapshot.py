@@ -0,0 +1,201 @@
+"""
+Streamlit 앱용 Pool 스냅샷 캐시
+- DB Pool DataFrame + people_json 폴더 JSON을 병합한 결과를 프로세스 전역으로 보관
+- (Pool 버전, 폴더 fingerprint)가 바뀔 때만 다시 로드
+- 사이드바 옵션만 바뀐 rerun은 DB 조회/파일 읽기 없이 같은 스냅샷을 재사용
+- mmap Pool 저장소(POOL_STORE_DIR)가 같은 Pool 버전이면 DB 행의 landmarks는
+  landmarks_json을 파싱하지 않고 저장소에서 가져옴
+- 그중 폴더 JSON이 DB 행을 덮어쓰지 않고 스냅샷 행이 저장소 행과 같으면
+  PoolTensor/TagIndex도 저장소 배열(mmap)을 그대로 사용 (프로세스 간 페이지 캐시 공유)
+  그 외에는 스냅샷마다 프로세스 메모리에 복사본을 만듦
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from .face_landmarks import PoolTensor, to_face_landmarks
+from .pool_store import get_pool_store
+from .tag_index import TagIndex
+
+
+def folder_fingerprint(folder) -> Optional[str]:
+    """폴더 JSON 파일들의 (이름, mtime_ns, 크기) 해시 - 파일 내용은 읽지 않음 (폴더가 없으면 None)"""
+    try:
+        with os.scandir(folder) as entries:
+            stats = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            )
+    except FileNotFoundError:
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name, mtime_ns, size in stats:
+        digest.update(f"{name}\0{mtime_ns}\0{size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PoolSnapshot:
+    """한 시점의 Pool 데이터 (읽기 전용으로 공유)
+
+    - data: landmarks가 있는 얼굴만 담은 DataFrame (landmarks 컬럼은 FaceLandmarks)
+    - db_count: DB에서 읽은 프로필 수 (0이면 DB가 비어 있음)
+    - tag_index: data 행 순서와 같은 TagIndex
+    - pool: data 행 순서와 같은 PoolTensor (분석 함수마다 다시 만들지 않도록 스냅샷당 한 번 생성)
+    tag_index / pool을 넘기지 않으면 data로 생성 (복사본)
+    - errors: [(파일명, 오류 메시지), ...] 폴더 JSON 로딩 실패 목록
+    - version: (Pool 버전, 폴더 fingerprint)
+    """
+
+    __slots__ = ('data', 'tag_index', 'pool', 'db_count', 'errors', 'version')
+
+    def __init__(self, data, db_count=0, errors=None, version=None, tag_index=None, pool=None):
+        self.data = data
+        self.tag_index = tag_index if tag_index is not None else TagIndex.from_dataframe(data)
+        self.pool = pool if pool is not None else PoolTensor.from_dataframe(data)
+        self.db_count = db_count
+        self.errors = errors or []
+        self.version = version
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"PoolSnapshot({len(self)} faces, version={self.version})"
+
+
+def _current_store(crud_service, pool_version=None):
+    """현재 Pool 버전을 반영한 mmap 저장소 (없거나 갱신이 밀렸으면 None)"""
+    store = get_pool_store()
+    if store is None:
+        return None
+    if pool_version is None:
+        pool_version = crud_service.get_pool_version()
+    return store if store.pool_version == pool_version else None
+
+
+def _store_landmarks(store, face_ids):
+    """프로필 id 순서대로 저장소의 FaceLandmarks (mmap 뷰) - 점이 하나도 없으면 None"""
+    faces = []
+    for face_id in face_ids:
+        face = store.face(face_id)
+        faces.append(face if face is not None and face.mask.any() else None)
+    return faces
+
+
+def build_pool_snapshot(crud_service, folder, pool_version=None) -> PoolSnapshot:
+    """DB Pool과 폴더 JSON을 병합해 스냅샷 생성 (캐시 없이 항상 새로 로드)
+
+    Args:
+        pool_version: 호출자가 이미 읽은 Pool 버전 (mmap 저장소 최신 여부 확인용)
+    """
+    store = _current_store(crud_service, pool_version)
+    db_data = crud_service.get_dataframe(include_landmarks=store is None)
+    if db_data.empty:
+        return PoolSnapshot(pd.DataFrame())
+
+    if store is not None:
+        db_data['landmarks'] = _store_landmarks(store, db_data['id'])
+
+    # landmarks 컬럼이 있는 데이터만 필터링
+    landmarks_data = db_data[db_data['landmarks'].notna()].copy()
+    if landmarks_data.empty:
+        return PoolSnapshot(pd.DataFrame(), db_count=len(db_data))
+
+    # JSON 파일에서 추가 데이터 로드
+    json_data_list = []
+    errors: List[Tuple[str, str]] = []
+    folder = Path(folder)
+    if folder.exists():
+        for file_path in folder.glob("*.json"):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    json_data = json.load(f)
+                    # 'landmarks' 데이터가 문자열이면 파싱
+                    if isinstance(json_data.get('landmarks'), str):
+                        json_data['landmarks'] = json.loads(json_data['landmarks'])
+                    json_data_list.append(json_data)
+            except Exception as e:
+                errors.append((file_path.name, str(e)))
+
+    json_df = pd.DataFrame(json_data_list)
+
+    # JSON 행이 없고 스냅샷 행이 저장소 행(프로필 id 순서)과 같으면 저장소 배열을 그대로 사용
+    if store is not None and json_df.empty and landmarks_data['id'].tolist() == store.ids:
+        return PoolSnapshot(
+            landmarks_data, db_count=len(db_data), errors=errors,
+            tag_index=TagIndex.from_matrix(store.tag_names, store.tags),
+            pool=PoolTensor(store.coords, store.mask, store.names)
+        )
+
+    # DB 데이터와 JSON 데이터를 합치고, 'name'을 기준으로 중복 제거 (JSON 파일 우선)
+    if not json_df.empty:
+        combined_data = pd.concat([landmarks_data, json_df], ignore_index=True)
+        combined_data.drop_duplicates(subset=['name'], keep='last', inplace=True)
+        landmarks_data = combined_data
+
+    # JSON 파일에서 온 행도 FaceLandmarks 배열로 변환 (DB 행은 이미 배열이라 그대로 사용)
+    landmarks_data['landmarks'] = landmarks_data['landmarks'].map(to_face_landmarks)
+
+    return PoolSnapshot(landmarks_data, db_count=len(db_data), errors=errors)
+
+
+class PoolSnapshotCache:
+    """(Pool 버전, 폴더 fingerprint)가 같으면 이전 스냅샷을 그대로 반환"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[PoolSnapshot] = None
+
+    @property
+    def version(self):
+        """현재 스냅샷이 반영하는 (Pool 버전, 폴더 fingerprint)"""
+        return self._snapshot.version if self._snapshot is not None else None
+
+    def refresh(self, crud_service, folder, force: bool = False) -> PoolSnapshot:
+        """DB나 폴더가 바뀌었을 때만 스냅샷 재생성
+
+        Args:
+            crud_service: get_pool_version() / get_dataframe()를 제공하는 DatabaseCRUD
+            folder: 병합할 JSON 폴더 (source_data/people_json)
+            force: True면 버전과 무관하게 재생성
+
+        Returns:
+            PoolSnapshot
+        """
+        version = (crud_service.get_pool_version(), folder_fingerprint(folder))
+        snapshot = self._snapshot
+        if not force and snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            # 다른 세션(스레드)이 먼저 재생성했으면 생략
+            snapshot = self._snapshot
+            if not force and snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            snapshot = build_pool_snapshot(crud_service, folder, pool_version=version[0])
+            snapshot.version = version
+            self._snapshot = snapshot
+
+        return snapshot
+
+    def invalidate(self):
+        """다음 refresh()에서 무조건 재생성"""
+        with self._lock:
+            self._snapshot = None
+
+
+# 프로세스 전역 캐시 (모든 Streamlit 세션이 공유)
+_pool_snapshot_cache = PoolSnapshotCache()
+
+
+def get_pool_snapshot_cache() -> PoolSnapshotCache:
+    """프로세스 전역 Pool 스냅샷 캐시"""
+    return _pool_snapshot_cache
@@ -0,0 +1,312 @@
+"""
+메모리 맵 Pool 랜드마크 저장소
+- coords: (faces × 501 × 3) float32 .npy, mask: (faces × 501) bool .npy
+- tags: (faces × tags) bool .npy (태그 보유 여부)
+- index.json: id/name/태그 이름 목록과 현재 세대(generation)의 파일 이름
+
+모든 프로세스(API worker, Streamlit, 배치 작업)가 np.load(mmap_mode='r')로 열어
+페이지 캐시를 공유합니다. 갱신은 새 세대 파일을 쓴 뒤 index.json을 os.replace로
+교체하므로, 이미 열려 있는 이전 세대 mmap은 그대로 유효합니다.
+
+갱신은 저장소 폴더의 .lock 파일에 배타적 flock을 잡고 수행하므로
+여러 프로세스(API, 파일 감시, 배치 수집)가 동시에 갱신해도 세대가 꼬이지 않습니다.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows - 프로세스 간 잠금 없이 동작 (writer 프로세스 1개로 운영)
+    fcntl = None
+
+from .face_landmarks import LANDMARK_SLOTS, FaceLandmarks, PoolTensor
+
+
+STORE_FORMAT = 1
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.lock'
+
+# 이전 세대 몇 개까지 파일을 남길지 (갱신 직전에 index.json을 읽은 reader 보호)
+KEEP_GENERATIONS = 2
+
+
+def default_store_dir() -> Optional[str]:
+    """환경변수 POOL_STORE_DIR (없으면 저장소 사용 안 함)"""
+    return os.getenv("POOL_STORE_DIR") or None
+
+
+class PoolStore:
+    """읽기 전용 mmap Pool 저장소 (한 세대)"""
+
+    __slots__ = ('directory', 'generation', 'pool_version', 'coords', 'mask', 'tags',
+                 'ids', 'names', 'tag_names', '_row_of', '_column_of')
+
+    def __init__(self, directory, index, coords, mask, tags):
+        self.directory = Path(directory)
+        self.generation = index['generation']
+        self.pool_version = index.get('pool_version')
+        self.coords = coords
+        self.mask = mask
+        self.tags = tags
+        self.ids = index['ids']
+        self.names = index['names']
+        self.tag_names = index['tag_names']
+        self._row_of = {face_id: row for row, face_id in enumerate(self.ids)}
+        self._column_of = {tag: column for column, tag in enumerate(self.tag_names)}
+
+    @classmethod
+    def open(cls, directory) -> Optional["PoolStore"]:
+        """현재 세대를 mmap으로 열기 (저장소가 없으면 None)"""
+        directory = Path(directory)
+        try:
+            with open(directory / INDEX_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        if index.get('format') != STORE_FORMAT:
+            return None
+
+        files = index['files']
+        arrays = [np.load(directory / files[key], mmap_mode='r') for key in ('coords', 'mask', 'tags')]
+        return cls(directory, index, *arrays)
+
+    def row_of(self, face_id) -> Optional[int]:
+        """프로필 id → 행 번호 (없으면 None)"""
+        return self._row_of.get(face_id)
+
+    def face(self, face_id) -> Optional[FaceLandmarks]:
+        """프로필 1개의 FaceLandmarks (mmap 뷰, 복사 없음)"""
+        row = self._row_of.get(face_id)
+        if row is None:
+            return None
+        return FaceLandmarks(self.coords[row], self.mask[row])
+
+    def tensor(self) -> PoolTensor:
+        """풀 전체 PoolTensor (mmap 뷰, 복사 없음 - ids는 프로필 id)"""
+        return PoolTensor(self.coords, self.mask, self.ids)
+
+    def tag_column(self, tag_name: str) -> Optional[np.ndarray]:
+        """(faces,) bool - 해당 태그를 가진 얼굴 (태그가 없으면 None)"""
+        column = self._column_of.get(tag_name)
+        if column is None:
+            return None
+        return self.tags[:, column]
+
+    def face_tags(self, face_id) -> list:
+        """프로필 1개의 태그 이름 목록"""
+        row = self._row_of.get(face_id)
+        if row is None:
+            return []
+        return [self.tag_names[column] for column in np.flatnonzero(self.tags[row])]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"PoolStore({len(self)} faces, {len(self.tag_names)} tags, generation={self.generation})"
+
+
+def _save_array(path: Path, array: np.ndarray):
+    """임시 파일에 쓴 뒤 이름 변경 (쓰는 중인 파일을 reader가 열지 않도록)"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _remove_old_generations(directory: Path, generation: int):
+    for path in directory.glob('*-*.npy'):
+        try:
+            file_generation = int(path.stem.rsplit('-', 1)[1])
+        except ValueError:
+            continue
+        if file_generation <= generation - KEEP_GENERATIONS:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+@contextmanager
+def _store_lock(directory: Path):
+    """저장소 갱신용 프로세스 간 배타적 잠금 (같은 폴더를 갱신하는 다른 프로세스는 대기)"""
+    with open(directory / LOCK_FILE, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_pool_store(directory, faces: Iterable[Tuple[int, str, Sequence, Sequence[str]]],
+                     deleted_ids: Iterable[int] = (), pool_version=None, rebuild: bool = False) -> PoolStore:
+    """저장소 갱신 - 바뀐 얼굴만 다시 변환하고 나머지 행은 이전 세대에서 그대로 복사
+
+    "증분"은 JSON 파싱/좌표 변환을 바뀐 얼굴만 한다는 뜻이며, 배열 파일은 매번
+    새 세대로 전체를 다시 씁니다 (faces × 501 × 3 float32 복사). 열려 있는 reader의
+    mmap을 건드리지 않으려면 기존 파일을 제자리에서 고칠 수 없기 때문입니다.
+    이전 세대를 읽고 새 세대를 쓰는 전체 과정은 _store_lock 안에서 수행합니다.
+
+    Args:
+        directory: 저장소 폴더
+        faces: 추가/수정된 얼굴 [(프로필 id, 이름, landmarks_json, [태그 이름, ...]), ...]
+        deleted_ids: 삭제된 프로필 id
+        pool_version: 반영한 Pool 버전 (index.json에 기록)
+        rebuild: True면 이전 세대를 무시하고 faces만으로 새로 작성 (전체 내보내기)
+
+    Returns:
+        새 세대의 PoolStore
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    faces = list(faces)
+    with _store_lock(directory):
+        return _write_generation(directory, faces, deleted_ids, pool_version, rebuild)
+
+
+def _write_generation(directory: Path, faces, deleted_ids, pool_version, rebuild) -> PoolStore:
+    current = PoolStore.open(directory)
+    generation = current.generation + 1 if current is not None else 1
+    if rebuild:
+        current = None
+
+    replaced = {face_id for face_id, _, _, _ in faces} | set(deleted_ids)
+
+    # 1. 유지할 기존 행 (바뀌지 않은 얼굴은 좌표를 다시 변환하지 않음)
+    if current is not None:
+        keep_rows = np.array([row for row, face_id in enumerate(current.ids) if face_id not in replaced], dtype=np.intp)
+        kept_ids = [current.ids[row] for row in keep_rows]
+        kept_names = [current.names[row] for row in keep_rows]
+        kept_tags = current.tags[keep_rows]
+        used_columns = np.flatnonzero(kept_tags.any(axis=0)) if len(keep_rows) else np.array([], dtype=np.intp)
+        tag_names = {current.tag_names[column] for column in used_columns}
+    else:
+        keep_rows = np.array([], dtype=np.intp)
+        kept_ids, kept_names = [], []
+        kept_tags = np.zeros((0, 0), dtype=bool)
+        used_columns = np.array([], dtype=np.intp)
+        tag_names = set()
+
+    for _, _, _, face_tags in faces:
+        tag_names.update(face_tags or [])
+    tag_names = sorted(tag_names)
+    column_of = {tag: column for column, tag in enumerate(tag_names)}
+
+    # 2. 새 배열 = 유지 행 + 바뀐 얼굴 (프로필 id 순서로 정렬)
+    count = len(keep_rows) + len(faces)
+    coords = np.full((count, LANDMARK_SLOTS, 3), np.nan, dtype=np.float32)
+    mask = np.zeros((count, LANDMARK_SLOTS), dtype=bool)
+    tags = np.zeros((count, len(tag_names)), dtype=bool)
+
+    if len(keep_rows):
+        coords[:len(keep_rows)] = current.coords[keep_rows]
+        mask[:len(keep_rows)] = current.mask[keep_rows]
+        for column in used_columns:
+            tags[:len(keep_rows), column_of[current.tag_names[column]]] = kept_tags[:, column]
+
+    ids = kept_ids + [face_id for face_id, _, _, _ in faces]
+    names = kept_names + [name for _, name, _, _ in faces]
+    for offset, (_, _, landmarks, face_tags) in enumerate(faces):
+        row = len(keep_rows) + offset
+        face = FaceLandmarks.from_landmarks(landmarks or [], dtype=np.float32)
+        coords[row] = face.coords
+        mask[row] = face.mask
+        for tag in face_tags or []:
+            tags[row, column_of[tag]] = True
+
+    order = np.argsort(np.asarray(ids, dtype=np.int64), kind='stable')
+    if not np.array_equal(order, np.arange(count)):
+        coords, mask, tags = coords[order], mask[order], tags[order]
+        ids = [ids[row] for row in order]
+        names = [names[row] for row in order]
+
+    # 3. 새 세대 파일 작성 후 index.json 교체
+    files = {key: f"{key}-{generation}.npy" for key in ('coords', 'mask', 'tags')}
+    for key, array in (('coords', coords), ('mask', mask), ('tags', tags)):
+        _save_array(directory / files[key], array)
+
+    index = {
+        'format': STORE_FORMAT,
+        'generation': generation,
+        'pool_version': pool_version,
+        'ids': [int(face_id) for face_id in ids],
+        'names': names,
+        'tag_names': tag_names,
+        'files': files
+    }
+    tmp_index = directory / (INDEX_FILE + '.tmp')
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_index, directory / INDEX_FILE)
+
+    _remove_old_generations(directory, generation)
+    return PoolStore.open(directory)
+
+
+def attach_pool_store(db_manager, directory=None):
+    """DatabaseManager가 동기화/수집 후 이 저장소를 갱신하도록 writer 등록
+
+    Args:
+        db_manager: face_db_core DatabaseManager
+        directory: 저장소 폴더 (None이면 db_manager.pool_store_dir / POOL_STORE_DIR)
+    """
+    db_manager.set_pool_store_writer(write_pool_store, directory or default_store_dir())
+    return db_manager
+
+
+class PoolStoreReader:
+    """index.json이 바뀌었을 때만 저장소를 다시 여는 프로세스 전역 reader"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store: Optional[PoolStore] = None
+        self._key = None
+
+    def get(self, directory=None) -> Optional[PoolStore]:
+        """최신 세대 PoolStore (저장소가 없으면 None)
+
+        Args:
+            directory: 저장소 폴더 (None이면 POOL_STORE_DIR)
+        """
+        directory = directory or default_store_dir()
+        if directory is None:
+            return None
+
+        try:
+            stat = os.stat(Path(directory) / INDEX_FILE)
+        except FileNotFoundError:
+            return None
+
+        key = (str(directory), stat.st_ino, stat.st_mtime_ns)
+        if key == self._key:
+            return self._store
+
+        with self._lock:
+            if key != self._key:
+                self._store = PoolStore.open(directory)
+                self._key = key
+            return self._store
+
+    def invalidate(self):
+        """다음 get()에서 무조건 다시 열기"""
+        with self._lock:
+            self._key = None
+
+
+# 프로세스 전역 reader (모든 요청이 같은 mmap을 공유)
+_pool_store_reader = PoolStoreReader()
+
+
+def get_pool_store(directory=None) -> Optional[PoolStore]:
+    """프로세스 전역 mmap Pool 저장소 (저장소가 없으면 None)"""
+    return _pool_store_reader.get(directory)
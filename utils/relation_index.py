@@ -0,0 +1,111 @@
+"""
+PoolTagRelation 역색인
+- child 태그 → 해당 태그를 포함하는 relation 목록
+- relation별 필요한 (중복 제외) child 태그 수
+- 사용자 태그가 닿는 relation만 세어 조합이 완성된 relation을 찾음
+"""
+import threading
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from face_db_core.pool_state import get_relations_version
+from face_db_core.schema_def import PoolTagRelation
+
+
+class TagRelationIndex:
+    """parent_level별 child 태그 → relation 위치 역색인"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self.relations: List[Dict] = []
+        # parent_level → {child 태그: [relation 위치, ...]}
+        self._by_child: Dict[int, Dict[str, List[int]]] = {}
+        # relation 위치 → 필요한 child 태그 수 (중복 제외)
+        self._required: List[int] = []
+
+    @property
+    def version(self):
+        """현재 인덱스가 반영하는 relation 테이블 상태 (행 수, 최대 id, 태그 관계 버전)"""
+        return self._fingerprint
+
+    def _current_fingerprint(self, session: Session):
+        """relation 테이블 상태 - 행 추가/삭제는 개수/id로, 기존 행 UPDATE는 bump_relations_version()으로 감지"""
+        count, max_id = session.query(
+            func.count(PoolTagRelation.id), func.max(PoolTagRelation.id)
+        ).one()
+        return (count, max_id, get_relations_version(session))
+
+    def refresh(self, session: Session, force: bool = False) -> "TagRelationIndex":
+        """relation 테이블이 바뀌었을 때만 역색인 재구축"""
+        fingerprint = self._current_fingerprint(session)
+        if not force and fingerprint == self._fingerprint:
+            return self
+
+        with self._lock:
+            if not force and fingerprint == self._fingerprint:
+                return self
+
+            relations = [r.to_dict() for r in session.query(PoolTagRelation).order_by(PoolTagRelation.id).all()]
+            self._build(relations)
+            self._fingerprint = fingerprint
+
+        return self
+
+    def _build(self, relations: List[Dict]):
+        by_child = {}
+        required = []
+        for position, relation in enumerate(relations):
+            child_tags = set(relation.get("child_tags") or [])
+            required.append(len(child_tags))
+            level_index = by_child.setdefault(relation.get("parent_level"), {})
+            for tag in child_tags:
+                level_index.setdefault(tag, []).append(position)
+
+        # 조회 중인 요청이 반쯤 만들어진 색인을 보지 않도록 마지막에 교체
+        self.relations, self._by_child, self._required = relations, by_child, required
+
+    def invalidate(self):
+        """다음 refresh()에서 무조건 재구축"""
+        with self._lock:
+            self._fingerprint = None
+
+    def satisfied(self, tag_names: Iterable[str], parent_level: int) -> List[int]:
+        """child 태그가 모두 tag_names에 포함되는 relation 위치 (relation 순서)
+
+        Args:
+            tag_names: 사용자가 가진 태그 이름들
+            parent_level: relation의 parent_level (0 or 1)
+        """
+        level_index = self._by_child.get(parent_level)
+        if not level_index:
+            return []
+
+        hits = {}
+        for tag in set(tag_names):
+            for position in level_index.get(tag, ()):
+                hits[position] = hits.get(position, 0) + 1
+
+        required = self._required
+        return sorted(position for position, count in hits.items() if count == required[position])
+
+    def satisfied_relations(self, tag_names: Iterable[str], parent_level: int) -> List[Dict]:
+        """조합이 완성된 relation dict 목록 (relation 순서)"""
+        relations = self.relations
+        return [relations[position] for position in self.satisfied(tag_names, parent_level)]
+
+    def __len__(self):
+        return len(self.relations)
+
+    def __repr__(self):
+        return f"TagRelationIndex({len(self)} relations, version={self._fingerprint})"
+
+
+# 프로세스 전역 인덱스 (모든 요청이 공유)
+_tag_relation_index = TagRelationIndex()
+
+
+def get_tag_relation_index() -> TagRelationIndex:
+    """프로세스 전역 tag relation 역색인"""
+    return _tag_relation_index
@@ -0,0 +1,118 @@
+"""
+행 번호 기준 태그 역색인
+- 태그 이름 → 정수 id (정렬된 순서로 intern)
+- (행 × 태그) bool 행렬: 태그 열이 곧 해당 태그를 가진 행의 마스크
+- 태그별 행 수
+
+DataFrame 스냅샷 1개당 한 번 만들어 태그 선택/하이라이트/레벨 분류를
+행마다 리스트를 검사하는 대신 배열 마스크로 처리합니다.
+행 순서는 만들 때 사용한 DataFrame의 행 순서(위치)와 같습니다.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class TagIndex:
+    """(행 × 태그) 멤버십 행렬과 태그별 개수"""
+
+    __slots__ = ('tags', '_id_of', 'matrix', 'counts')
+
+    def __init__(self, tag_lists: Sequence):
+        """
+        Args:
+            tag_lists: 행별 태그 리스트 (리스트가 아닌 값은 태그 없음으로 처리)
+        """
+        tag_lists = [tags if isinstance(tags, list) else [] for tags in tag_lists]
+
+        self.tags: List[str] = sorted({tag for tags in tag_lists for tag in tags})
+        self._id_of: Dict[str, int] = {tag: tag_id for tag_id, tag in enumerate(self.tags)}
+
+        rows = [row for row, tags in enumerate(tag_lists) for _ in tags]
+        columns = [self._id_of[tag] for tags in tag_lists for tag in tags]
+
+        # 열 단위로 꺼내 쓰므로 열이 연속되도록 Fortran 순서
+        self.matrix = np.zeros((len(tag_lists), len(self.tags)), dtype=bool, order='F')
+        self.matrix[rows, columns] = True
+        self.counts = self.matrix.sum(axis=0)
+
+    @classmethod
+    def from_matrix(cls, tags: Sequence[str], matrix: np.ndarray) -> "TagIndex":
+        """이미 만들어진 (행 × 태그) bool 행렬로 생성 (복사 없음 - mmap Pool 저장소의 태그 배열 등)
+
+        Args:
+            tags: 정렬된 태그 이름 목록 (행렬 열 순서)
+            matrix: (행, len(tags)) bool 배열
+        """
+        index = cls.__new__(cls)
+        index.tags = list(tags)
+        index._id_of = {tag: tag_id for tag_id, tag in enumerate(index.tags)}
+        index.matrix = matrix
+        index.counts = np.asarray(matrix.sum(axis=0))
+        return index
+
+    @classmethod
+    def from_dataframe(cls, landmarks_data, column='tags') -> "TagIndex":
+        """DataFrame의 태그 컬럼으로 생성 (컬럼이 없으면 모든 행이 태그 없음)"""
+        if column not in landmarks_data.columns:
+            return cls([None] * len(landmarks_data))
+        return cls(landmarks_data[column].tolist())
+
+    def tag_id(self, tag: str) -> Optional[int]:
+        return self._id_of.get(tag)
+
+    def mask(self, tag: str) -> np.ndarray:
+        """(행,) bool - 태그를 가진 행 (없는 태그면 모두 False)"""
+        tag_id = self._id_of.get(tag)
+        if tag_id is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.matrix[:, tag_id]
+
+    def any_mask(self, tags: Iterable[str]) -> np.ndarray:
+        """(행,) bool - tags 중 하나라도 가진 행"""
+        tag_ids = [self._id_of[tag] for tag in tags if tag in self._id_of]
+        if not tag_ids:
+            return np.zeros(len(self), dtype=bool)
+        return self.matrix[:, tag_ids].any(axis=1)
+
+    def first_match(self, tags: Sequence[str]) -> np.ndarray:
+        """(행,) int - 각 행이 가진 tags 중 (tags 순서상) 첫 번째 태그의 위치, 없으면 -1"""
+        result = np.full(len(self), -1, dtype=np.intp)
+        for position in range(len(tags) - 1, -1, -1):
+            tag_id = self._id_of.get(tags[position])
+            if tag_id is not None:
+                result[self.matrix[:, tag_id]] = position
+        return result
+
+    def rows(self, tag: str) -> np.ndarray:
+        """태그를 가진 행 번호 배열"""
+        return np.flatnonzero(self.mask(tag))
+
+    def count(self, tag: str) -> int:
+        tag_id = self._id_of.get(tag)
+        return int(self.counts[tag_id]) if tag_id is not None else 0
+
+    def cooccurrence(self, source_tags: Sequence[str], target_tags: Sequence[str]) -> Dict[tuple, int]:
+        """{(source, target): 두 태그를 함께 가진 행 수} - 0인 쌍은 제외"""
+        sources = [tag for tag in source_tags if tag in self._id_of]
+        targets = [tag for tag in target_tags if tag in self._id_of]
+        if not sources or not targets:
+            return {}
+
+        source_matrix = self.matrix[:, [self._id_of[tag] for tag in sources]].astype(np.int32)
+        target_matrix = self.matrix[:, [self._id_of[tag] for tag in targets]].astype(np.int32)
+        counts = source_matrix.T @ target_matrix
+
+        return {
+            (sources[i], targets[j]): int(counts[i, j])
+            for i, j in zip(*np.nonzero(counts))
+        }
+
+    def __contains__(self, tag):
+        return tag in self._id_of
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def __repr__(self):
+        return f"TagIndex({len(self)} rows, {len(self.tags)} tags)"
@@ -0,0 +1,86 @@
+"""
+태그 조합 빈발 패턴 탐색 (Eclat)
+- 태그별 행 집합을 정수 비트셋으로 표현하고 AND + popcount로 지지도 계산
+- 지지도가 기준 미만인 조합은 더 확장하지 않음 (조합이 커지면 지지도는 줄기만 함)
+- top_k만 필요하므로 k번째 지지도가 정해지면 그 값으로 기준을 올려 탐색 공간을 줄임
+- 조합은 태그 이름 순으로 정렬된 튜플 (행에 저장된 태그 순서와 무관)
+"""
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .tag_index import TagIndex
+
+
+def _bitset(column: np.ndarray) -> int:
+    """(행,) bool → 행 번호 비트가 켜진 정수"""
+    return int.from_bytes(np.packbits(column, bitorder='little').tobytes(), 'little')
+
+
+def mine_tag_combinations(tag_index: TagIndex, length: int, min_support: int = 1,
+                          top_k: Optional[int] = 20) -> List[Tuple[Tuple[str, ...], int]]:
+    """길이 length인 태그 조합 중 지지도(함께 가진 행 수) 상위 조합
+
+    Args:
+        tag_index: 행 × 태그 멤버십
+        length: 조합 길이 (1 이상)
+        min_support: 최소 지지도 (이 값 미만인 조합은 제외)
+        top_k: 반환할 최대 개수 (None이면 기준을 넘는 모든 조합)
+
+    Returns:
+        [(정렬된 태그 튜플, 지지도), ...] - 지지도 내림차순, 같으면 태그 튜플 순
+    """
+    min_support = max(int(min_support), 1)
+    if length < 1:
+        return []
+
+    # 지지도가 높은 태그부터 탐색해야 top_k 기준이 빨리 올라감
+    items = [
+        (tag, _bitset(tag_index.mask(tag)))
+        for tag in tag_index.tags
+        if tag_index.count(tag) >= min_support
+    ]
+    items.sort(key=lambda item: (-item[1].bit_count(), item[0]))
+
+    found = []
+    top_counts = []  # top_k개 지지도의 min-heap (k번째 지지도 = 현재 기준)
+    threshold = min_support
+
+    def record(combo, support):
+        nonlocal threshold
+        found.append((tuple(sorted(combo)), support))
+        if top_k is None:
+            return
+        if len(top_counts) < top_k:
+            heapq.heappush(top_counts, support)
+        elif support > top_counts[0]:
+            heapq.heapreplace(top_counts, support)
+        if len(top_counts) == top_k:
+            # 같은 지지도는 태그 순으로 정렬해 고르므로 기준과 같은 조합까지는 유지
+            threshold = max(threshold, top_counts[0])
+
+    def extend(prefix, prefix_bits, start):
+        for position in range(start, len(items)):
+            tag, bits = items[position]
+            combined = prefix_bits & bits if prefix else bits
+            support = combined.bit_count()
+            if support < threshold:
+                continue
+            if len(prefix) + 1 == length:
+                record(prefix + [tag], support)
+            else:
+                extend(prefix + [tag], combined, position + 1)
+
+    extend([], 0, 0)
+
+    found = [(combo, support) for combo, support in found if support >= threshold]
+    found.sort(key=lambda item: (-item[1], item[0]))
+    return found if top_k is None else found[:top_k]
+
+
+def tag_cooccurrence_matrix(tag_index: TagIndex, tags: Sequence[str]) -> np.ndarray:
+    """(태그 × 태그) 함께 가진 행 수 - 대각선은 단일 태그 빈도, 대칭"""
+    columns = np.column_stack([tag_index.mask(tag) for tag in tags]).astype(np.int32) if tags else \
+        np.zeros((len(tag_index), 0), dtype=np.int32)
+    return columns.T @ columns
@@ -6,8 +6,9 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import json
-from .landmark_calculator import calculate_length, calculate_curvature
+from .landmark_calculator import compute_curvature, compute_length
+from .face_landmarks import PoolTensor
+from .tag_index import TagIndex
 
 
 def get_tag_groups():
@@ -36,8 +37,11 @@ def get_tag_groups():
     }
 
 
-def analyze_tag_relationships(landmarks_data):
-    """태그 간 관계 분석"""
+def analyze_tag_relationships(landmarks_data, tag_index=None):
+    """태그 간 관계 분석
+
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
     tag_groups = get_tag_groups()
 
     # 태그 레벨별 분류
@@ -53,37 +57,17 @@ def analyze_tag_relationships(landmarks_data):
         elif group_name.startswith("2차"):
             secondary_tags.update(tags)
 
-    # 관계 분석
-    abstract_to_primary = {}
-    primary_to_secondary = {}
-    abstract_to_secondary = {}
-
-    for _, row in landmarks_data.iterrows():
-        if 'tags' in row and row['tags']:
-            row_tags = row['tags'] if isinstance(row['tags'], list) else []
-
-            # 해당 행의 태그들을 레벨별로 분류
-            row_abstract = [tag for tag in row_tags if tag in abstract_tags]
-            row_primary = [tag for tag in row_tags if tag in primary_tags]
-            row_secondary = [tag for tag in row_tags if tag in secondary_tags]
-
-            # 추상 → 1차 관계
-            for abs_tag in row_abstract:
-                for prim_tag in row_primary:
-                    key = (abs_tag, prim_tag)
-                    abstract_to_primary[key] = abstract_to_primary.get(key, 0) + 1
-
-            # 1차 → 2차 관계
-            for prim_tag in row_primary:
-                for sec_tag in row_secondary:
-                    key = (prim_tag, sec_tag)
-                    primary_to_secondary[key] = primary_to_secondary.get(key, 0) + 1
-
-            # 추상 → 2차 관계 (직접 연결)
-            for abs_tag in row_abstract:
-                for sec_tag in row_secondary:
-                    key = (abs_tag, sec_tag)
-                    abstract_to_secondary[key] = abstract_to_secondary.get(key, 0) + 1
+    # 관계 분석: 레벨 간 태그 쌍을 함께 가진 행 수 (멤버십 행렬 곱)
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
+    abstract = [tag for tag in tag_index.tags if tag in abstract_tags]
+    primary = [tag for tag in tag_index.tags if tag in primary_tags]
+    secondary = [tag for tag in tag_index.tags if tag in secondary_tags]
+
+    abstract_to_primary = tag_index.cooccurrence(abstract, primary)  # 추상 → 1차 관계
+    primary_to_secondary = tag_index.cooccurrence(primary, secondary)  # 1차 → 2차 관계
+    abstract_to_secondary = tag_index.cooccurrence(abstract, secondary)  # 추상 → 2차 관계 (직접 연결)
 
     return {
         'abstract_to_primary': abstract_to_primary,
@@ -114,40 +98,29 @@ def sort_by_frequency(tags, relationships, is_source=True):
     return sorted_tags
 
 
-def execute_single_tag_analysis(landmarks_data, selected_tag, point1, point2, calc_type):
-    """단일 태그 분석 실행"""
-    st.write("### 🔄 분석 실행 중...")
+def execute_single_tag_analysis(landmarks_data, selected_tag, point1, point2, calc_type, pool=None, tag_index=None):
+    """단일 태그 분석 실행
 
-    # 선택된 태그를 가진 데이터 필터링
-    tag_data = []
-    all_data = []
-    names_with_tag = []
-    names_all = []
-
-    for _, row in landmarks_data.iterrows():
-        try:
-            # 랜드마크 데이터 파싱
-            if isinstance(row['landmarks'], str):
-                landmarks = json.loads(row['landmarks'])
-            else:
-                landmarks = row['landmarks']
-
-            # 측정값 계산
-            measurement = calculate_length(landmarks, point1, point2, calc_type)
+    pool: 미리 만들어 둔 PoolTensor (없으면 landmarks_data로 생성)
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
+    st.write("### 🔄 분석 실행 중...")
 
-            if measurement is not None:
-                all_data.append(measurement)
-                names_all.append(row['name'])
+    # 측정값 계산 (전체 얼굴 한 번에)
+    if pool is None:
+        pool = PoolTensor.from_dataframe(landmarks_data)
+    measurements = compute_length(pool, point1, point2, calc_type)
+    valid = ~np.isnan(measurements)
 
-                # 선택된 태그를 가진 데이터인지 확인
-                if 'tags' in row and row['tags']:
-                    row_tags = row['tags'] if isinstance(row['tags'], list) else []
-                    if selected_tag in row_tags:
-                        tag_data.append(measurement)
-                        names_with_tag.append(row['name'])
+    # 선택된 태그를 가진 데이터 필터링
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+    has_tag = tag_index.mask(selected_tag)
 
-        except Exception as e:
-            continue
+    names = landmarks_data['name'].to_numpy()
+    all_data = measurements[valid].tolist()
+    tag_data = measurements[valid & has_tag].tolist()
+    names_with_tag = names[valid & has_tag].tolist()
 
     if not tag_data:
         st.error(f"'{selected_tag}' 태그를 가진 데이터가 없습니다.")
@@ -255,8 +228,16 @@ def execute_single_tag_analysis(landmarks_data, selected_tag, point1, point2, ca
         st.dataframe(detail_df, use_container_width=True)
 
 
-def execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, point1, point2, calc_type1, point3, point4, calc_type2):
-    """레벨별 비교 분석 실행 (비율 계산)"""
+def execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, point1, point2, calc_type1, point3, point4, calc_type2,
+                                            pool=None, tag_index=None):
+    """레벨별 비교 분석 실행 (비율 계산)
+
+    분자/분모는 전체 얼굴에 대해 한 번만 계산하고 레벨은 태그 마스크로 나누므로
+    레벨 수와 무관하게 한 번의 계산으로 끝납니다.
+
+    pool: 미리 만들어 둔 PoolTensor (없으면 landmarks_data로 생성)
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
 
     # 해당 특성의 모든 레벨 태그 찾기
     tag_groups = get_tag_groups()
@@ -269,46 +250,30 @@ def execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, po
                     level = tag.split('-')[-1]
                     feature_levels[level] = tag
 
-    # 각 레벨별 데이터 수집
+    # 분자/분모 길이 (전체 얼굴 한 번에)
+    if pool is None:
+        pool = PoolTensor.from_dataframe(landmarks_data)
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
+    numerators = compute_length(pool, point1, point2, calc_type1)
+    denominators = compute_length(pool, point3, point4, calc_type2)
+    valid = ~np.isnan(numerators) & ~np.isnan(denominators) & (denominators != 0)
+    ratios = np.divide(numerators, denominators, out=np.full(len(pool), np.nan), where=valid)
+    names = landmarks_data['name'].to_numpy()
+
+    # 각 레벨별 데이터 수집 (태그 마스크로 분류)
     level_data = {}
     level_names = {}
     level_numerators = {}  # 분자 값들
     level_denominators = {}  # 분모 값들
 
     for level, full_tag in feature_levels.items():
-        level_data[level] = []
-        level_names[level] = []
-        level_numerators[level] = []
-        level_denominators[level] = []
-
-        for _, row in landmarks_data.iterrows():
-            try:
-                # 랜드마크 데이터 파싱
-                if isinstance(row['landmarks'], str):
-                    landmarks = json.loads(row['landmarks'])
-                else:
-                    landmarks = row['landmarks']
-
-                # 분자 길이 계산
-                numerator = calculate_length(landmarks, point1, point2, calc_type1)
-                # 분모 길이 계산
-                denominator = calculate_length(landmarks, point3, point4, calc_type2)
-
-                if numerator is not None and denominator is not None and denominator != 0:
-                    # 비율 계산
-                    ratio = numerator / denominator
-
-                    # 해당 레벨 태그를 가진 데이터인지 확인
-                    if 'tags' in row and row['tags']:
-                        row_tags = row['tags'] if isinstance(row['tags'], list) else []
-                        if full_tag in row_tags:
-                            level_data[level].append(ratio)
-                            level_names[level].append(row['name'])
-                            level_numerators[level].append(numerator)
-                            level_denominators[level].append(denominator)
-
-            except Exception as e:
-                continue
+        in_level = valid & tag_index.mask(full_tag)
+        level_data[level] = ratios[in_level].tolist()
+        level_names[level] = names[in_level].tolist()
+        level_numerators[level] = numerators[in_level].tolist()
+        level_denominators[level] = denominators[in_level].tolist()
 
     # 데이터가 있는 레벨만 필터링
     valid_levels = {level: data for level, data in level_data.items() if len(data) > 0}
@@ -593,8 +558,14 @@ def execute_level_comparison_analysis_ratio(landmarks_data, selected_feature, po
             st.dataframe(detail_df, use_container_width=True)
 
 
-def execute_level_comparison_analysis(landmarks_data, selected_feature, point1, point2, calc_type):
-    """레벨별 비교 분석 실행"""
+def execute_level_comparison_analysis(landmarks_data, selected_feature, point1, point2, calc_type, pool=None, tag_index=None):
+    """레벨별 비교 분석 실행
+
+    측정값은 전체 얼굴에 대해 한 번만 계산하고 레벨은 태그 마스크로 나눕니다.
+
+    pool: 미리 만들어 둔 PoolTensor (없으면 landmarks_data로 생성)
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
 
     # 해당 특성의 모든 레벨 태그 찾기
     tag_groups = get_tag_groups()
@@ -607,35 +578,24 @@ def execute_level_comparison_analysis(landmarks_data, selected_feature, point1,
                     level = tag.split('-')[-1]
                     feature_levels[level] = tag
 
-    # 각 레벨별 데이터 수집
+    # 측정값 계산 (전체 얼굴 한 번에)
+    if pool is None:
+        pool = PoolTensor.from_dataframe(landmarks_data)
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+
+    measurements = compute_length(pool, point1, point2, calc_type)
+    valid = ~np.isnan(measurements)
+    names = landmarks_data['name'].to_numpy()
+
+    # 각 레벨별 데이터 수집 (태그 마스크로 분류)
     level_data = {}
     level_names = {}
 
     for level, full_tag in feature_levels.items():
-        level_data[level] = []
-        level_names[level] = []
-
-        for _, row in landmarks_data.iterrows():
-            try:
-                # 랜드마크 데이터 파싱
-                if isinstance(row['landmarks'], str):
-                    landmarks = json.loads(row['landmarks'])
-                else:
-                    landmarks = row['landmarks']
-
-                # 측정값 계산
-                measurement = calculate_length(landmarks, point1, point2, calc_type)
-
-                if measurement is not None:
-                    # 해당 레벨 태그를 가진 데이터인지 확인
-                    if 'tags' in row and row['tags']:
-                        row_tags = row['tags'] if isinstance(row['tags'], list) else []
-                        if full_tag in row_tags:
-                            level_data[level].append(measurement)
-                            level_names[level].append(row['name'])
-
-            except Exception as e:
-                continue
+        in_level = valid & tag_index.mask(full_tag)
+        level_data[level] = measurements[in_level].tolist()
+        level_names[level] = names[in_level].tolist()
 
     # 데이터가 있는 레벨만 필터링
     valid_levels = {level: data for level, data in level_data.items() if len(data) > 0}
@@ -865,8 +825,12 @@ def execute_level_comparison_analysis(landmarks_data, selected_feature, point1,
             st.dataframe(detail_df, use_container_width=True)
 
 
-def execute_level_curvature_analysis(landmarks_data, selected_feature, point_group):
-    """레벨별 곡률 패턴 분석 실행"""
+def execute_level_curvature_analysis(landmarks_data, selected_feature, point_group, pool=None, tag_index=None):
+    """레벨별 곡률 패턴 분석 실행
+
+    pool: 미리 만들어 둔 PoolTensor (없으면 landmarks_data로 생성)
+    tag_index: 미리 만들어 둔 TagIndex (없으면 landmarks_data로 생성)
+    """
     st.write("### 🌊 곡률 패턴 분석 실행 중...")
 
     tag_groups = get_tag_groups()
@@ -899,38 +863,32 @@ def execute_level_curvature_analysis(landmarks_data, selected_feature, point_gro
         else:
             st.success(f"특성 '{selected_feature}'에서 {len(feature_tags)}개 태그를 찾았습니다: {', '.join(feature_tags)}")
 
+    # 전체 얼굴의 곡률을 (얼굴 × 점) 행렬로 한 번에 계산
+    if pool is None:
+        pool = PoolTensor.from_dataframe(landmarks_data)
+    curvature_matrix = compute_curvature(pool, point_group)
+    has_curvature = ~np.isnan(curvature_matrix).any(axis=1)
+
     # 각 레벨별 곡률 데이터 수집
     level_curvatures = {}  # {level: {face_name: [curvature_values]}}
     level_names = {}  # {level: [face_names]}
 
-    for _, row in landmarks_data.iterrows():
-        try:
-            # 랜드마크 데이터 파싱
-            if isinstance(row['landmarks'], str):
-                landmarks = json.loads(row['landmarks'])
-            else:
-                landmarks = row['landmarks']
-
-            # 태그 확인
-            if 'tags' in row and row['tags']:
-                row_tags = row['tags'] if isinstance(row['tags'], list) else []
-
-                # 선택된 특성의 태그가 있는지 확인
-                for tag in feature_tags:
-                    if tag in row_tags:
-                        # 곡률 계산
-                        curvatures = calculate_curvature(landmarks, point_group)
-                        if curvatures is not None:
-                            if tag not in level_curvatures:
-                                level_curvatures[tag] = {}
-                                level_names[tag] = []
-
-                            level_curvatures[tag][row['name']] = curvatures
-                            level_names[tag].append(row['name'])
-                        break
-        except Exception as e:
-            st.error(f"데이터 처리 오류 ({row['name']}): {e}")
-            continue
+    if tag_index is None:
+        tag_index = TagIndex.from_dataframe(landmarks_data)
+    names = landmarks_data['name'].tolist()
+
+    # 선택된 특성의 태그 중 첫 번째로 가진 태그의 레벨로 분류
+    first_tag = tag_index.first_match(feature_tags)
+
+    for row_idx in np.flatnonzero((first_tag >= 0) & has_curvature):
+        tag = feature_tags[first_tag[row_idx]]
+
+        if tag not in level_curvatures:
+            level_curvatures[tag] = {}
+            level_names[tag] = []
+
+        level_curvatures[tag][names[row_idx]] = curvature_matrix[row_idx].tolist()
+        level_names[tag].append(names[row_idx])
 
     # 유효한 레벨만 필터링
     valid_levels = {level: data for level, data in level_curvatures.items() if data}
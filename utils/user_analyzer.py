@@ -1,25 +1,46 @@
 """
 User 특징 태그 분석 서비스
 - User의 2nd tag 측정값과 Pool 데이터 비교
-- Percentile 기반 특징 태그 추출
-- Tag relation 기반 상위 태그 역추적
+- Percentile 기반 특징 태그 추출 (프로세스 전역 PoolPercentileIndex 사용)
+- Tag relation 기반 상위 태그 역추적 (프로세스 전역 TagRelationIndex 사용)
+- 입력 상태(User 측정값, 두 인덱스 버전)가 같으면 이전 분석 결과 재사용 (AnalysisResultCache)
+- 계산한 percentile은 UserTagPercentile에 저장 → 임계값만 바꾼 분석은 저장된 벡터를 메모리에서 필터링
+- Pool이 바뀌면 reanalyze_all()로 전체 User percentile을 일괄 갱신 (분포가 바뀐 태그만)
 """
 import json
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from pathlib import Path
-from sqlalchemy.orm import Session
-from face_db_core.schema_def import (
-    User2ndTagValue, Pool2ndTagValue, PoolTagRelation
-)
 import numpy as np
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from face_db_core.schema_def import User2ndTagValue, UserTagPercentile
+from .analysis_cache import AnalysisResultCache, analysis_etag, etag_matches, get_analysis_cache
+from .percentile_index import PoolPercentileIndex, get_pool_percentile_index, percentile_of
+from .relation_index import TagRelationIndex, get_tag_relation_index
+
+
+# UserTagPercentile upsert (ON CONFLICT (user_id, tag_name, side) DO UPDATE) 지원 DB
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+_PERCENTILE_KEY = ('user_id', 'tag_name', 'side')
+_PERCENTILE_FIELDS = ('value_id', '측정값', 'percentile', 'pool_digest', 'computed_at')
 
 
 class UserAnalyzer:
     """User 특징 분석 및 태그 추출"""
 
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        percentile_index: Optional[PoolPercentileIndex] = None,
+        relation_index: Optional[TagRelationIndex] = None
+    ):
         self.session = db_session
-        self._tag_relations = None
+        self._percentile_index = percentile_index or get_pool_percentile_index()
+        self._relation_index = relation_index or get_tag_relation_index()
+        self._relation_index_checked = False
 
     def analyze_user_features(
         self,
@@ -42,9 +63,28 @@ class UserAnalyzer:
                 "derived_0th_tags": [...]
             }
         """
-        # 1. User의 2nd tag 측정값 조회
-        user_values = self._get_user_2nd_tag_values(user_id)
-        if not user_values:
+        # 1. User의 2nd tag 측정값 + percentile (저장된 값 재사용, Pool 분포가 바뀐 태그만 다시 계산)
+        percentile_vector = self.get_percentile_vector(user_id)
+
+        # 2~4. 임계값 필터링 + 상위 태그 역추적 (메모리 연산)
+        return self.analyze_percentile_vector(percentile_vector, top10_threshold, top25_threshold)
+
+    def analyze_percentile_vector(
+        self,
+        percentile_vector: List[Dict],
+        top10_threshold: float = 0.90,
+        top25_threshold: float = 0.75
+    ) -> Dict:
+        """
+        percentile 벡터에 임계값을 적용해 특징 태그 추출 (Pool 측정값 조회 없음)
+
+        Args:
+            percentile_vector: get_percentile_vector() / load_percentile_vectors()의 User 1명 벡터
+
+        Returns:
+            analyze_user_features와 같은 형식
+        """
+        if not percentile_vector:
             return {
                 "extracted_2nd_tags": [],
                 "derived_1st_tags": [],
@@ -53,7 +93,7 @@ class UserAnalyzer:
 
         # 2. 특징적인 2nd 태그 추출
         extracted_2nd_tags = self._extract_feature_2nd_tags(
-            user_values,
+            percentile_vector,
             top10_threshold,
             top25_threshold
         )
@@ -76,6 +116,329 @@ class UserAnalyzer:
             "derived_0th_tags": derived_0th_tags
         }
 
+    def analysis_key(
+        self,
+        user_id: int,
+        top10_threshold: float = 0.90,
+        top25_threshold: float = 0.75
+    ) -> Tuple:
+        """분석 결과를 결정하는 입력 상태 (결과 캐시 key)
+
+        두 인덱스를 최신으로 갱신한 뒤 버전을 읽으므로
+        Pool 측정값이나 relation 테이블이 바뀌면 key도 바뀝니다.
+
+        Returns:
+            (user_id, top10, top25, (User 측정값 수, 최대 id), Pool 버전, relation 인덱스 버전)
+        """
+        user_state = self.session.query(
+            func.count(User2ndTagValue.id), func.max(User2ndTagValue.id)
+        ).filter(
+            User2ndTagValue.user_id == user_id
+        ).one()
+
+        self._percentile_index.refresh(self.session)
+        relation_index = self._load_tag_relations()
+
+        return (
+            user_id,
+            float(top10_threshold),
+            float(top25_threshold),
+            tuple(user_state),
+            self._percentile_index.version,
+            relation_index.version
+        )
+
+    def analyze_user_features_cached(
+        self,
+        user_id: int,
+        top10_threshold: float = 0.90,
+        top25_threshold: float = 0.75,
+        cache: Optional[AnalysisResultCache] = None,
+        if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[Dict], str]:
+        """
+        analyze_user_features 결과를 입력 상태 key로 캐시
+
+        Args:
+            cache: 결과 캐시 (None이면 프로세스 전역 캐시)
+            if_none_match: 클라이언트의 If-None-Match 헤더 (ETag가 같으면 결과를 만들지 않음)
+
+        Returns:
+            (분석 결과 - 요청 간 공유되므로 읽기 전용, ETag가 일치하면 None, ETag)
+        """
+        cache = cache or get_analysis_cache()
+        key = self.analysis_key(user_id, top10_threshold, top25_threshold)
+        etag = analysis_etag(key)
+        if etag_matches(if_none_match, etag):
+            return None, etag
+
+        result = cache.get_or_compute(
+            key,
+            lambda: self.analyze_user_features(user_id, top10_threshold, top25_threshold)
+        )
+        return result, etag
+
+    def get_percentile_vector(self, user_id: int) -> List[Dict]:
+        """
+        User 2nd tag 측정값별 Pool 대비 percentile
+
+        저장된 UserTagPercentile 중 (측정값, Pool 분포 digest)가 그대로인 태그는 재사용하고
+        나머지만 인덱스로 계산해 저장합니다.
+
+        Returns:
+            [{"id", "user_id", "tag_name", "side", "측정값", "percentile"}, ...]
+            (User2ndTagValue 순서, percentile은 측정값이나 Pool 데이터가 없으면 None)
+        """
+        user_values = self._get_user_2nd_tag_values(user_id)
+        if not user_values:
+            return []
+
+        # Pool이 바뀌었을 때만 인덱스 재구축
+        self._percentile_index.refresh(self.session)
+
+        stored = {
+            (row.tag_name, row.side): row
+            for row in self.session.query(UserTagPercentile).filter(
+                UserTagPercentile.user_id == user_id
+            ).all()
+        }
+
+        changed = []
+        for user_val in user_values:
+            key = (user_val["tag_name"], user_val["side"])
+            pool_values, digest = self._percentile_index.lookup(*key)
+            row = stored.get(key)
+            if (row is not None and row.value_id == user_val["id"]
+                    and row.측정값 == user_val["측정값"] and row.pool_digest == digest):
+                user_val["percentile"] = row.percentile
+            else:
+                user_val["percentile"] = percentile_of(pool_values, user_val["측정값"])
+                changed.append((user_val, digest))
+
+        if changed:
+            self._store_percentiles(user_id, changed, stored)
+
+        return user_values
+
+    def _store_percentiles(self, user_id: int, changed: List[Tuple[Dict, Optional[str]]], stored: Dict):
+        """바뀐 percentile만 UserTagPercentile에 upsert (같은 행을 동시에 저장하면 나중에 저장한 쪽 유지)"""
+        computed_at = datetime.utcnow()
+        self._upsert_percentiles([
+            {
+                'user_id': user_id,
+                'value_id': user_val["id"],
+                'tag_name': user_val["tag_name"],
+                'side': user_val["side"],
+                '측정값': user_val["측정값"],
+                'percentile': user_val["percentile"],
+                'pool_digest': digest,
+                'computed_at': computed_at
+            }
+            for user_val, digest in changed
+        ])
+        # 세션에 이미 올라온 행은 다음 접근 시 DB에서 다시 읽도록 만료
+        for user_val, _ in changed:
+            row = stored.get((user_val["tag_name"], user_val["side"]))
+            if row is not None:
+                self.session.expire(row)
+
+    def _upsert_percentiles(self, rows: List[Dict]):
+        """UserTagPercentile 행 일괄 upsert - (user_id, tag_name, side)가 있으면 값만 갱신
+
+        ORM 객체를 거치지 않는 단일 문장이므로 요청(get_percentile_vector)과
+        일괄 갱신(reanalyze_all)이 같은 행을 동시에 써도 IntegrityError / StaleDataError가 나지 않습니다.
+
+        Raises:
+            NotImplementedError: upsert를 지원하지 않는 DB (PostgreSQL, SQLite만 지원)
+        """
+        if not rows:
+            return
+        dialect = self.session.get_bind().dialect.name
+        make_insert = _UPSERT_INSERTS.get(dialect)
+        if make_insert is None:
+            raise NotImplementedError(f"UserTagPercentile upsert를 지원하지 않는 DB: {dialect}")
+
+        statement = make_insert(UserTagPercentile)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(_PERCENTILE_KEY),
+            set_={field: statement.excluded[field] for field in _PERCENTILE_FIELDS}
+        )
+        self.session.execute(statement, rows)
+
+    def load_percentile_vectors(self, user_ids: Optional[Iterable[int]] = None) -> Dict[int, List[Dict]]:
+        """
+        저장된 percentile 벡터 일괄 조회 (Pool 측정값/인덱스를 사용하지 않음)
+
+        Args:
+            user_ids: 조회할 User (None이면 저장된 모든 User)
+
+        Returns:
+            {user_id: get_percentile_vector()와 같은 형식의 벡터}
+        """
+        query = self.session.query(UserTagPercentile)
+        if user_ids is not None:
+            query = query.filter(UserTagPercentile.user_id.in_(list(user_ids)))
+
+        vectors: Dict[int, List[Dict]] = {}
+        for row in query.order_by(UserTagPercentile.user_id, UserTagPercentile.value_id).all():
+            vectors.setdefault(row.user_id, []).append({
+                "id": row.value_id,
+                "user_id": row.user_id,
+                "tag_name": row.tag_name,
+                "side": row.side,
+                "측정값": row.측정값,
+                "percentile": row.percentile
+            })
+        return vectors
+
+    def analyze_threshold_variants(
+        self,
+        variants: Sequence[Tuple[float, float]],
+        user_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Dict[Tuple[float, float], Dict]]:
+        """
+        저장된 percentile 벡터로 여러 임계값 조합을 일괄 분석 (Pool 측정값 조회 없음)
+
+        Args:
+            variants: [(top10_threshold, top25_threshold), ...]
+            user_ids: 분석할 User (None이면 percentile이 저장된 모든 User)
+
+        Returns:
+            {user_id: {(top10_threshold, top25_threshold): analyze_user_features 형식 결과}}
+        """
+        vectors = self.load_percentile_vectors(user_ids)
+        return {
+            user_id: {
+                (top10, top25): self.analyze_percentile_vector(vector, top10, top25)
+                for top10, top25 in variants
+            }
+            for user_id, vector in vectors.items()
+        }
+
+    def reanalyze_all(self, workers: int = 1, batch_size: int = 5000, force: bool = False) -> Dict:
+        """
+        모든 User의 percentile을 현재 Pool 기준으로 일괄 갱신
+
+        - percentile 인덱스를 한 번만 갱신하고 (User × 태그) 측정값 행렬을 만든 뒤
+          태그(열)별로 np.searchsorted 한 번에 전체 User를 계산
+        - 저장된 행의 (측정값, Pool 분포 digest)가 그대로인 칸은 건너뜀
+          → 분포가 바뀐 태그와 새로 추가된 User 측정값만 다시 계산/저장
+        - 바뀐 칸은 batch_size 단위로 upsert, 측정값 행이 없어진 (User, 태그)의 저장 행은 삭제
+          (commit은 호출한 쪽 세션에서)
+
+        Args:
+            workers: 열(태그) 계산에 사용할 스레드 수 (searchsorted는 GIL을 놓음)
+            batch_size: upsert / delete 한 번에 보낼 행 수
+            force: True면 저장된 값과 무관하게 모든 칸을 다시 계산
+
+        Returns:
+            {"users", "tags", "recomputed_tags", "updated", "removed"}
+        """
+        index = self._percentile_index.refresh(self.session)
+
+        value_rows = self.session.query(
+            User2ndTagValue.id, User2ndTagValue.user_id, User2ndTagValue.tag_name,
+            User2ndTagValue.side, User2ndTagValue.측정값
+        ).order_by(User2ndTagValue.id).all()
+        if not value_rows:
+            removed = self.session.execute(delete(UserTagPercentile)).rowcount
+            return {"users": 0, "tags": 0, "recomputed_tags": 0, "updated": 0, "removed": removed}
+
+        # 1. (User × 태그) 행렬 - 측정값(NaN = 없음), User2ndTagValue id(-1 = 측정값 행 없음)
+        user_ids = sorted({row.user_id for row in value_rows})
+        keys = sorted({(row.tag_name, row.side) for row in value_rows})
+        user_pos = {user_id: position for position, user_id in enumerate(user_ids)}
+        key_pos = {key: position for position, key in enumerate(keys)}
+
+        shape = (len(user_ids), len(keys))
+        values = np.full(shape, np.nan)
+        value_ids = np.full(shape, -1, dtype=np.int64)
+        for row in value_rows:
+            cell = (user_pos[row.user_id], key_pos[(row.tag_name, row.side)])
+            values[cell] = np.nan if row.측정값 is None else row.측정값
+            value_ids[cell] = row.id
+        present = value_ids >= 0
+
+        # 2. 저장된 percentile 중 그대로 쓸 수 있는 칸 (같은 측정값 행, 같은 Pool 분포)
+        digests = [index.lookup(*key)[1] for key in keys]
+        fresh = np.zeros(shape, dtype=bool)
+        orphan_ids = []  # 대응하는 User 측정값 행이 없는 저장 행
+        stored_rows = self.session.query(
+            UserTagPercentile.id, UserTagPercentile.user_id, UserTagPercentile.tag_name,
+            UserTagPercentile.side, UserTagPercentile.value_id, UserTagPercentile.측정값,
+            UserTagPercentile.pool_digest
+        ).all()
+        for row in stored_rows:
+            row_position = user_pos.get(row.user_id)
+            column = key_pos.get((row.tag_name, row.side))
+            if row_position is None or column is None or not present[row_position, column]:
+                orphan_ids.append(row.id)
+                continue
+            cell = (row_position, column)
+            stored_value = np.nan if row.측정값 is None else row.측정값
+            same_value = stored_value == values[cell] or (np.isnan(stored_value) and np.isnan(values[cell]))
+            fresh[cell] = (not force and row.value_id == value_ids[cell] and same_value
+                           and row.pool_digest == digests[column])
+
+        stale = present & ~fresh
+        stale_columns = np.flatnonzero(stale.any(axis=0))
+
+        # 3. 바뀐 태그 열만 searchsorted (열마다 Pool 배열이 다르므로 열 단위로 벡터화)
+        percentiles = np.full(shape, np.nan)
+
+        def compute_column(column):
+            pool_values = index.lookup(*keys[column])[0]
+            if pool_values is None or len(pool_values) == 0:
+                return
+            column_values = values[:, column]
+            measured = ~np.isnan(column_values)
+            percentiles[measured, column] = (
+                np.searchsorted(pool_values, column_values[measured], side='right') / len(pool_values)
+            )
+
+        if workers > 1 and len(stale_columns) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(compute_column, stale_columns))
+        else:
+            for column in stale_columns:
+                compute_column(column)
+
+        # 4. 측정값이 없어진 저장 행 삭제, 바뀐 칸만 upsert
+        for start in range(0, len(orphan_ids), batch_size):
+            self.session.execute(
+                delete(UserTagPercentile).where(UserTagPercentile.id.in_(orphan_ids[start:start + batch_size]))
+            )
+
+        stale_cells = np.argwhere(stale)
+        computed_at = datetime.utcnow()
+        new_rows = []
+        for row_position, column in stale_cells:
+            tag_name, side = keys[column]
+            value = values[row_position, column]
+            percentile = percentiles[row_position, column]
+            new_rows.append({
+                'user_id': user_ids[row_position],
+                'value_id': int(value_ids[row_position, column]),
+                'tag_name': tag_name,
+                'side': side,
+                '측정값': None if np.isnan(value) else float(value),
+                'percentile': None if np.isnan(percentile) else float(percentile),
+                'pool_digest': digests[column],
+                'computed_at': computed_at
+            })
+            if len(new_rows) >= batch_size:
+                self._upsert_percentiles(new_rows)
+                new_rows = []
+        self._upsert_percentiles(new_rows)
+
+        return {
+            "users": len(user_ids),
+            "tags": len(keys),
+            "recomputed_tags": len(stale_columns),
+            "updated": len(stale_cells),
+            "removed": len(orphan_ids)
+        }
+
     def _get_user_2nd_tag_values(self, user_id: int) -> List[Dict]:
         """
         User의 2nd tag 측정값 조회
@@ -85,7 +448,7 @@ class UserAnalyzer:
         """
         values = self.session.query(User2ndTagValue).filter(
             User2ndTagValue.user_id == user_id
-        ).all()
+        ).order_by(User2ndTagValue.id).all()
 
         return [v.to_dict() for v in values]
 
@@ -101,27 +464,19 @@ class UserAnalyzer:
         케이스1: 상위 10% 태그
         케이스2: 상위 25% 태그 중 tag_relation 조합을 만드는 태그들
 
+        Args:
+            user_values: percentile이 채워진 벡터 (get_percentile_vector)
+
         Returns:
             [{"tag_name": "eye-길이", "side": "left", "측정값": 0.123, "percentile": 0.95}, ...]
         """
         extracted = []
 
         for user_val in user_values:
-            tag_name = user_val["tag_name"]
-            side = user_val["side"]
-            user_measurement = user_val["측정값"]
-
-            if user_measurement is None:
-                continue
-
-            # Pool에서 동일한 tag_name + side의 측정값들 조회
-            percentile = self._calculate_percentile(tag_name, side, user_measurement)
-
+            percentile = user_val.get("percentile")
             if percentile is None:
                 continue
 
-            user_val["percentile"] = percentile
-
             # 케이스1: 상위 10%
             if percentile >= top10_threshold:
                 extracted.append(user_val)
@@ -144,40 +499,6 @@ class UserAnalyzer:
 
         return extracted
 
-    def _calculate_percentile(
-        self,
-        tag_name: str,
-        side: str,
-        user_value: float
-    ) -> Optional[float]:
-        """
-        Pool 데이터와 비교하여 User 측정값의 percentile 계산
-
-        Args:
-            tag_name: 태그 이름
-            side: 측정 위치
-            user_value: User의 측정값
-
-        Returns:
-            percentile (0.0 ~ 1.0) 또는 None
-        """
-        # Pool에서 동일한 tag + side의 모든 측정값 조회
-        pool_values = self.session.query(Pool2ndTagValue.측정값).filter(
-            Pool2ndTagValue.tag_name == tag_name,
-            Pool2ndTagValue.side == side,
-            Pool2ndTagValue.측정값.isnot(None)
-        ).all()
-
-        if not pool_values:
-            return None
-
-        pool_measurements = [v[0] for v in pool_values]
-
-        # Numpy percentile 계산
-        percentile = np.sum(np.array(pool_measurements) <= user_value) / len(pool_measurements)
-
-        return float(percentile)
-
     def _find_tags_forming_relations(self, top25_tags: List[Dict]) -> List[Dict]:
         """
         상위 25% 태그들 중 tag_relation에서 특정 1차 태그를 조합하는 태그들 찾기
@@ -191,28 +512,19 @@ class UserAnalyzer:
         if not top25_tags:
             return []
 
-        relations = self._load_tag_relations()
-        if not relations:
-            return []
-
-        forming_tags = []
+        relation_index = self._load_tag_relations()
 
         # tag_name만 추출 (side 제외)
         top25_tag_names = set(t["tag_name"] for t in top25_tags)
 
-        # 각 relation을 체크
-        for relation in relations:
-            parent_level = relation.get("parent_level")
-            child_tags = relation.get("child_tags", [])
-
-            # parent_level이 1이고 (1차 태그를 만드는 경우)
-            # child_tags가 모두 top25_tag_names에 포함되는 경우
-            if parent_level == 1 and child_tags:
-                if all(tag in top25_tag_names for tag in child_tags):
-                    # 이 child_tags들을 forming_tags에 추가
-                    for tag in child_tags:
-                        matching_tags = [t for t in top25_tags if t["tag_name"] == tag]
-                        forming_tags.extend(matching_tags)
+        # parent_level이 1이고 (1차 태그를 만드는 경우)
+        # child_tags가 모두 top25_tag_names에 포함되는 relation만 역색인으로 조회
+        forming_tags = []
+        for relation in relation_index.satisfied_relations(top25_tag_names, parent_level=1):
+            # 이 child_tags들을 forming_tags에 추가
+            for tag in relation["child_tags"]:
+                matching_tags = [t for t in top25_tags if t["tag_name"] == tag]
+                forming_tags.extend(matching_tags)
 
         # 중복 제거
         unique_tags = []
@@ -243,41 +555,28 @@ class UserAnalyzer:
         if not child_tags:
             return []
 
-        relations = self._load_tag_relations()
-        if not relations:
-            return []
+        relation_index = self._load_tag_relations()
 
         # child tag names만 추출
         child_tag_names = set(t["tag_name"] if isinstance(t, dict) else t for t in child_tags)
 
+        # parent_level이 일치하고
+        # child_tags가 모두 우리가 가진 child_tag_names에 포함되는 relation
         parent_tags = set()
-
-        # 각 relation을 체크
-        for relation in relations:
-            rel_parent_level = relation.get("parent_level")
-            rel_parent_tags = relation.get("parent_tags", [])
-            rel_child_tags = relation.get("child_tags", [])
-
-            # parent_level이 일치하고
-            # child_tags가 모두 우리가 가진 child_tag_names에 포함되는 경우
-            if rel_parent_level == parent_level and rel_child_tags:
-                if all(tag in child_tag_names for tag in rel_child_tags):
-                    parent_tags.update(rel_parent_tags)
+        for relation in relation_index.satisfied_relations(child_tag_names, parent_level):
+            parent_tags.update(relation.get("parent_tags", []))
 
         return list(parent_tags)
 
-    def _load_tag_relations(self) -> List[Dict]:
+    def _load_tag_relations(self) -> TagRelationIndex:
         """
-        Tag relation 로드 (캐싱)
+        Tag relation 역색인 로드 (요청 간 공유, relation 테이블이 바뀌었을 때만 재구축)
 
         Returns:
-            [{"parent_tags": [...], "child_tags": [...], "parent_level": 1}, ...]
+            TagRelationIndex (relations: [{"parent_tags": [...], "child_tags": [...], "parent_level": 1}, ...])
         """
-        if self._tag_relations is not None:
-            return self._tag_relations
-
-        # DB에서 로드
-        relations = self.session.query(PoolTagRelation).all()
-        self._tag_relations = [r.to_dict() for r in relations]
+        if not self._relation_index_checked:
+            self._relation_index.refresh(self.session)
+            self._relation_index_checked = True
 
-        return self._tag_relations
+        return self._relation_index